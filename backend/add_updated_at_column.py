@@ -1,35 +1,28 @@
-import psycopg2
-import time
-from psycopg2 import OperationalError
+import argparse
+from db_pool import get_connection, release_connection
+from backfill import backfill
+from dry_run import dry_run_statements, print_dry_run_report
 
-# Database connection parameters
-DB_NAME = "vibeflow"
-DB_USER = "viber"
-DB_PASSWORD = "hfFJ62NFDQrUG01CabZcKregE3L0HG72"
-DB_HOST = "dpg-cvvurnd6ubrc73ak94rg-a.virginia-postgres.render.com"
-DB_PORT = "5432"
+ADD_COLUMN_SQL = [
+    # Existing rows stay NULL for the backfill below, new rows get the default
+    """
+    ALTER TABLE customer_support 
+    ADD COLUMN updated_at TIMESTAMP
+    """,
+    """
+    ALTER TABLE customer_support 
+    ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP
+    """,
+]
 
-def get_connection(max_retries=3, retry_delay=5):
-    for attempt in range(max_retries):
-        try:
-            conn = psycopg2.connect(
-                dbname=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                host=DB_HOST,
-                port=DB_PORT,
-                connect_timeout=10
-            )
-            return conn
-        except OperationalError as e:
-            print(f"Connection attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                raise
+# What the batched backfill amounts to, for dry runs
+BACKFILL_SQL = """
+    UPDATE customer_support 
+    SET updated_at = created_at 
+    WHERE updated_at IS NULL
+"""
 
-def add_updated_at_column():
+def add_updated_at_column(batch_size: int = 10000, max_replication_lag: float = 10.0, dry_run: bool = False):
     try:
         print("🔄 Adding updated_at column to customer_support table...")
         
@@ -45,26 +38,29 @@ def add_updated_at_column():
             AND column_name = 'updated_at'
         """)
         
-        if not cur.fetchone():
+        column_exists = cur.fetchone() is not None
+
+        if dry_run:
+            statements = ([] if column_exists else ADD_COLUMN_SQL) + [BACKFILL_SQL]
+            print_dry_run_report(dry_run_statements(conn, statements), "Dry run of add_updated_at_column")
+            return
+
+        if not column_exists:
             # Add updated_at column
-            cur.execute("""
-                ALTER TABLE customer_support 
-                ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            """)
-            
-            # Update existing records to set updated_at = created_at
-            cur.execute("""
-                UPDATE customer_support 
-                SET updated_at = created_at 
-                WHERE updated_at IS NULL
-            """)
-            
-            print("✅ Added updated_at column and updated existing records")
+            for statement in ADD_COLUMN_SQL:
+                cur.execute(statement)
+            conn.commit()
+            print("✅ Added updated_at column")
         else:
             print("✅ updated_at column already exists")
 
-        # Commit changes
-        conn.commit()
+        # Update existing records to set updated_at = created_at, in batches
+        updated = backfill(
+            conn, "customer_support_updated_at", "customer_support",
+            "updated_at = created_at", "updated_at IS NULL",
+            batch_size=batch_size, max_replication_lag=max_replication_lag
+        )
+        print(f"✅ Updated {updated} existing records")
         print("✅ Migration completed successfully!")
 
     except Exception as e:
@@ -75,7 +71,13 @@ def add_updated_at_column():
         if 'cur' in locals():
             cur.close()
         if 'conn' in locals():
-            conn.close()
+            release_connection(conn)
 
 if __name__ == "__main__":
-    add_updated_at_column() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Add updated_at to customer_support and backfill it")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows updated per committed batch")
+    parser.add_argument("--max-replication-lag", type=float, default=10.0, help="Pause while replicas lag by more than this many seconds")
+    parser.add_argument("--dry-run", action="store_true", help="Run in a rolled-back transaction and report locks, timings and rewrite risk")
+    args = parser.parse_args()
+
+    add_updated_at_column(args.batch_size, args.max_replication_lag, args.dry_run) 
\ No newline at end of file
@@ -0,0 +1,259 @@
+import os
+import time
+import argparse
+import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # required for archiving and reading the archive
+    np = None
+    pa = None
+    pq = None
+
+from db_pool import get_connection, release_connection
+from reconcile import CREDIT_TYPES, DEBIT_TYPES
+
+# Rows older than the retention window are moved out of Postgres into zstd Parquet
+# files laid out as {archive_dir}/{table}/year=YYYY/month=MM/part-{first_id}-{last_id}.parquet.
+# Each batch is written (under a .part name, renamed once complete) before any of
+# its rows are deleted, and the delete runs in small committed chunks so it never
+# holds many row locks or builds up a large transaction. If a run dies between
+# writing a file and finishing its delete, the next run archives the leftover rows
+# again; ArchiveReader drops the duplicate ids.
+# Transactions that still have fraud alerts stay in the database. Each transaction
+# delete also adds what the deleted rows contributed to archived_transaction_totals,
+# in the same statement, so balance reconciliation and fraud scoring averages don't
+# change when history leaves the database.
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+
+def archive_schemas() -> Dict[str, Any]:
+    return {
+        "transactions": pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("recipient_id", pa.int64()),
+            ("type", pa.string()),
+            ("amount", pa.decimal128(15, 2)),
+            ("description", pa.string()),
+            ("reference", pa.string()),
+            ("status", pa.string()),
+            ("reported", pa.bool_()),
+            ("risk_score", pa.int32()),
+            ("location", pa.string()),
+            ("ip_address", pa.string()),
+            ("device_info", pa.string()),
+            ("created_at", pa.timestamp("us")),
+        ]),
+        "audit_logs": pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("action", pa.string()),
+            ("entity_type", pa.string()),
+            ("entity_id", pa.int64()),
+            ("details", pa.string()),
+            ("ip_address", pa.string()),
+            ("created_at", pa.timestamp("us")),
+        ]),
+        "notifications": pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("title", pa.string()),
+            ("message", pa.string()),
+            ("type", pa.string()),
+            ("is_read", pa.bool_()),
+            ("created_at", pa.timestamp("us")),
+        ]),
+    }
+
+ARCHIVE_TABLES = ["transactions", "audit_logs", "notifications"]
+
+# Extra conditions keeping rows that other tables still point at
+KEEP_CONDITIONS = {
+    "transactions": "NOT EXISTS (SELECT 1 FROM fraud_alerts f WHERE f.transaction_id = t.id)",
+}
+
+# Deletes one chunk of transactions and folds them into archived_transaction_totals
+ARCHIVE_TRANSACTIONS_SQL = """
+    WITH archived AS (
+        DELETE FROM transactions
+        WHERE id = ANY(%(ids)s) AND created_at < %(before)s
+        RETURNING user_id, recipient_id, type, amount, status, created_at
+    ), movements AS (
+        SELECT user_id AS account_id,
+            CASE WHEN status = 'completed' AND type = ANY(%(credits)s) THEN amount
+                WHEN status = 'completed' AND type = ANY(%(debits)s) THEN -amount
+                ELSE 0 END AS delta,
+            1 AS sent_count, amount AS sent_amount, created_at
+        FROM archived
+        WHERE user_id IS NOT NULL
+        UNION ALL
+        SELECT recipient_id, CASE WHEN status = 'completed' AND type = 'transfer' THEN amount ELSE 0 END, 0, 0, created_at
+        FROM archived
+        WHERE recipient_id IS NOT NULL
+    )
+    INSERT INTO archived_transaction_totals AS a
+        (user_id, net_movement, transaction_count, total_amount, archived_through, updated_at)
+    SELECT account_id, SUM(delta), SUM(sent_count), SUM(sent_amount), MAX(created_at), CURRENT_TIMESTAMP
+    FROM movements
+    GROUP BY account_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        net_movement = a.net_movement + EXCLUDED.net_movement,
+        transaction_count = a.transaction_count + EXCLUDED.transaction_count,
+        total_amount = a.total_amount + EXCLUDED.total_amount,
+        archived_through = GREATEST(a.archived_through, EXCLUDED.archived_through),
+        updated_at = EXCLUDED.updated_at
+"""
+
+def require_pyarrow():
+    if pq is None:
+        raise RuntimeError("Archiving requires pyarrow (pip install pyarrow)")
+
+def month_directory(archive_dir: str, table: str, year: int, month: int) -> str:
+    return os.path.join(archive_dir, table, f"year={year}", f"month={month:02d}")
+
+def write_parquet(table: "pa.Table", path: str, row_group_size: int) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Hidden while incomplete, so dataset discovery in ArchiveReader never picks it up
+    partial = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.part")
+    pq.write_table(table, partial, compression="zstd", row_group_size=row_group_size)
+    with open(partial, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+def write_batch(rows: List[tuple], schema: "pa.Schema", archive_dir: str, table: str, row_group_size: int) -> List[str]:
+    # One file per month in the batch, sorted by user so row-group statistics let
+    # readers skip most of a file when looking up one user
+    batch = pa.Table.from_arrays([pa.array(column, type=field.type) for column, field in zip(zip(*rows), schema)], schema=schema)
+    created_at = batch["created_at"].to_numpy()
+    months = created_at.astype("datetime64[M]")
+    paths = []
+    for month in np.unique(months):
+        part = batch.filter(pa.array(months == month))
+        part = part.sort_by([("user_id", "ascending"), ("created_at", "ascending")])
+        ids = part["id"].to_numpy()
+        year, month_number = int(str(month)[:4]), int(str(month)[5:7])
+        path = os.path.join(month_directory(archive_dir, table, year, month_number), f"part-{ids.min()}-{ids.max()}.parquet")
+        write_parquet(part, path, row_group_size)
+        paths.append(path)
+    return paths
+
+def archive_table(conn, table: str, before: datetime.datetime, archive_dir: str = DEFAULT_ARCHIVE_DIR,
+                  batch_size: int = 50000, delete_chunk: int = 5000, row_group_size: int = 65536) -> int:
+    require_pyarrow()
+    schema = archive_schemas()[table]
+    columns = ", ".join(f"t.{name}" for name in schema.names)
+    conditions = " AND ".join(filter(None, ["t.created_at < %s", "t.id > %s", KEEP_CONDITIONS.get(table)]))
+    select_sql = f"SELECT {columns} FROM {table} t WHERE {conditions} ORDER BY t.id LIMIT %s"
+
+    archived = 0
+    last_id = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute(select_sql, (before, last_id, batch_size))
+            rows = cur.fetchall()
+            conn.commit()
+            if not rows:
+                break
+
+            paths = write_batch(rows, schema, archive_dir, table, row_group_size)
+
+            ids = [row[0] for row in rows]
+            for start in range(0, len(ids), delete_chunk):
+                # created_at is repeated so partitioned tables only touch old partitions
+                chunk = ids[start:start + delete_chunk]
+                if table == "transactions":
+                    cur.execute(ARCHIVE_TRANSACTIONS_SQL, {"ids": chunk, "before": before, "credits": CREDIT_TYPES, "debits": DEBIT_TYPES})
+                else:
+                    cur.execute(f"DELETE FROM {table} WHERE id = ANY(%s) AND created_at < %s", (chunk, before))
+                conn.commit()
+
+            archived += len(rows)
+            last_id = ids[-1]
+            print(f"  {table}: {archived} rows archived ({len(paths)} files, through id {last_id})")
+    return archived
+
+def archive_old_rows(retention_days: int = 365, archive_dir: str = DEFAULT_ARCHIVE_DIR, tables: Optional[List[str]] = None,
+                     batch_size: int = 50000, delete_chunk: int = 5000):
+    try:
+        before = datetime.datetime.combine(datetime.date.today() - datetime.timedelta(days=retention_days), datetime.time())
+        print(f"🔄 Archiving rows older than {before:%Y-%m-%d} to {archive_dir}...")
+        start = time.perf_counter()
+        conn = get_connection()
+
+        for table in tables or ARCHIVE_TABLES:
+            archived = archive_table(conn, table, before, archive_dir, batch_size, delete_chunk)
+            print(f"✅ Archived {archived} {table} rows")
+
+        print(f"Archiving finished in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"🔥 Error archiving rows: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+    finally:
+        if 'conn' in locals():
+            release_connection(conn)
+
+class ArchiveReader:
+    # Queries archived rows by user and date range. Files are memory-mapped, year
+    # directories outside the range are skipped and Parquet statistics prune row groups.
+    def __init__(self, archive_dir: str = DEFAULT_ARCHIVE_DIR):
+        require_pyarrow()
+        self.archive_dir = archive_dir
+
+    def query(self, table: str, user_id: Optional[int] = None, start: Optional[datetime.datetime] = None,
+              end: Optional[datetime.datetime] = None, columns: Optional[List[str]] = None) -> "pa.Table":
+        schema = archive_schemas()[table]
+        root = os.path.join(self.archive_dir, table)
+        if not os.path.isdir(root):
+            return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+
+        filters = []
+        if user_id is not None:
+            filters.append(("user_id", "=", user_id))
+        if start is not None:
+            filters += [("year", ">=", start.year), ("created_at", ">=", start)]
+        if end is not None:
+            filters += [("year", "<=", end.year), ("created_at", "<", end)]
+
+        wanted = None if columns is None else list(dict.fromkeys(["id", "created_at", *columns]))
+        result = pq.read_table(root, columns=wanted, filters=filters or None, memory_map=True, partitioning="hive")
+
+        # Rows archived twice after an interrupted run share an id
+        _, first = np.unique(result["id"].to_numpy(), return_index=True)
+        if len(first) != result.num_rows:
+            result = result.take(pa.array(first))
+        result = result.sort_by([("created_at", "ascending"), ("id", "ascending")])
+        return result.select(columns or schema.names)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old rows to zstd Parquet files and query the archive")
+    parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR, help="Root directory of the Parquet archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Archive and delete rows older than the retention window")
+    archive_parser.add_argument("--retention-days", type=int, default=365, help="Keep this many days in the database")
+    archive_parser.add_argument("--tables", nargs="+", choices=ARCHIVE_TABLES, default=None, help="Tables to archive (default all)")
+    archive_parser.add_argument("--batch-size", type=int, default=50000, help="Rows written per batch of files")
+    archive_parser.add_argument("--delete-chunk", type=int, default=5000, help="Rows deleted per committed DELETE")
+
+    query_parser = subparsers.add_parser("query", help="Print archived rows for a user")
+    query_parser.add_argument("table", choices=ARCHIVE_TABLES)
+    query_parser.add_argument("--user-id", type=int, default=None)
+    query_parser.add_argument("--start", type=datetime.datetime.fromisoformat, default=None, help="From (YYYY-MM-DD)")
+    query_parser.add_argument("--end", type=datetime.datetime.fromisoformat, default=None, help="Until, exclusive (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        archive_old_rows(args.retention_days, args.archive_dir, args.tables, args.batch_size, args.delete_chunk)
+    else:
+        try:
+            rows = ArchiveReader(args.archive_dir).query(args.table, args.user_id, args.start, args.end)
+            print(f"✅ {rows.num_rows} archived {args.table} rows")
+            for row in rows.slice(0, 50).to_pylist():
+                print(f"  {row}")
+        except Exception as e:
+            print(f"🔥 Error reading archive: {e}")
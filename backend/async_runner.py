@@ -0,0 +1,284 @@
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import asyncpg
+except ImportError:  # only needed for --async
+    asyncpg = None
+
+from db_pool import require_settings, DB_DIRECT_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_SSLMODE, DB_CONNECT_TIMEOUT
+from create_tables import (
+    TABLES, index_statements, TABLE_HAS_ROWS_SQL, INDEX_STATE_SQL, UNINDEXED_PARTITIONS_SQL,
+    PARTITION_MONTHS_AHEAD, PARTITION_MONTHS_BACK
+)
+from run_migration import (
+    MIGRATIONS_DIR, MIGRATION_LOCK_ID, CREATE_MIGRATIONS_TABLE_SQL, MigrationError,
+    load_migration_files, pending_migrations, split_statements
+)
+from partitions import PARTITIONED_TABLES, IS_PARTITIONED_SQL, LIST_PARTITIONS_SQL, parse_partitions, missing_partition_statements
+from seed_db import (
+    USER_COLUMNS, TRANSACTION_COLUMNS, FRAUD_ALERT_COLUMNS, NOTIFICATION_COLUMNS, AUDIT_LOG_COLUMNS,
+    build_synthetic_user, build_fraud_alert, build_notifications, build_audit_log,
+    generate_transactions, record_load
+)
+
+# Async execution path: the same work as the sync scripts, spread over several
+# asyncpg connections so network round trips overlap instead of queueing
+
+def run_async_or_fallback(coro_factory: Callable[[], Awaitable[Any]], sync_fallback: Callable[[], Any]):
+    if asyncpg is None:
+        print("⚠️ asyncpg is not installed (pip install asyncpg), falling back to the sync path")
+        return sync_fallback()
+    return asyncio.run(coro_factory())
+
+async def create_pool(concurrency: int):
+    require_settings()
+    return await asyncpg.create_pool(
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=int(DB_PORT),
+        ssl=DB_SSLMODE,
+        timeout=DB_CONNECT_TIMEOUT,
+        min_size=1,
+        max_size=max(concurrency, 1)
+    )
+
+# Table creation
+def dependency_levels(tables: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    # Group tables so every table's dependencies are created in an earlier level
+    created = set()
+    pending = list(tables)
+    levels = []
+    while pending:
+        level = [t for t in pending if all(d in created for d in t["depends_on"])]
+        if not level:
+            raise ValueError(f"Circular table dependencies: {[t['name'] for t in pending]}")
+        levels.append(level)
+        created.update(t["name"] for t in level)
+        pending = [t for t in pending if t["name"] not in created]
+    return levels
+
+async def create_table_async(pool, table: Dict[str, Any]):
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            for statement in table["statements"]:
+                await conn.execute(statement)
+    print(f"✅ Created {table['name']} table")
+
+def numbered(sql: str) -> str:
+    # psycopg2 placeholders to asyncpg's $1, $2, ...
+    parts = sql.split("%s")
+    return "".join(part + (f"${n}" if n < len(parts) else "") for n, part in enumerate(parts, 1))
+
+async def create_partitions_async(pool, table: str) -> bool:
+    async with pool.acquire() as conn:
+        if not await conn.fetchval(numbered(IS_PARTITIONED_SQL), table):
+            print(f"⚠️ {table} already exists as a plain table, run partitions.py convert to partition it")
+            return False
+        existing = parse_partitions(await conn.fetch(numbered(LIST_PARTITIONS_SQL), table))
+        statements = missing_partition_statements(table, existing, PARTITION_MONTHS_AHEAD, PARTITION_MONTHS_BACK)
+        async with conn.transaction():
+            for _, statement in statements:
+                await conn.execute(statement)
+    print(f"✅ Created {len(statements)} {table} partitions")
+    return True
+
+async def create_indexes_async(pool, table: Dict[str, Any]):
+    # Runs outside a transaction so CONCURRENTLY is allowed; each table's
+    # indexes are built in turn while other tables build theirs
+    async with pool.acquire() as conn:
+        concurrently = await conn.fetchval(TABLE_HAS_ROWS_SQL.format(table=table["name"]))
+        partitioned = await conn.fetchval(numbered(IS_PARTITIONED_SQL), table["name"])
+        for index in table["indexes"]:
+            state = await conn.fetchrow(numbered(INDEX_STATE_SQL), index["name"])
+            partitions = None
+            if partitioned:
+                rows = await conn.fetch(numbered(UNINDEXED_PARTITIONS_SQL), table["name"], index["name"])
+                partitions = [row[0] for row in rows]
+            elif state and not state[0]:
+                print(f"Rebuilding invalid index {index['name']}")
+
+            try:
+                for statement in index_statements(table["name"], index, concurrently, state, partitions):
+                    await conn.execute(statement)
+                print(f"✅ Created index {index['name']}{' (concurrently)' if concurrently else ''}")
+            except asyncpg.PostgresError as e:
+                print(f"⚠️ Skipping index {index['name']}: {e}")
+
+async def create_tables_async(tables: List[Dict[str, Any]], concurrency: int = 4, partitioned: bool = False):
+    print("🔄 Creating missing tables...")
+    pool = await create_pool(concurrency)
+    try:
+        for level in dependency_levels(tables):
+            await asyncio.gather(*(create_table_async(pool, table) for table in level))
+        if partitioned:
+            results = await asyncio.gather(*(create_partitions_async(pool, table) for table in PARTITIONED_TABLES))
+            # Tables that are still plain keep their plain index set
+            plain = {table for table, ok in zip(PARTITIONED_TABLES, results) if not ok}
+            tables = [TABLES[i] if t["name"] in plain else t for i, t in enumerate(tables)]
+        print("✅ All tables created successfully!")
+
+        print("🔄 Creating indexes...")
+        await asyncio.gather(*(create_indexes_async(pool, table) for table in tables if table.get("indexes")))
+        print("✅ All indexes created successfully!")
+    except Exception as e:
+        print(f"🔥 Error creating tables: {e}")
+    finally:
+        await pool.close()
+
+# Seeding
+async def reserve_ids(conn, table: str, count: int) -> List[int]:
+    if count <= 0:
+        return []
+    rows = await conn.fetch(
+        "SELECT nextval(pg_get_serial_sequence($1, 'id')) FROM generate_series(1, $2)",
+        table, count
+    )
+    return [row[0] for row in rows]
+
+async def copy_records(conn, table: str, columns: List[str], rows: List[Dict[str, Any]], load_stats: Dict[str, List[float]]) -> int:
+    if not rows:
+        return 0
+    start = time.perf_counter()
+    await conn.copy_records_to_table(
+        table,
+        records=[tuple(row[column] for column in columns) for row in rows],
+        columns=columns
+    )
+    record_load(load_stats, table, len(rows), time.perf_counter() - start)
+    return len(rows)
+
+async def load_synthetic_users(conn, indexes: range, load_stats: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+    # bcrypt releases the GIL, so hashing in a thread keeps the other chunks' I/O moving
+    users = await asyncio.to_thread(lambda: [build_synthetic_user(index) for index in indexes])
+
+    rows = await conn.fetch("SELECT id, email FROM users WHERE email = ANY($1::text[])", [u["email"] for u in users])
+    existing = {row["email"]: row["id"] for row in rows}
+    new_users = []
+    for user in users:
+        if user["email"] in existing:
+            user["id"] = existing[user["email"]]
+        else:
+            new_users.append(user)
+
+    for user, user_id in zip(new_users, await reserve_ids(conn, "users", len(new_users))):
+        user["id"] = user_id
+    await copy_records(conn, "users", USER_COLUMNS, new_users, load_stats)
+    return users
+
+async def seed_chunk_async(pool, semaphore: asyncio.Semaphore, users: Optional[List[Dict[str, Any]]], indexes: Optional[range],
+                           transactions_per_user: int, days: int, load_stats: Dict[str, List[float]]) -> Tuple[int, int]:
+    # One chunk of users and their activity, committed in its own transaction.
+    # Transfers stay within the chunk so chunks never wait on each other's rows.
+    async with semaphore:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if users is None:
+                    users = await load_synthetic_users(conn, indexes, load_stats)
+
+                transactions = list(generate_transactions(users, transactions_per_user, days))
+                for transaction, transaction_id in zip(transactions, await reserve_ids(conn, "transactions", len(transactions))):
+                    transaction["id"] = transaction_id
+                await copy_records(conn, "transactions", TRANSACTION_COLUMNS, transactions, load_stats)
+
+                fraud_alerts = [alert for alert in map(build_fraud_alert, transactions) if alert]
+                for alert, alert_id in zip(fraud_alerts, await reserve_ids(conn, "fraud_alerts", len(fraud_alerts))):
+                    alert["id"] = alert_id
+                await copy_records(conn, "fraud_alerts", FRAUD_ALERT_COLUMNS, fraud_alerts, load_stats)
+
+                notifications = [notification for user in users for notification in build_notifications(user)]
+                await copy_records(conn, "notifications", NOTIFICATION_COLUMNS, notifications, load_stats)
+
+                transaction_ids = [t["id"] for t in transactions]
+                fraud_alert_ids = [a["id"] for a in fraud_alerts]
+                audit_logs = [build_audit_log(random.choice(users), transaction_ids, fraud_alert_ids) for _ in range(len(transactions) // 2)]
+                await copy_records(conn, "audit_logs", AUDIT_LOG_COLUMNS, audit_logs, load_stats)
+    return len(users), len(transactions)
+
+async def seed_activity_async(base_users: List[Dict[str, Any]], user_count: int, transactions_per_user: int, days: int,
+                              chunk_size: int, concurrency: int, load_stats: Dict[str, List[float]]):
+    pool = await create_pool(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        chunks = [seed_chunk_async(pool, semaphore, base_users, None, transactions_per_user, days, load_stats)]
+        for start in range(len(base_users), user_count, chunk_size):
+            indexes = range(start, min(start + chunk_size, user_count))
+            chunks.append(seed_chunk_async(pool, semaphore, None, indexes, transactions_per_user, days, load_stats))
+
+        user_total = 0
+        transaction_total = 0
+        for chunk in asyncio.as_completed(chunks):
+            users, transactions = await chunk
+            user_total += users
+            transaction_total += transactions
+            print(f"Seeded {user_total}/{max(user_count, len(base_users))} users, {transaction_total} transactions")
+    finally:
+        await pool.close()
+
+# Migrations
+async def run_migrations_async(migrations_dir: str = MIGRATIONS_DIR) -> bool:
+    # Migration files depend on each other's schema changes, so they still run one
+    # at a time in name order, under the same advisory lock and checksums as run_migration
+    # (on a direct connection, like run_migration). Returns False when one fails, after
+    # its transaction has rolled back.
+    print("🔄 Running migrations...")
+    require_settings()
+    conn = await asyncpg.connect(
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_DIRECT_HOST,
+        port=int(DB_PORT),
+        ssl=DB_SSLMODE,
+        timeout=DB_CONNECT_TIMEOUT
+    )
+    try:
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        for statement in CREATE_MIGRATIONS_TABLE_SQL:
+            await conn.execute(statement)
+
+        migrations = load_migration_files(migrations_dir)
+        applied = {row["name"]: row["checksum"] for row in await conn.fetch("SELECT name, checksum FROM migrations")}
+        for migration in migrations:
+            if migration["name"] in applied and applied[migration["name"]] is None:
+                await conn.execute("UPDATE migrations SET checksum = $1 WHERE name = $2", migration["checksum"], migration["name"])
+                applied[migration["name"]] = migration["checksum"]
+
+        pending = pending_migrations(migrations, applied)
+        print(f"{len(applied)} migrations already applied, {len(pending)} pending")
+
+        for migration in pending:
+            print(f"Running migration: {migration['name']}{' (concurrent)' if migration['concurrent'] else ''}")
+            try:
+                if migration["concurrent"]:
+                    for statement in split_statements(migration["sql"]):
+                        await conn.execute(statement)
+                    await conn.execute("INSERT INTO migrations (name, checksum) VALUES ($1, $2)", migration["name"], migration["checksum"])
+                else:
+                    async with conn.transaction():
+                        await conn.execute(migration["sql"])
+                        await conn.execute("INSERT INTO migrations (name, checksum) VALUES ($1, $2)", migration["name"], migration["checksum"])
+            except asyncpg.PostgresError as e:
+                raise MigrationError(f"Error executing migration {migration['name']}: {e}")
+            print(f"Successfully executed {migration['name']}")
+
+        # Keep the upcoming monthly partitions in place on every deploy
+        for table in PARTITIONED_TABLES:
+            if await conn.fetchval(numbered(IS_PARTITIONED_SQL), table):
+                existing = parse_partitions(await conn.fetch(numbered(LIST_PARTITIONS_SQL), table))
+                for name, statement in missing_partition_statements(table, existing):
+                    await conn.execute(statement)
+                    print(f"Created partition {name}")
+
+        print("All migrations completed successfully")
+        return True
+    except Exception as e:
+        print(f"🔥 Error running migrations: {e}")
+        return False
+    finally:
+        # Closing the session releases the advisory lock
+        await conn.close()
@@ -0,0 +1,201 @@
+import time
+import queue
+import atexit
+import argparse
+import datetime
+import threading
+from typing import Any, List, Optional
+
+import psycopg2
+from psycopg2.pool import PoolError
+
+from db_pool import get_connection, release_connection
+from copy_util import copy_rows
+
+# Audit events are queued in memory and written by a background thread with COPY,
+# one batch per batch_size events or flush_interval seconds, whichever comes first.
+# The queue is bounded: when the database falls behind, log() blocks the caller
+# (back-pressure) instead of growing memory or dropping events. A batch that fails
+# on the connection is kept and retried. One the database rejects (a value too long,
+# a broken reference) is split in halves until the offending events are isolated;
+# those are logged and dropped so they can't stall the writer. close() - registered
+# with atexit - drains the queue.
+
+AUDIT_COLUMNS = ["user_id", "action", "entity_type", "entity_id", "details", "ip_address", "created_at"]
+
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+# Worth retrying the same batch; any other psycopg2.Error is about the data
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError, OSError)
+
+class AuditWriter:
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0, max_queue: int = 10000,
+                 put_timeout: Optional[float] = None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # None blocks log() until there is room; otherwise queue.Full is raised after this many seconds
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def start(self) -> "AuditWriter":
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        return self
+
+    def log(self, user_id: Optional[int], action: str, entity_type: Optional[str] = None,
+            entity_id: Optional[int] = None, details: Optional[str] = None, ip_address: Optional[str] = None,
+            created_at: Optional[datetime.datetime] = None) -> None:
+        if self._thread is None:
+            self.start()
+        # The event time is taken now, not when the batch reaches the database
+        row = (user_id, action, entity_type, entity_id, details, ip_address, created_at or datetime.datetime.now())
+        self._queue.put(row, timeout=self.put_timeout)
+
+    def flush(self) -> None:
+        # Blocks until every event logged so far has been written
+        self._queue.join()
+
+    def close(self, timeout: float = 30.0) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️ Audit writer stopped with {self._queue.qsize()} events not yet written")
+        self._thread = None
+
+    def _next_batch(self) -> List[tuple]:
+        batch: List[tuple] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stopping.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _write(self, batch: List[tuple]) -> None:
+        conn = get_connection()
+        try:
+            with conn.cursor() as cur:
+                copy_rows(cur, "audit_logs", AUDIT_COLUMNS, batch)
+            conn.commit()
+        finally:
+            release_connection(conn)
+
+    def _done(self, batch: List[tuple]) -> None:
+        for _ in batch:
+            self._queue.task_done()
+
+    def _drop(self, chunks: List[List[tuple]]) -> None:
+        for chunk in chunks:
+            self._done(chunk)
+
+    def _run(self) -> None:
+        # The batch being written, as a stack of parts; a rejected part is replaced by its halves
+        chunks: List[List[tuple]] = []
+        delay = RETRY_DELAY
+        while True:
+            try:
+                if not chunks:
+                    if self._stopping.is_set() and self._queue.empty():
+                        return
+                    batch = self._next_batch()
+                    if batch:
+                        chunks = [batch]
+                    continue
+                chunk = chunks[-1]
+                try:
+                    self._write(chunk)
+                except TRANSIENT_ERRORS as e:
+                    self.failures += 1
+                    queued = sum(map(len, chunks))
+                    if self._stopping.is_set():
+                        print(f"🔥 Error writing {queued} audit events during shutdown, dropping them: {e}")
+                        self._drop(chunks)
+                        chunks = []
+                        continue
+                    # Keep the batch; while it is retried the queue fills and callers slow down
+                    print(f"🔥 Error writing {queued} audit events, retrying in {delay:.0f}s: {e}")
+                    self._stopping.wait(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY)
+                    continue
+                except psycopg2.Error as e:
+                    self.failures += 1
+                    chunks.pop()
+                    if len(chunk) > 1:
+                        middle = len(chunk) // 2
+                        chunks += [chunk[middle:], chunk[:middle]]
+                    else:
+                        self.rejected += 1
+                        print(f"🔥 Dropping audit event rejected by the database: {chunk[0]!r}: {e}")
+                        self._done(chunk)
+                    continue
+                chunks.pop()
+                self.written += len(chunk)
+                self.batches += 1
+                self._done(chunk)
+                delay = RETRY_DELAY
+            except Exception as e:
+                # Anything else would kill the thread and leave log() and flush() blocked forever
+                self.failures += 1
+                print(f"🔥 Unexpected error in audit writer, dropping {sum(map(len, chunks))} events: {e}")
+                self._drop(chunks)
+                chunks = []
+                self._stopping.wait(RETRY_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+def get_audit_writer() -> AuditWriter:
+    # Process-wide writer, started on first use
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter().start()
+        return _writer
+
+def log_audit_event(user_id: Optional[int], action: str, **kwargs: Any) -> None:
+    get_audit_writer().log(user_id, action, **kwargs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure audit writer throughput with synthetic events")
+    parser.add_argument("--events", type=int, default=100000, help="Number of events to log")
+    parser.add_argument("--batch-size", type=int, default=500, help="Events per COPY batch")
+    parser.add_argument("--max-queue", type=int, default=10000, help="Queued events before log() blocks")
+    args = parser.parse_args()
+
+    writer = AuditWriter(args.batch_size, max_queue=args.max_queue).start()
+    start = time.perf_counter()
+    for i in range(args.events):
+        writer.log(None, "benchmark", "audit_writer", i, "Synthetic audit event")
+    logged = time.perf_counter() - start
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    print(f"✅ Logged {args.events} events in {logged:.2f}s, all written after {elapsed:.2f}s "
+          f"({args.events / elapsed if elapsed > 0 else 0:,.0f} events/sec): {writer.stats()}")
+    writer.close()
@@ -0,0 +1,95 @@
+import time
+from typing import Optional
+
+# Data backfills walk a table in primary-key ranges and commit each batch together
+# with a checkpoint, so no transaction holds more than batch_size row locks and an
+# interrupted run picks up where it stopped
+
+CREATE_CHECKPOINTS_SQL = """
+    CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+        name VARCHAR(255) PRIMARY KEY,
+        table_name VARCHAR(255) NOT NULL,
+        last_id BIGINT NOT NULL,
+        max_id BIGINT NOT NULL,
+        rows_updated BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP
+    )
+"""
+
+# Worst replay lag across streaming replicas; 0 without replicas (or without
+# pg_read_all_stats, which hides the lag columns)
+REPLICATION_LAG_SQL = """
+    SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication
+"""
+
+def wait_for_replicas(cur, max_lag: float, poll_interval: float = 1.0):
+    while True:
+        cur.execute(REPLICATION_LAG_SQL)
+        lag = float(cur.fetchone()[0])
+        if lag <= max_lag:
+            return
+        print(f"  replication lag {lag:.1f}s above {max_lag:.1f}s, waiting...")
+        time.sleep(poll_interval)
+
+def reset_checkpoint(conn, name: str):
+    with conn.cursor() as cur:
+        cur.execute(CREATE_CHECKPOINTS_SQL)
+        cur.execute("DELETE FROM backfill_checkpoints WHERE name = %s", (name,))
+    conn.commit()
+
+def backfill(conn, name: str, table: str, set_sql: str, where_sql: Optional[str] = None,
+             batch_size: int = 10000, max_replication_lag: float = 10.0, pause: float = 0.0) -> int:
+    # Runs UPDATE {table} SET {set_sql} [WHERE {where_sql}] one id range at a time.
+    # Rows inserted after the first run started are left to the application.
+    cur = conn.cursor()
+    try:
+        cur.execute(CREATE_CHECKPOINTS_SQL)
+        cur.execute("SELECT last_id, max_id, rows_updated, completed_at FROM backfill_checkpoints WHERE name = %s", (name,))
+        checkpoint = cur.fetchone()
+
+        if checkpoint is None:
+            cur.execute(f"SELECT COALESCE(MIN(id), 1) - 1, COALESCE(MAX(id), 0) FROM {table}")
+            last_id, max_id = cur.fetchone()
+            rows_updated = 0
+            cur.execute(
+                "INSERT INTO backfill_checkpoints (name, table_name, last_id, max_id) VALUES (%s, %s, %s, %s)",
+                (name, table, last_id, max_id)
+            )
+            conn.commit()
+        else:
+            last_id, max_id, rows_updated, completed_at = checkpoint
+            if completed_at is not None:
+                print(f"Backfill {name} already completed ({rows_updated} rows)")
+                return 0
+            print(f"Resuming backfill {name} after id {last_id}")
+
+        condition = f" AND ({where_sql})" if where_sql else ""
+        updated = 0
+        while last_id < max_id:
+            wait_for_replicas(cur, max_replication_lag)
+
+            batch_end = min(last_id + batch_size, max_id)
+            cur.execute(f"UPDATE {table} SET {set_sql} WHERE id > %s AND id <= %s{condition}", (last_id, batch_end))
+            batch_rows = cur.rowcount
+            updated += batch_rows
+            cur.execute(
+                """
+                UPDATE backfill_checkpoints
+                SET last_id = %s, rows_updated = rows_updated + %s, updated_at = CURRENT_TIMESTAMP
+                WHERE name = %s
+                """,
+                (batch_end, batch_rows, name)
+            )
+            conn.commit()
+            last_id = batch_end
+            print(f"  {name}: {updated} rows updated (through id {last_id} of {max_id})")
+
+            if pause:
+                time.sleep(pause)
+
+        cur.execute("UPDATE backfill_checkpoints SET completed_at = CURRENT_TIMESTAMP WHERE name = %s", (name,))
+        conn.commit()
+        return updated
+    finally:
+        cur.close()
@@ -0,0 +1,33 @@
+import io
+import csv
+from typing import IO, Any, Dict, Iterable, List, Sequence
+
+# Bulk loading through COPY ... FROM STDIN in CSV format. None is written as
+# COPY_NULL so it loads as NULL while empty strings stay empty strings.
+
+COPY_NULL = "\\N"
+
+def copy_csv(cur, table: str, columns: Sequence[str], buffer: IO, null: str = COPY_NULL) -> None:
+    # CSV writers that leave NULLs as unquoted empty fields (Arrow's) pass null=""
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{null}')",
+        buffer
+    )
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    # Rows are sequences of values in column order; returns the number copied
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow([COPY_NULL if value is None else value for value in row])
+        count += 1
+
+    if count == 0:
+        return 0
+    copy_csv(cur, table, columns, buffer)
+    return count
+
+def copy_dicts(cur, table: str, columns: List[str], rows: Iterable[Dict[str, Any]]) -> int:
+    return copy_rows(cur, table, columns, ([row[column] for column in columns] for row in rows))
@@ -1,44 +1,18 @@
+import argparse
 import psycopg2
-import time
-from psycopg2 import OperationalError
-
-# Database connection parameters - Neon
-DB_NAME = "neondb"
-DB_USER = "neondb_owner"
-DB_PASSWORD = "npg_43VHrdvtDTbK"
-DB_HOST = "ep-tiny-snow-a2dpd0fn-pooler.eu-central-1.aws.neon.tech"
-DB_PORT = "5432"
-def get_connection(max_retries=3, retry_delay=5):
-    for attempt in range(max_retries):
-        try:
-            conn = psycopg2.connect(
-                dbname=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                host=DB_HOST,
-                port=DB_PORT,
-                connect_timeout=10,
-                sslmode='require'
-            )
-            return conn
-        except OperationalError as e:
-            print(f"Connection attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                raise
-
-def create_tables():
-    try:
-        print("🔄 Creating missing tables...")
-        
-        # Connect to the database with retry logic
-        conn = get_connection()
-        cur = conn.cursor()
+from db_pool import get_connection, release_connection
+from partitions import PARTITIONED_TABLES, is_partitioned, ensure_partitions
+from dry_run import dry_run_statements, print_dry_run_report
 
-        # Create users table
-        cur.execute("""
+# Table definitions in creation order. depends_on lists the tables a table
+# references, so independent tables can be created concurrently. indexes are
+# built after the tables exist, CONCURRENTLY once the table holds data.
+TABLES = [
+    {
+        "name": "users",
+        "depends_on": [],
+        "statements": [
+            """
             CREATE TABLE IF NOT EXISTS users (
                 id SERIAL PRIMARY KEY,
                 name VARCHAR(100) NOT NULL,
@@ -56,18 +30,25 @@ def create_tables():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_login TIMESTAMP
             );
-        """)
-        print("✅ Created users table")
-
-        # Ensure updated_at column exists in users table
-        cur.execute("""
+            """,
+            # Ensure updated_at column exists in users table
+            """
             ALTER TABLE users
             ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
-        """)
-        print("✅ Ensured updated_at column exists in users table")
-
-        # Create transactions table
-        cur.execute("""
+            """,
+            # Remove the former per-row pg_notify trigger for feature_cache.py, which
+            # serialized commits of batched balance updates on the notify queue
+            "DROP TRIGGER IF EXISTS users_features_changed ON users;",
+            "DROP FUNCTION IF EXISTS notify_user_features_changed();",
+        ],
+    },
+    {
+        "name": "transactions",
+        "depends_on": ["users"],
+        "statements": [
+            # Worker ids for ReferenceGenerator (10 bits), reserved by each seeding process
+            "CREATE SEQUENCE IF NOT EXISTS reference_worker_id_seq MINVALUE 0 MAXVALUE 1023 CYCLE;",
+            """
             CREATE TABLE IF NOT EXISTS transactions (
                 id SERIAL PRIMARY KEY,
                 user_id INTEGER REFERENCES users(id),
@@ -84,11 +65,22 @@ def create_tables():
                 device_info TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
-        """)
-        print("✅ Created transactions table")
-
-        # Create fraud_alerts table
-        cur.execute("""
+            """,
+        ],
+        "indexes": [
+            # 24-hour frequency and average-amount checks in fraud scoring
+            {"name": "idx_transactions_user_id_created_at", "columns": "user_id, created_at"},
+            # Reference lookups; promoted to a unique constraint once built
+            {"name": "transactions_reference_key", "columns": "reference", "unique": True, "constraint": True},
+            # Incoming transfers, for balance reconciliation
+            {"name": "idx_transactions_recipient_id", "columns": "recipient_id", "where": "recipient_id IS NOT NULL"},
+        ],
+    },
+    {
+        "name": "fraud_alerts",
+        "depends_on": ["users", "transactions"],
+        "statements": [
+            """
             CREATE TABLE IF NOT EXISTS fraud_alerts (
                 id SERIAL PRIMARY KEY,
                 user_id INTEGER REFERENCES users(id),
@@ -101,11 +93,17 @@ def create_tables():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 resolved_at TIMESTAMP
             );
-        """)
-        print("✅ Created fraud_alerts table")
-
-        # Create fraud_rules table
-        cur.execute("""
+            """,
+        ],
+        "indexes": [
+            {"name": "idx_fraud_alerts_transaction_id", "columns": "transaction_id"},
+        ],
+    },
+    {
+        "name": "fraud_rules",
+        "depends_on": ["users"],
+        "statements": [
+            """
             CREATE TABLE IF NOT EXISTS fraud_rules (
                 id SERIAL PRIMARY KEY,
                 name VARCHAR(100) NOT NULL,
@@ -117,11 +115,14 @@ def create_tables():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP
             );
-        """)
-        print("✅ Created fraud_rules table")
-
-        # Create customer_support table
-        cur.execute("""
+            """,
+        ],
+    },
+    {
+        "name": "customer_support",
+        "depends_on": ["users"],
+        "statements": [
+            """
             CREATE TABLE IF NOT EXISTS customer_support (
                 id SERIAL PRIMARY KEY,
                 user_id INTEGER REFERENCES users(id),
@@ -133,11 +134,17 @@ def create_tables():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 resolved_at TIMESTAMP
             );
-        """)
-        print("✅ Created customer_support table")
-
-        # Create notifications table
-        cur.execute("""
+            """,
+        ],
+        "indexes": [
+            {"name": "idx_customer_support_user_id", "columns": "user_id"},
+        ],
+    },
+    {
+        "name": "notifications",
+        "depends_on": ["users"],
+        "statements": [
+            """
             CREATE TABLE IF NOT EXISTS notifications (
                 id SERIAL PRIMARY KEY,
                 user_id INTEGER REFERENCES users(id),
@@ -147,11 +154,109 @@ def create_tables():
                 is_read BOOLEAN DEFAULT false,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
-        """)
-        print("✅ Created notifications table")
-
-        # Create audit_logs table
-        cur.execute("""
+            """,
+            # Per-user counters behind the unread badge, kept current by statement-level
+            # triggers that apply each statement's changes in one upsert per user
+            """
+            CREATE TABLE IF NOT EXISTS notification_counts (
+                user_id INTEGER PRIMARY KEY,
+                unread_count BIGINT NOT NULL DEFAULT 0,
+                total_count BIGINT NOT NULL DEFAULT 0
+            );
+            """,
+            """
+            CREATE OR REPLACE FUNCTION notification_counts_apply() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO notification_counts AS c (user_id, unread_count, total_count)
+                    SELECT user_id, COUNT(*) FILTER (WHERE is_read IS NOT TRUE), COUNT(*)
+                    FROM new_rows WHERE user_id IS NOT NULL
+                    GROUP BY user_id ORDER BY user_id
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        unread_count = c.unread_count + EXCLUDED.unread_count,
+                        total_count = c.total_count + EXCLUDED.total_count;
+                ELSIF TG_OP = 'DELETE' THEN
+                    -- Lock the counters in user_id order, as the upserts do, so concurrent
+                    -- statements touching the same users can't deadlock
+                    PERFORM 1 FROM notification_counts
+                    WHERE user_id IN (SELECT user_id FROM old_rows)
+                    ORDER BY user_id
+                    FOR UPDATE;
+                    UPDATE notification_counts c
+                    SET unread_count = c.unread_count - d.unread, total_count = c.total_count - d.total
+                    FROM (
+                        SELECT user_id, COUNT(*) FILTER (WHERE is_read IS NOT TRUE) AS unread, COUNT(*) AS total
+                        FROM old_rows GROUP BY user_id
+                    ) d
+                    WHERE c.user_id = d.user_id;
+                ELSIF TG_OP = 'TRUNCATE' THEN
+                    TRUNCATE notification_counts;
+                ELSE
+                    INSERT INTO notification_counts AS c (user_id, unread_count, total_count)
+                    SELECT user_id, SUM(unread), SUM(total)
+                    FROM (
+                        SELECT user_id, CASE WHEN is_read IS NOT TRUE THEN 1 ELSE 0 END AS unread, 1 AS total FROM new_rows
+                        UNION ALL
+                        SELECT user_id, CASE WHEN is_read IS NOT TRUE THEN -1 ELSE 0 END, -1 FROM old_rows
+                    ) d
+                    WHERE user_id IS NOT NULL
+                    GROUP BY user_id
+                    HAVING SUM(unread) <> 0 OR SUM(total) <> 0
+                    ORDER BY user_id
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        unread_count = c.unread_count + EXCLUDED.unread_count,
+                        total_count = c.total_count + EXCLUDED.total_count;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            "DROP TRIGGER IF EXISTS notifications_counts_insert ON notifications;",
+            "DROP TRIGGER IF EXISTS notifications_counts_update ON notifications;",
+            "DROP TRIGGER IF EXISTS notifications_counts_delete ON notifications;",
+            "DROP TRIGGER IF EXISTS notifications_counts_truncate ON notifications;",
+            """
+            CREATE TRIGGER notifications_counts_insert
+            AFTER INSERT ON notifications
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_apply();
+            """,
+            """
+            CREATE TRIGGER notifications_counts_update
+            AFTER UPDATE ON notifications
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_apply();
+            """,
+            """
+            CREATE TRIGGER notifications_counts_delete
+            AFTER DELETE ON notifications
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_apply();
+            """,
+            """
+            CREATE TRIGGER notifications_counts_truncate
+            AFTER TRUNCATE ON notifications
+            FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_apply();
+            """,
+            # Counters for users whose notifications predate the triggers
+            """
+            INSERT INTO notification_counts (user_id, unread_count, total_count)
+            SELECT user_id, COUNT(*) FILTER (WHERE is_read IS NOT TRUE), COUNT(*)
+            FROM notifications WHERE user_id IS NOT NULL
+            GROUP BY user_id
+            ON CONFLICT (user_id) DO NOTHING;
+            """,
+        ],
+        "indexes": [
+            # Unread badge and inbox queries
+            {"name": "idx_notifications_user_id_is_read", "columns": "user_id, is_read"},
+        ],
+    },
+    {
+        "name": "audit_logs",
+        "depends_on": ["users"],
+        "statements": [
+            """
             CREATE TABLE IF NOT EXISTS audit_logs (
                 id SERIAL PRIMARY KEY,
                 user_id INTEGER REFERENCES users(id),
@@ -162,13 +267,359 @@ def create_tables():
                 ip_address VARCHAR(45),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
-        """)
-        print("✅ Created audit_logs table")
+            """,
+        ],
+        "indexes": [
+            # Audit trail of a single transaction, alert or user
+            {"name": "idx_audit_logs_entity", "columns": "entity_type, entity_id"},
+        ],
+    },
+    # Double-entry ledger posted by ledger.py. Every transfer is a pair of entries
+    # summing to zero; account 0 is the outside world (cash, M-Pesa)
+    {
+        "name": "ledger_entries",
+        "depends_on": [],
+        "statements": [
+            "CREATE SEQUENCE IF NOT EXISTS ledger_transfer_id_seq;",
+            """
+            CREATE TABLE IF NOT EXISTS ledger_entries (
+                id BIGSERIAL PRIMARY KEY,
+                transfer_id BIGINT NOT NULL,
+                account_id INTEGER NOT NULL,
+                amount DECIMAL(15, 2) NOT NULL,
+                reference VARCHAR(50),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            """
+            CREATE OR REPLACE FUNCTION ledger_entries_append_only() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'ledger_entries is append-only; post a reversing transfer instead';
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            "DROP TRIGGER IF EXISTS ledger_entries_append_only ON ledger_entries;",
+            """
+            CREATE TRIGGER ledger_entries_append_only
+            BEFORE UPDATE OR DELETE OR TRUNCATE ON ledger_entries
+            FOR EACH STATEMENT EXECUTE FUNCTION ledger_entries_append_only();
+            """,
+        ],
+        "indexes": [
+            # Balance delta since an account's snapshot
+            {"name": "idx_ledger_entries_account_id_id", "columns": "account_id, id"},
+        ],
+    },
+    {
+        "name": "balance_snapshots",
+        "depends_on": [],
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS balance_snapshots (
+                account_id INTEGER PRIMARY KEY,
+                last_entry_id BIGINT NOT NULL,
+                balance DECIMAL(15, 2) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+        ],
+    },
+    # What transactions moved to the Parquet archive by archive.py still contribute:
+    # net_movement to the balance (as reconcile.py counts it), transaction_count and
+    # total_amount to the averages in fraud scoring
+    {
+        "name": "archived_transaction_totals",
+        "depends_on": [],
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS archived_transaction_totals (
+                user_id INTEGER PRIMARY KEY,
+                net_movement DECIMAL(15, 2) NOT NULL DEFAULT 0,
+                transaction_count BIGINT NOT NULL DEFAULT 0,
+                total_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                archived_through TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+        ],
+    },
+    # Dashboard summaries maintained by summaries.py
+    {
+        "name": "summary_watermarks",
+        "depends_on": [],
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS summary_watermarks (
+                name VARCHAR(100) PRIMARY KEY,
+                last_id BIGINT NOT NULL DEFAULT 0,
+                last_timestamp TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            # Id checkpoint waiting for in-flight transactions (see summaries.py);
+            # pending_at is compared with pg_stat_activity.xact_start, hence timestamptz
+            """
+            ALTER TABLE summary_watermarks
+            ADD COLUMN IF NOT EXISTS pending_id BIGINT,
+            ADD COLUMN IF NOT EXISTS pending_snapshot TEXT,
+            ADD COLUMN IF NOT EXISTS pending_at TIMESTAMPTZ;
+            """,
+        ],
+    },
+    {
+        "name": "daily_transaction_totals",
+        "depends_on": [],
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS daily_transaction_totals (
+                day DATE NOT NULL,
+                type VARCHAR(20) NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                transaction_count BIGINT NOT NULL DEFAULT 0,
+                total_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                flagged_count BIGINT NOT NULL DEFAULT 0,
+                flagged_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, type, status)
+            );
+            """,
+        ],
+    },
+    {
+        "name": "daily_user_totals",
+        "depends_on": [],
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS daily_user_totals (
+                day DATE NOT NULL,
+                user_id INTEGER NOT NULL,
+                transaction_count BIGINT NOT NULL DEFAULT 0,
+                total_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                flagged_count BIGINT NOT NULL DEFAULT 0,
+                flagged_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, user_id)
+            );
+            """,
+        ],
+        "indexes": [
+            # A user's activity over a date range
+            {"name": "idx_daily_user_totals_user_id_day", "columns": "user_id, day"},
+        ],
+    },
+    {
+        "name": "daily_fraud_alert_totals",
+        "depends_on": [],
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS daily_fraud_alert_totals (
+                day DATE PRIMARY KEY,
+                alerts_created BIGINT NOT NULL DEFAULT 0,
+                alerts_resolved BIGINT NOT NULL DEFAULT 0
+            );
+            """,
+        ],
+    },
+]
+
+# Monthly range-partitioned variants of transactions and audit_logs (see partitions.py).
+# The partition key has to be part of every unique constraint, so the primary keys
+# become (id, created_at), fraud_alerts loses its foreign key to transactions(id), and
+# references rely on the generator for uniqueness instead of a constraint.
+PARTITIONED_OVERRIDES = {
+    "transactions": {
+        "statements": [
+            # Worker ids for ReferenceGenerator (10 bits), reserved by each seeding process
+            "CREATE SEQUENCE IF NOT EXISTS reference_worker_id_seq MINVALUE 0 MAXVALUE 1023 CYCLE;",
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                id SERIAL,
+                user_id INTEGER REFERENCES users(id),
+                recipient_id INTEGER REFERENCES users(id),
+                type VARCHAR(20) NOT NULL,
+                amount DECIMAL(15, 2) NOT NULL,
+                description TEXT,
+                reference VARCHAR(50),
+                status VARCHAR(20) DEFAULT 'pending',
+                reported BOOLEAN DEFAULT false,
+                risk_score INTEGER,
+                location VARCHAR(100),
+                ip_address VARCHAR(45),
+                device_info TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+            """,
+        ],
+        "indexes": [
+            {"name": "idx_transactions_user_id_created_at", "columns": "user_id, created_at"},
+            {"name": "idx_transactions_reference", "columns": "reference"},
+            {"name": "idx_transactions_recipient_id", "columns": "recipient_id", "where": "recipient_id IS NOT NULL"},
+        ],
+    },
+    "fraud_alerts": {
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS fraud_alerts (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id),
+                transaction_id INTEGER,
+                description TEXT,
+                status VARCHAR(20) DEFAULT 'new',
+                risk_score INTEGER,
+                resolution TEXT,
+                resolved_by INTEGER REFERENCES users(id),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                resolved_at TIMESTAMP
+            );
+            """,
+        ],
+    },
+    "audit_logs": {
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                id SERIAL,
+                user_id INTEGER REFERENCES users(id),
+                action VARCHAR(100) NOT NULL,
+                entity_type VARCHAR(50),
+                entity_id INTEGER,
+                details TEXT,
+                ip_address VARCHAR(45),
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+            """,
+        ],
+    },
+}
+
+# Partitions created up front: a year back so seeded history has a home, and a few months ahead
+PARTITION_MONTHS_BACK = 12
+PARTITION_MONTHS_AHEAD = 3
+
+def table_definitions(partitioned: bool = False) -> list:
+    if not partitioned:
+        return TABLES
+    return [{**table, **PARTITIONED_OVERRIDES.get(table["name"], {})} for table in TABLES]
+
+def index_sql(table: str, index: dict, concurrently: bool, only: bool = False) -> str:
+    return (
+        f"CREATE {'UNIQUE ' if index.get('unique') else ''}INDEX "
+        f"{'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index['name']} "
+        f"ON {'ONLY ' if only else ''}{table} ({index['columns']})"
+        f"{' WHERE ' + index['where'] if index.get('where') else ''}"
+    )
+
+def constraint_sql(table: str, index: dict) -> str:
+    return f"ALTER TABLE {table} ADD CONSTRAINT {index['name']} UNIQUE USING INDEX {index['name']}"
+
+TABLE_HAS_ROWS_SQL = "SELECT EXISTS (SELECT 1 FROM {table})"
+
+# A failed CONCURRENTLY build leaves an invalid index behind that IF NOT EXISTS would keep
+INDEX_STATE_SQL = """
+    SELECT i.indisvalid, c.conname IS NOT NULL
+    FROM pg_index i
+    LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid
+    WHERE i.indexrelid = to_regclass(%s)
+"""
+
+# Partitions of a table with no index attached to the given parent index yet
+UNINDEXED_PARTITIONS_SQL = """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(%s)
+    AND NOT EXISTS (
+        SELECT 1 FROM pg_inherits ii
+        JOIN pg_index x ON x.indexrelid = ii.inhrelid
+        WHERE ii.inhparent = to_regclass(%s) AND x.indrelid = c.oid
+    )
+    ORDER BY c.relname
+"""
+
+def index_statements(table: str, index: dict, concurrently: bool, state, partitions=None) -> list:
+    # partitions is None for a plain table, otherwise the partitions still missing this index
+    if partitions is not None:
+        # CONCURRENTLY isn't supported on a partitioned table: the parent index is created
+        # on ONLY the parent and becomes valid once every partition's index is attached
+        statements = [index_sql(table, index, False, only=True)]
+        for partition in partitions:
+            partition_index = {**index, "name": f"{partition}_{index['name']}"}
+            statements.append(index_sql(partition, partition_index, concurrently))
+            statements.append(f"ALTER INDEX {index['name']} ATTACH PARTITION {partition_index['name']}")
+        return statements
+
+    statements = []
+    if state and not state[0]:
+        statements.append(f"DROP INDEX CONCURRENTLY IF EXISTS {index['name']}")
+        state = None
+    statements.append(index_sql(table, index, concurrently))
+    if index.get("constraint") and not (state and state[1]):
+        statements.append(constraint_sql(table, index))
+    return statements
+
+def create_indexes(conn, tables: list):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for table in tables:
+                if not table.get("indexes"):
+                    continue
+                cur.execute(TABLE_HAS_ROWS_SQL.format(table=table["name"]))
+                concurrently = cur.fetchone()[0]
+                partitioned = is_partitioned(cur, table["name"])
+
+                for index in table["indexes"]:
+                    cur.execute(INDEX_STATE_SQL, (index["name"],))
+                    state = cur.fetchone()
+                    partitions = None
+                    if partitioned:
+                        cur.execute(UNINDEXED_PARTITIONS_SQL, (table["name"], index["name"]))
+                        partitions = [row[0] for row in cur.fetchall()]
+                    elif state and not state[0]:
+                        print(f"Rebuilding invalid index {index['name']}")
+
+                    try:
+                        for statement in index_statements(table["name"], index, concurrently, state, partitions):
+                            cur.execute(statement)
+                        print(f"✅ Created index {index['name']}{' (concurrently)' if concurrently else ''}")
+                    except psycopg2.Error as e:
+                        # Typically duplicate legacy values under a unique index; the rest can still be built
+                        print(f"⚠️ Skipping index {index['name']}: {e}")
+    finally:
+        conn.autocommit = False
+
+def create_tables(partitioned: bool = False):
+    try:
+        print("🔄 Creating missing tables...")
+
+        # Connect to the database with retry logic
+        conn = get_connection()
+        cur = conn.cursor()
+
+        tables = table_definitions(partitioned)
+        for table in tables:
+            for statement in table["statements"]:
+                cur.execute(statement)
+            print(f"✅ Created {table['name']} table")
+
+        if partitioned:
+            for table in PARTITIONED_TABLES:
+                if not is_partitioned(cur, table):
+                    print(f"⚠️ {table} already exists as a plain table, run partitions.py convert to partition it")
+                    tables = [plain if plain["name"] == table else t for t, plain in zip(tables, TABLES)]
+                    continue
+                created = ensure_partitions(cur, table, PARTITION_MONTHS_AHEAD, PARTITION_MONTHS_BACK)
+                print(f"✅ Created {len(created)} {table} partitions")
 
         # Commit changes
         conn.commit()
         print("✅ All tables created successfully!")
 
+        print("🔄 Creating indexes...")
+        create_indexes(conn, tables)
+        print("✅ All indexes created successfully!")
+
     except Exception as e:
         print(f"🔥 Error creating tables: {e}")
         if 'conn' in locals():
@@ -177,7 +628,31 @@ def create_tables():
         if 'cur' in locals():
             cur.close()
         if 'conn' in locals():
-            conn.close()
+            release_connection(conn)
+
+def dry_run_tables(partitioned: bool = False):
+    conn = get_connection()
+    try:
+        statements = [statement for table in table_definitions(partitioned) for statement in table["statements"]]
+        print_dry_run_report(dry_run_statements(conn, statements), "Dry run of create_tables")
+    finally:
+        release_connection(conn)
 
 if __name__ == "__main__":
-    create_tables() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create missing tables")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Create independent tables concurrently over asyncpg")
+    parser.add_argument("--concurrency", type=int, default=4, help="Connections used by --async")
+    parser.add_argument("--partitioned", action="store_true", help="Partition transactions and audit_logs by month on created_at")
+    parser.add_argument("--dry-run", action="store_true", help="Run the DDL in a rolled-back transaction and report locks, timings and rewrite risk")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        dry_run_tables(args.partitioned)
+    elif args.use_async:
+        from async_runner import run_async_or_fallback, create_tables_async
+        run_async_or_fallback(
+            lambda: create_tables_async(table_definitions(args.partitioned), args.concurrency, args.partitioned),
+            lambda: create_tables(args.partitioned)
+        )
+    else:
+        create_tables(args.partitioned)
@@ -0,0 +1,151 @@
+import os
+import time
+import atexit
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import psycopg2
+from psycopg2 import OperationalError
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Database connection parameters - set in the environment or backend/.env
+DB_NAME = os.getenv('DB_NAME')
+DB_USER = os.getenv('DB_USER')
+DB_PASSWORD = os.getenv('DB_PASSWORD')
+DB_HOST = os.getenv('DB_HOST')
+DB_PORT = os.getenv('DB_PORT', "5432")
+DB_SSLMODE = os.getenv('DB_SSLMODE', "require")
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', "10"))
+
+# Session-level state such as advisory locks does not survive a transaction-mode
+# pooler (PgBouncer, Neon's -pooler endpoints): the next transaction may run on
+# another server connection. Code holding it across transactions connects here.
+DB_DIRECT_HOST = os.getenv('DB_DIRECT_HOST') or (DB_HOST.replace("-pooler", "", 1) if DB_HOST else None)
+
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', "1"))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', "10"))
+
+# Connections idle for longer than this are pinged before being handed out
+HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', "30"))
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+_last_used: Dict[int, float] = {}
+
+REQUIRED_SETTINGS = ["DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST"]
+
+def require_settings() -> None:
+    # DB_PASSWORD may be set empty (e.g. trust or .pgpass authentication)
+    missing = [name for name in REQUIRED_SETTINGS if os.getenv(name) is None]
+    if missing:
+        raise RuntimeError(f"Missing database settings: {', '.join(missing)} (set them in the environment or backend/.env)")
+
+def _create_pool() -> ThreadedConnectionPool:
+    require_settings()
+    return ThreadedConnectionPool(
+        DB_POOL_MIN,
+        DB_POOL_MAX,
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        sslmode=DB_SSLMODE,
+        connect_timeout=DB_CONNECT_TIMEOUT
+    )
+
+def get_pool() -> ThreadedConnectionPool:
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A forked child must not reuse its parent's sockets
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = _create_pool()
+            _pool_pid = os.getpid()
+            _last_used.clear()
+        return _pool
+
+def _is_healthy(conn) -> bool:
+    if conn.closed:
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < HEALTH_CHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def get_connection(max_retries=3, retry_delay=5):
+    for attempt in range(max_retries):
+        try:
+            pool = get_pool()
+            conn = pool.getconn()
+            # Discard stale connections until a healthy one comes back; the pool
+            # opens a fresh one once its idle connections run out
+            while not _is_healthy(conn):
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            return conn
+        except (OperationalError, PoolError) as e:
+            print(f"Connection attempt {attempt + 1} failed: {e}")
+            if attempt < max_retries - 1:
+                delay = retry_delay * (2 ** attempt)
+                print(f"Retrying in {delay} seconds...")
+                time.sleep(delay)
+            else:
+                raise
+
+def release_connection(conn, close: bool = False):
+    # Hand a connection back to the pool, discarding anything left uncommitted
+    pool = get_pool()
+    if not conn.closed and not close:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            close = True
+    _last_used[id(conn)] = time.monotonic()
+    pool.putconn(conn, close=close or conn.closed)
+
+def get_direct_connection():
+    # Unpooled connection to DB_DIRECT_HOST; the caller closes it
+    require_settings()
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_DIRECT_HOST,
+        port=DB_PORT,
+        sslmode=DB_SSLMODE,
+        connect_timeout=DB_CONNECT_TIMEOUT
+    )
+
+def process_pool(processes: int):
+    # Workers are spawned rather than forked, so none of them starts out holding this
+    # process's pooled connections; each opens its own on first use
+    return multiprocessing.get_context("spawn").Pool(processes)
+
+@contextmanager
+def connection() -> Iterator:
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+@atexit.register
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
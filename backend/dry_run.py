@@ -0,0 +1,150 @@
+import re
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+
+# Dry runs execute each statement inside one transaction that is always rolled back,
+# recording what it locked, how long it took, how many rows it touched and whether
+# it rewrote a table. lock_timeout and statement_timeout keep a dry run against a
+# busy database from queueing behind, or blocking, live traffic for long.
+# Locks are held until the rollback, so each one is reported for the statement
+# that first took it; later statements on the same relation reuse it.
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+NON_TRANSACTIONAL = re.compile(r"\bCONCURRENTLY\b|^\s*(VACUUM|CREATE\s+DATABASE|ALTER\s+SYSTEM)\b", re.IGNORECASE)
+
+# Statements known to rewrite the whole table (new relfilenode, roughly 2x disk while it runs)
+REWRITE_PATTERNS = [
+    (re.compile(r"ALTER\s+COLUMN\s+\w+\s+(SET\s+DATA\s+)?TYPE\b", re.IGNORECASE), "column type change rewrites the table"),
+    (re.compile(r"ADD\s+(COLUMN\s+)?[^,;]*DEFAULT\s+[^,;]*\b(random|clock_timestamp|gen_random_uuid|uuid_generate_v4|nextval)\s*\(", re.IGNORECASE),
+     "volatile column default rewrites the table"),
+    (re.compile(r"ADD\s+(COLUMN\s+)?(IF\s+NOT\s+EXISTS\s+)?\w+\s+(BIG|SMALL)?SERIAL\b", re.IGNORECASE), "serial column fills every row"),
+    (re.compile(r"SET\s+(UN)?LOGGED\b|\bVACUUM\s+FULL\b|^\s*CLUSTER\b", re.IGNORECASE), "statement rewrites the table"),
+]
+
+# Statements that scan every row while holding a strong lock
+SCAN_PATTERNS = [
+    (re.compile(r"SET\s+NOT\s+NULL", re.IGNORECASE), "SET NOT NULL scans the table under ACCESS EXCLUSIVE"),
+    (re.compile(r"ADD\s+(CONSTRAINT\s+\w+\s+)?(CHECK|FOREIGN\s+KEY)\b(?![^;]*NOT\s+VALID)", re.IGNORECASE),
+     "constraint is validated against every row; add it NOT VALID and VALIDATE separately"),
+    (re.compile(r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?!CONCURRENTLY)", re.IGNORECASE), "index build blocks writes; use CONCURRENTLY"),
+]
+
+USER_RELATIONS = "c.relnamespace NOT IN ('pg_catalog'::regnamespace, 'information_schema'::regnamespace, 'pg_toast'::regnamespace)"
+
+# Locks this backend holds on user relations
+LOCKS_SQL = f"""
+    SELECT c.oid, c.relname, l.mode
+    FROM pg_locks l
+    JOIN pg_class c ON c.oid = l.relation
+    WHERE l.pid = pg_backend_pid() AND l.locktype = 'relation' AND {USER_RELATIONS}
+"""
+
+# Relations created by the statement itself can't block anyone, so their locks are left out
+RELATIONS_SQL = f"SELECT c.oid FROM pg_class c WHERE {USER_RELATIONS}"
+
+RELFILENODES_SQL = "SELECT relname, relfilenode FROM pg_class WHERE relkind IN ('r', 'm') AND relnamespace = 'public'::regnamespace"
+
+STRONG_LOCKS = {"AccessExclusiveLock", "ExclusiveLock", "ShareRowExclusiveLock", "ShareLock"}
+
+def estimated_rows(cur, statement: str) -> Optional[int]:
+    if not EXPLAINABLE.match(statement):
+        return None
+    cur.execute(f"EXPLAIN (FORMAT JSON) {statement}")
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    node = plan[0]["Plan"]
+    # ModifyTable reports 0 rows without RETURNING; the rows it touches come from its input
+    if node.get("Node Type") == "ModifyTable" and node.get("Plans"):
+        node = node["Plans"][0]
+    return int(node.get("Plan Rows", 0))
+
+def analyze_statement(cur, statement: str) -> Dict[str, Any]:
+    report = {
+        "statement": " ".join(statement.split()),
+        "estimated_rows": None,
+        "rows": None,
+        "elapsed": None,
+        "locks": [],
+        "rewritten": [],
+        "risks": [reason for pattern, reason in REWRITE_PATTERNS + SCAN_PATTERNS if pattern.search(statement)],
+        "error": None,
+    }
+    if NON_TRANSACTIONAL.search(statement):
+        report["error"] = "not executed: cannot run inside a transaction block"
+        return report
+
+    cur.execute("SAVEPOINT dry_run_statement")
+    try:
+        cur.execute(LOCKS_SQL)
+        locks_before = set(cur.fetchall())
+        cur.execute(RELATIONS_SQL)
+        relations = {row[0] for row in cur.fetchall()}
+        cur.execute(RELFILENODES_SQL)
+        relfilenodes = dict(cur.fetchall())
+
+        report["estimated_rows"] = estimated_rows(cur, statement)
+
+        start = time.perf_counter()
+        cur.execute(statement)
+        report["elapsed"] = time.perf_counter() - start
+        report["rows"] = cur.rowcount if cur.rowcount >= 0 else None
+
+        cur.execute(LOCKS_SQL)
+        report["locks"] = sorted(
+            (name, mode) for oid, name, mode in set(cur.fetchall()) - locks_before if oid in relations
+        )
+        cur.execute(RELFILENODES_SQL)
+        report["rewritten"] = sorted(
+            name for name, relfilenode in cur.fetchall()
+            if name in relfilenodes and relfilenodes[name] != relfilenode
+        )
+        cur.execute("RELEASE SAVEPOINT dry_run_statement")
+    except psycopg2.Error as e:
+        cur.execute("ROLLBACK TO SAVEPOINT dry_run_statement")
+        report["error"] = str(e).strip().splitlines()[0]
+    return report
+
+def risk_level(report: Dict[str, Any]) -> str:
+    strong = any(mode in STRONG_LOCKS for _, mode in report["locks"])
+    if report["rewritten"] or (strong and report["risks"]) or (strong and (report["elapsed"] or 0) > 1):
+        return "high"
+    if strong or report["risks"] or report["error"]:
+        return "medium"
+    return "low"
+
+def dry_run_statements(conn, statements: List[str], lock_timeout: str = "2s", statement_timeout: str = "60s") -> List[Dict[str, Any]]:
+    reports = []
+    with conn.cursor() as cur:
+        try:
+            cur.execute("SELECT set_config('lock_timeout', %s, true), set_config('statement_timeout', %s, true)",
+                        (lock_timeout, statement_timeout))
+            for statement in statements:
+                report = analyze_statement(cur, statement)
+                report["risk"] = risk_level(report)
+                reports.append(report)
+        finally:
+            conn.rollback()
+    return reports
+
+def print_dry_run_report(reports: List[Dict[str, Any]], title: str = "Dry run"):
+    print(f"🧪 {title} (all changes rolled back):")
+    for number, report in enumerate(reports, 1):
+        statement = report["statement"]
+        print(f"  [{number}] {statement[:100]}{'...' if len(statement) > 100 else ''}")
+        if report["error"]:
+            print(f"      ⚠️ {report['error']}")
+        else:
+            rows = "n/a" if report["rows"] is None else report["rows"]
+            estimate = "n/a" if report["estimated_rows"] is None else report["estimated_rows"]
+            print(f"      elapsed {report['elapsed'] * 1000:.1f}ms, rows {rows} (estimated {estimate})")
+        for relation, mode in report["locks"]:
+            print(f"      lock {mode} on {relation}")
+        for relation in report["rewritten"]:
+            print(f"      rewrote {relation}")
+        for reason in report["risks"]:
+            print(f"      risk: {reason}")
+        print(f"      risk level: {report['risk']}")
@@ -0,0 +1,208 @@
+import os
+import gzip
+import time
+import argparse
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for --format parquet
+    pa = None
+    pq = None
+
+from db_pool import connection, get_connection, release_connection, process_pool
+from partitions import month_start
+from reconcile import CREDIT_TYPES
+
+# Transaction exports stream from the server to disk without holding the result in
+# memory: CSV goes through COPY ... TO STDOUT straight into a gzip stream, Parquet
+# is written one row group per named-cursor batch. Files are written under a .part
+# name and renamed when complete, so a crashed export never leaves a truncated file.
+
+# A statement covers the user's own transactions and transfers they received.
+# direction is 'in' for deposits and received transfers, 'out' for everything else,
+# and signed_amount is amount with that sign applied.
+EXPORT_COLUMNS = ["id", "created_at", "type", "amount", "status", "reference", "description", "recipient_id", "location",
+                  "counterparty_id", "direction", "signed_amount"]
+
+FORMATS = {"csv": ".csv.gz", "parquet": ".parquet"}
+
+OUTGOING = "user_id = %(user_id)s AND NOT type = ANY(%(credits)s)"
+
+EXPORT_SQL = f"""
+    SELECT id, created_at, type, amount, status, reference, description, recipient_id, location,
+        CASE WHEN user_id = %(user_id)s THEN recipient_id ELSE user_id END AS counterparty_id,
+        CASE WHEN {OUTGOING} THEN 'out' ELSE 'in' END AS direction,
+        CASE WHEN {OUTGOING} THEN -amount ELSE amount END AS signed_amount
+    FROM transactions
+    WHERE (user_id = %(user_id)s OR recipient_id = %(user_id)s)
+    AND created_at >= %(start)s AND created_at < %(end)s
+    ORDER BY created_at, id
+"""
+
+STATEMENT_USERS_SQL = """
+    SELECT user_id FROM transactions
+    WHERE created_at >= %(start)s AND created_at < %(end)s AND user_id IS NOT NULL
+    UNION
+    SELECT recipient_id FROM transactions
+    WHERE created_at >= %(start)s AND created_at < %(end)s AND recipient_id IS NOT NULL
+    ORDER BY 1
+"""
+
+def parquet_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("created_at", pa.timestamp("us")),
+        ("type", pa.string()),
+        ("amount", pa.decimal128(15, 2)),
+        ("status", pa.string()),
+        ("reference", pa.string()),
+        ("description", pa.string()),
+        ("recipient_id", pa.int64()),
+        ("location", pa.string()),
+        ("counterparty_id", pa.int64()),
+        ("direction", pa.string()),
+        ("signed_amount", pa.decimal128(15, 2)),
+    ])
+
+def export_csv(conn, params: Dict[str, Any], path: str) -> None:
+    with conn.cursor() as cur, gzip.open(path, "wb") as f:
+        query = cur.mogrify(EXPORT_SQL, params).decode()
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+
+def export_parquet(conn, params: Dict[str, Any], path: str, itersize: int) -> None:
+    if pq is None:
+        raise RuntimeError("Parquet exports require pyarrow (pip install pyarrow)")
+    schema = parquet_schema()
+    with conn.cursor(name="transaction_export") as cur, pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        cur.itersize = itersize
+        cur.execute(EXPORT_SQL, params)
+        while True:
+            rows = cur.fetchmany(itersize)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+            ))
+    conn.rollback()
+
+def export_transactions(conn, user_id: int, start: datetime.datetime, end: datetime.datetime, path: str,
+                        format: str = "csv", itersize: int = 10000) -> None:
+    # Exports one user's transactions in [start, end) to path
+    partial = f"{path}.part"
+    try:
+        params = {"user_id": user_id, "start": start, "end": end, "credits": CREDIT_TYPES}
+        if format == "parquet":
+            export_parquet(conn, params, partial, itersize)
+        else:
+            export_csv(conn, params, partial)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+def statement_path(out_dir: str, month: datetime.date, user_id: int, format: str) -> str:
+    return os.path.join(out_dir, month.strftime("%Y-%m"), f"user_{user_id}{FORMATS[format]}")
+
+def export_statement_shard(shard: Dict[str, Any]) -> Tuple[int, int]:
+    # Runs in a worker process with its own pooled connection
+    conn = get_connection()
+    exported = failed = 0
+    try:
+        for user_id in shard["user_ids"]:
+            path = statement_path(shard["out_dir"], shard["month"], user_id, shard["format"])
+            try:
+                export_transactions(conn, user_id, shard["start"], shard["end"], path, shard["format"], shard["itersize"])
+                exported += 1
+            except Exception as e:
+                print(f"⚠️ Statement for user {user_id} failed: {e}")
+                conn.rollback()
+                failed += 1
+    finally:
+        release_connection(conn)
+    return exported, failed
+
+def export_monthly_statements(month: datetime.date, out_dir: str, format: str = "csv", workers: int = 4,
+                              itersize: int = 10000):
+    try:
+        start = datetime.datetime.combine(month_start(month), datetime.time())
+        end = datetime.datetime.combine(month_start(month, 1), datetime.time())
+        print(f"🔄 Exporting {format} statements for {start:%B %Y}...")
+        start_time = time.perf_counter()
+
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(STATEMENT_USERS_SQL, {"start": start, "end": end})
+            user_ids: List[int] = [row[0] for row in cur.fetchall()]
+
+        os.makedirs(os.path.join(out_dir, start.strftime("%Y-%m")), exist_ok=True)
+        workers = max(1, min(workers, len(user_ids)))
+        shards = [
+            {
+                "user_ids": user_ids[worker::workers],
+                "month": start.date(),
+                "start": start,
+                "end": end,
+                "out_dir": out_dir,
+                "format": format,
+                "itersize": itersize,
+            }
+            for worker in range(workers)
+        ]
+
+        exported = failed = 0
+        if workers == 1:
+            exported, failed = export_statement_shard(shards[0])
+        else:
+            with process_pool(workers) as pool:
+                for shard_exported, shard_failed in pool.imap_unordered(export_statement_shard, shards):
+                    exported += shard_exported
+                    failed += shard_failed
+
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ Exported {exported} statements to {out_dir} in {elapsed:.2f}s"
+              f"{f' ({failed} failed)' if failed else ''}")
+
+    except Exception as e:
+        print(f"🔥 Error exporting statements: {e}")
+
+def export_user(user_id: int, start: datetime.date, end: datetime.date, path: Optional[str] = None,
+                format: str = "csv", itersize: int = 10000):
+    try:
+        path = path or f"transactions_user_{user_id}_{start}_{end}{FORMATS[format]}"
+        print(f"🔄 Exporting transactions of user {user_id} from {start} to {end}...")
+        conn = get_connection()
+        export_transactions(conn, user_id, datetime.datetime.combine(start, datetime.time()),
+                            datetime.datetime.combine(end, datetime.time()), path, format, itersize)
+        print(f"✅ Exported to {path}")
+    except Exception as e:
+        print(f"🔥 Error exporting transactions: {e}")
+    finally:
+        if 'conn' in locals():
+            release_connection(conn)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export transactions to compressed CSV or Parquet")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="csv", help="Output format")
+    parser.add_argument("--itersize", type=int, default=10000, help="Rows per round trip (and Parquet row group)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    user_parser = subparsers.add_parser("user", help="Export one user's transactions for a date range")
+    user_parser.add_argument("user_id", type=int)
+    user_parser.add_argument("--start", type=datetime.date.fromisoformat, required=True, help="First day (YYYY-MM-DD)")
+    user_parser.add_argument("--end", type=datetime.date.fromisoformat, required=True, help="Day after the last one (YYYY-MM-DD)")
+    user_parser.add_argument("--output", default=None, help="Output file")
+
+    statements_parser = subparsers.add_parser("statements", help="Export every user's statement for a month")
+    statements_parser.add_argument("--month", type=lambda value: datetime.datetime.strptime(value, "%Y-%m").date(),
+                                   required=True, help="Month (YYYY-MM)")
+    statements_parser.add_argument("--out-dir", default="statements", help="Directory for the statement files")
+    statements_parser.add_argument("--workers", type=int, default=4, help="Parallel export processes")
+    args = parser.parse_args()
+
+    if args.command == "user":
+        export_user(args.user_id, args.start, args.end, args.output, args.format, args.itersize)
+    else:
+        export_monthly_statements(args.month, args.out_dir, args.format, args.workers, args.itersize)
@@ -0,0 +1,178 @@
+import time
+import argparse
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from db_pool import get_connection, release_connection
+from fraud_scoring import FREQUENCY_WINDOW, UserWindow, score_transaction
+
+# Per-user fraud scoring features kept in process, so a burst of transactions from one
+# user is scored with a single query for the first one. Entries are updated as each
+# transaction is scored and expire after ttl seconds, since other processes also write
+# transactions. Only what score_transaction reads is cached - the transaction history
+# and account age - so balance and status changes never leave an entry stale.
+
+LOAD_FEATURES_SQL = """
+    SELECT u.created_at,
+        s.total_count + COALESCE(a.transaction_count, 0), s.total_amount + COALESCE(a.total_amount, 0),
+        s.recent, s.locations
+    FROM users u
+    LEFT JOIN archived_transaction_totals a ON a.user_id = u.id
+    LEFT JOIN LATERAL (
+        SELECT
+            COUNT(*) AS total_count,
+            COALESCE(SUM(t.amount), 0) AS total_amount,
+            ARRAY_AGG(t.created_at ORDER BY t.created_at) FILTER (WHERE t.created_at > %s) AS recent,
+            ARRAY_AGG(DISTINCT t.location) FILTER (WHERE t.location IS NOT NULL) AS locations
+        FROM transactions t
+        WHERE t.user_id = u.id
+    ) s ON true
+    WHERE u.id = %s
+"""
+
+class UserFeatures(UserWindow):
+    # UserWindow plus what the rest of scoring needs about the account
+    def __init__(self, account_created_at: Optional[datetime.datetime], locations: Set[str]):
+        super().__init__()
+        self.account_created_at = account_created_at
+        self.locations = locations
+        self.loaded_at = time.monotonic()
+
+    def account_age_days(self, at: datetime.datetime) -> float:
+        if self.account_created_at is None:
+            return float("inf")
+        return (at - self.account_created_at).total_seconds() / 86400
+
+    def observe(self, at: datetime.datetime, amount: float, location: Optional[str] = None):
+        super().observe(at, amount)
+        if location:
+            self.locations.add(location)
+
+def load_features(cur, user_id: int, at: datetime.datetime) -> Optional[UserFeatures]:
+    cur.execute(LOAD_FEATURES_SQL, (at - FREQUENCY_WINDOW, user_id))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    created_at, total_count, total_amount, recent, locations = row
+    features = UserFeatures(created_at, set(locations or []))
+    features.recent.extend(recent or [])
+    features.count = total_count or 0
+    features.total = float(total_amount or 0)
+    return features
+
+class FeatureCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, UserFeatures]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, cur, user_id: int, at: Optional[datetime.datetime] = None) -> Optional[UserFeatures]:
+        with self._lock:
+            features = self._entries.get(user_id)
+            if features is not None and time.monotonic() - features.loaded_at > self.ttl:
+                del self._entries[user_id]
+                self.expirations += 1
+                features = None
+            if features is not None:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return features
+            self.misses += 1
+
+        # Loaded outside the lock so one slow query doesn't stall other users
+        features = load_features(cur, user_id, at or datetime.datetime.now())
+        if features is None:
+            return None
+        with self._lock:
+            self._entries[user_id] = features
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return features
+
+    def score(self, cur, user_id: int, amount: float, at: Optional[datetime.datetime] = None,
+              location: Optional[str] = None) -> Optional[int]:
+        # Scores a transaction that is not yet in the database, then folds it into the features
+        at = at or datetime.datetime.now()
+        features = self.get(cur, user_id, at)
+        if features is None:
+            return None
+        with self._lock:
+            risk_score = score_transaction(amount, features.recent_count(at), features.average(),
+                                           features.account_age_days(at))
+            features.observe(at, amount, location)
+        return risk_score
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+REPLAY_SQL = """
+    SELECT user_id, amount, location
+    FROM transactions
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+"""
+
+def replay_recent(limit: int = 10000, max_size: int = 10000, ttl: float = 300.0):
+    # Scores the latest transactions again as if they were arriving now, to show how
+    # many feature queries the cache saves on real traffic
+    try:
+        print(f"🔄 Replaying the latest {limit} transactions through the feature cache...")
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute(REPLAY_SQL, (limit,))
+        rows = cur.fetchall()
+
+        cache = FeatureCache(max_size, ttl)
+        start = time.perf_counter()
+        for user_id, amount, location in reversed(rows):
+            cache.score(cur, user_id, float(amount), location=location)
+        elapsed = time.perf_counter() - start
+
+        stats = cache.stats()
+        print(f"✅ Scored {len(rows)} transactions in {elapsed:.2f}s with {stats['misses']} feature queries")
+        for key, value in stats.items():
+            print(f"  {key:<14} {value:.2%}" if key == "hit_rate" else f"  {key:<14} {value}")
+
+    except Exception as e:
+        print(f"🔥 Error replaying transactions: {e}")
+    finally:
+        if 'conn' in locals():
+            release_connection(conn)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recent transactions through the fraud feature cache")
+    parser.add_argument("--limit", type=int, default=10000, help="Number of recent transactions to replay")
+    parser.add_argument("--max-size", type=int, default=10000, help="Users kept in the cache")
+    parser.add_argument("--ttl", type=float, default=300.0, help="Seconds before cached features are reloaded")
+    args = parser.parse_args()
+
+    replay_recent(args.limit, args.max_size, args.ttl)
@@ -0,0 +1,314 @@
+import time
+import argparse
+import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+try:
+    import numpy as np
+except ImportError:  # required by the rule engine only
+    np = None
+
+from db_pool import get_connection, release_connection
+from locations import is_domestic
+
+# Active rows of fraud_rules compiled into vectorized predicates. A batch is a dict
+# of equal-length NumPy columns:
+#   id, user_id         int64
+#   amount              float64
+#   type, location      object (location may hold None)
+#   created_at          datetime64[us]
+#   account_created_at  datetime64[us] (NaT when unknown)
+# and every predicate returns one boolean per row. The context passed alongside
+# carries what happened before the batch:
+#   known_locations     {user_id: set of locations the user has transacted from}
+#   recent_activity     (user_ids, created_at) of earlier transactions that still
+#                       fall inside the frequency window
+
+Predicate = Callable[[Dict[str, Any], Dict[str, Any]], Any]
+
+WITHDRAWAL_TYPES = ["withdrawal", "mpesa_withdrawal"]
+NEW_ACCOUNT_DAYS = 30
+FREQUENCY_WINDOW_SECONDS = 3600
+
+# Bumps whenever a rule is added, removed, edited or (de)activated through updated_at
+RULES_VERSION_SQL = "SELECT COUNT(*), MAX(COALESCE(updated_at, created_at)) FROM fraud_rules"
+
+ACTIVE_RULES_SQL = """
+    SELECT id, name, rule_type, threshold
+    FROM fraud_rules
+    WHERE is_active
+    ORDER BY id
+"""
+
+def compile_amount(threshold: Optional[float]) -> Predicate:
+    limit = float(threshold) if threshold is not None else 50000.0
+    return lambda batch, context: batch["amount"] > limit
+
+def window_counts(user_ids, created_at, window_seconds: int, prior=None):
+    # Transactions by the same user within window_seconds up to and including each row,
+    # counted with one sort and one binary search. prior holds (user_ids, created_at)
+    # of earlier transactions that count toward the window but get no result of their own.
+    count = len(user_ids)
+    if prior is not None and len(prior[0]):
+        user_ids = np.concatenate([prior[0], user_ids])
+        created_at = np.concatenate([prior[1], created_at])
+    seconds = created_at.astype("datetime64[s]").astype(np.int64)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+    _, user_rank = np.unique(user_ids, return_inverse=True)
+    span = int(seconds.max() - seconds.min()) + window_seconds + 1
+    keys = user_rank.astype(np.int64) * span + (seconds - seconds.min())
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    lower = np.searchsorted(sorted_keys, sorted_keys - window_seconds, side="right")
+    counts = np.empty(len(keys), dtype=np.int64)
+    counts[order] = np.arange(len(keys)) - lower + 1
+    return counts[len(keys) - count:]
+
+def compile_frequency(threshold: Optional[float]) -> Predicate:
+    limit = int(threshold) if threshold is not None else 5
+    return lambda batch, context: window_counts(
+        batch["user_id"], batch["created_at"], FREQUENCY_WINDOW_SECONDS, context.get("recent_activity")
+    ) > limit
+
+def location_columns(locations) -> Any:
+    present = np.array([location is not None for location in locations], dtype=bool)
+    return present, locations.astype(str)
+
+def compile_location(threshold: Optional[float]) -> Predicate:
+    def predicate(batch, context):
+        present, names = location_columns(batch["location"])
+        # Each distinct name is classified once
+        unique_names, inverse = np.unique(names, return_inverse=True)
+        domestic = np.array([is_domestic(name) for name in unique_names.tolist()], dtype=bool)
+        return present & ~domestic[inverse]
+    return predicate
+
+def compile_new_account(threshold: Optional[float]) -> Predicate:
+    limit = float(threshold) if threshold is not None else 10000.0
+    max_age = np.timedelta64(NEW_ACCOUNT_DAYS, "D")
+
+    def predicate(batch, context):
+        age = batch["created_at"] - batch["account_created_at"]
+        new_account = ~np.isnat(age) & (age < max_age)
+        return new_account & np.isin(batch["type"], WITHDRAWAL_TYPES) & (batch["amount"] > limit)
+    return predicate
+
+def compile_unusual_location(threshold: Optional[float]) -> Predicate:
+    def predicate(batch, context):
+        present, names = location_columns(batch["location"])
+        _, location_code = np.unique(names, return_inverse=True)
+        pairs = batch["user_id"].astype(np.int64) * (int(location_code.max(initial=0)) + 1) + location_code
+
+        # A (user, location) pair is unusual the first time it shows up in the batch...
+        order = np.argsort(batch["created_at"], kind="stable")
+        _, first = np.unique(pairs[order], return_index=True)
+        first_seen = np.zeros(len(pairs), dtype=bool)
+        first_seen[order[first]] = True
+
+        # ...unless the caller already knows the user has been there
+        known: Dict[int, Set[str]] = context.get("known_locations", {})
+        if known:
+            seen_before = np.fromiter(
+                (name in known.get(user_id, ()) for user_id, name in zip(batch["user_id"].tolist(), names.tolist())),
+                dtype=bool, count=len(names)
+            )
+            first_seen &= ~seen_before
+        return present & first_seen
+    return predicate
+
+RULE_COMPILERS: Dict[str, Callable[[Optional[float]], Predicate]] = {
+    "amount": compile_amount,
+    "frequency": compile_frequency,
+    "location": compile_location,
+    "new_account": compile_new_account,
+    "unusual_location": compile_unusual_location,
+}
+
+class RuleEngine:
+    def __init__(self, refresh_interval: float = 30.0):
+        if np is None:
+            raise RuntimeError("The fraud rule engine requires numpy (pip install numpy)")
+        # How often the rules table is checked for changes, in seconds
+        self.refresh_interval = refresh_interval
+        self.rules: List[Dict[str, Any]] = []
+        self._version = None
+        self._checked_at = float("-inf")
+
+    def refresh(self, cur, force: bool = False) -> bool:
+        # Recompiles only when fraud_rules changed since the last compile
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return False
+        self._checked_at = now
+
+        cur.execute(RULES_VERSION_SQL)
+        version = cur.fetchone()
+        if not force and version == self._version:
+            return False
+
+        cur.execute(ACTIVE_RULES_SQL)
+        rules = []
+        for rule_id, name, rule_type, threshold in cur.fetchall():
+            compiler = RULE_COMPILERS.get(rule_type)
+            if compiler is None:
+                print(f"⚠️ Skipping fraud rule '{name}': unknown rule type {rule_type}")
+                continue
+            rules.append({"id": rule_id, "name": name, "rule_type": rule_type, "predicate": compiler(threshold)})
+        self.rules = rules
+        self._version = version
+        return True
+
+    def evaluate(self, batch: Dict[str, Any], context: Optional[Dict[str, Any]] = None):
+        # One boolean row per rule; column j tells which rules transaction j matched
+        context = context or {}
+        n = len(batch["id"])
+        if not self.rules:
+            return np.zeros((0, n), dtype=bool)
+        return np.vstack([np.asarray(rule["predicate"](batch, context), dtype=bool) for rule in self.rules])
+
+# Evaluating stored transactions
+BATCH_SQL = """
+    SELECT t.id, t.user_id, t.amount, t.type, t.location, t.created_at, u.created_at
+    FROM transactions t
+    JOIN users u ON u.id = t.user_id
+    WHERE t.created_at >= %s
+    ORDER BY t.user_id, t.created_at, t.id
+"""
+
+# History from before `since` for the users in a batch
+KNOWN_LOCATIONS_SQL = """
+    SELECT user_id, array_agg(DISTINCT location)
+    FROM transactions
+    WHERE user_id = ANY(%s) AND created_at < %s AND location IS NOT NULL
+    GROUP BY user_id
+"""
+
+RECENT_ACTIVITY_SQL = """
+    SELECT user_id, created_at
+    FROM transactions
+    WHERE user_id = ANY(%s) AND created_at >= %s AND created_at < %s
+"""
+
+def load_context(cur, batch: Dict[str, Any], since: datetime.datetime,
+                 carried: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # carried is the part of the previous batch belonging to the user it ended on
+    users = np.unique(batch["user_id"]).tolist()
+    cur.execute(KNOWN_LOCATIONS_SQL, (users, since))
+    known: Dict[int, Set[str]] = {user_id: set(locations) for user_id, locations in cur.fetchall()}
+
+    cur.execute(RECENT_ACTIVITY_SQL, (users, since - datetime.timedelta(seconds=FREQUENCY_WINDOW_SECONDS), since))
+    recent = cur.fetchall()
+    prior_users = np.array([row[0] for row in recent], dtype=np.int64)
+    prior_times = np.array([row[1] for row in recent], dtype="datetime64[us]")
+
+    if carried:
+        known.setdefault(carried["user_id"], set()).update(carried["locations"])
+        prior_users = np.concatenate([prior_users, np.full(len(carried["created_at"]), carried["user_id"], dtype=np.int64)])
+        prior_times = np.concatenate([prior_times, carried["created_at"]])
+    return {"known_locations": known, "recent_activity": (prior_users, prior_times)}
+
+def to_batch(rows) -> Dict[str, Any]:
+    ids, user_ids, amounts, types, locations, created_at, account_created_at = zip(*rows)
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "user_id": np.array(user_ids, dtype=np.int64),
+        "amount": np.array(amounts, dtype=np.float64),
+        "type": np.array(types, dtype=object),
+        "location": np.array(locations, dtype=object),
+        "created_at": np.array(created_at, dtype="datetime64[us]"),
+        "account_created_at": np.array([value or np.datetime64("NaT") for value in account_created_at], dtype="datetime64[us]"),
+    }
+
+def create_rule_alerts(cur, engine: RuleEngine, batch: Dict[str, Any], matches) -> int:
+    alerts = []
+    for rule, mask in zip(engine.rules, matches):
+        for index in np.flatnonzero(mask).tolist():
+            alerts.append((int(batch["user_id"][index]), int(batch["id"][index]), f"Matched fraud rule: {rule['name']}"))
+    if not alerts:
+        return 0
+    cur.execute(
+        """
+        INSERT INTO fraud_alerts (user_id, transaction_id, description, status, created_at)
+        SELECT a.user_id, a.transaction_id, a.description, 'new', CURRENT_TIMESTAMP
+        FROM UNNEST(%s::integer[], %s::integer[], %s::text[]) AS a(user_id, transaction_id, description)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM fraud_alerts f WHERE f.transaction_id = a.transaction_id AND f.description = a.description
+        )
+        """,
+        tuple(map(list, zip(*alerts)))
+    )
+    return cur.rowcount
+
+def evaluate_transactions(days: int = 1, batch_size: int = 50000, create_alerts: bool = False):
+    try:
+        print(f"🔄 Evaluating fraud rules over the last {days} days of transactions...")
+        start = time.perf_counter()
+
+        reader = get_connection()
+        writer = get_connection()
+        engine = RuleEngine()
+        with writer.cursor() as cur:
+            engine.refresh(cur, force=True)
+        print(f"Compiled {len(engine.rules)} active rules: {', '.join(rule['name'] for rule in engine.rules)}")
+
+        totals = {rule["name"]: 0 for rule in engine.rules}
+        scanned = alerts = 0
+        carried: Optional[Dict[str, Any]] = None
+        since = datetime.datetime.now() - datetime.timedelta(days=days)
+        with reader.cursor(name="fraud_rule_batches") as cur:
+            cur.itersize = batch_size
+            cur.execute(BATCH_SQL, (since,))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                batch = to_batch(rows)
+                with writer.cursor() as history_cur:
+                    context = load_context(history_cur, batch, since, carried)
+                writer.commit()
+                matches = engine.evaluate(batch, context)
+                for rule, mask in zip(engine.rules, matches):
+                    totals[rule["name"]] += int(mask.sum())
+                scanned += len(rows)
+
+                # Rows come in user order, so only the last user can continue into the next batch
+                last_user = rows[-1][1]
+                last_rows = batch["user_id"] == last_user
+                carried = {
+                    "user_id": last_user,
+                    "locations": {row[4] for row in rows if row[1] == last_user and row[4] is not None},
+                    "created_at": batch["created_at"][last_rows],
+                }
+
+                if create_alerts:
+                    with writer.cursor() as write_cur:
+                        alerts += create_rule_alerts(write_cur, engine, batch, matches)
+                    writer.commit()
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ Evaluated {scanned} transactions in {elapsed:.2f}s")
+        for name, count in totals.items():
+            print(f"  {name:<30} {count:>10} matches")
+        if create_alerts:
+            print(f"Created {alerts} fraud alerts")
+
+    except Exception as e:
+        print(f"🔥 Error evaluating fraud rules: {e}")
+        if 'writer' in locals():
+            writer.rollback()
+    finally:
+        if 'reader' in locals():
+            release_connection(reader)
+        if 'writer' in locals():
+            release_connection(writer)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the active fraud_rules against recent transactions")
+    parser.add_argument("--days", type=int, default=1, help="Evaluate transactions from this many days back")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Transactions evaluated per batch")
+    parser.add_argument("--alerts", action="store_true", help="Create a fraud alert for every rule match")
+    args = parser.parse_args()
+
+    evaluate_transactions(args.days, args.batch_size, args.alerts)
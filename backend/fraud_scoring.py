@@ -0,0 +1,200 @@
+import time
+import argparse
+import datetime
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from db_pool import get_connection, release_connection
+from copy_util import copy_rows
+
+# Mirrors calculateRiskScore / shouldFlagTransaction in utils/fraudDetection.ts
+FLAG_THRESHOLD = 75
+FREQUENCY_WINDOW = datetime.timedelta(hours=24)
+
+def amount_factor(amount: float) -> int:
+    if amount > 50000:
+        return 30
+    if amount > 10000:
+        return 15
+    if amount > 5000:
+        return 5
+    return 0
+
+def frequency_factor(recent_count: int) -> int:
+    if recent_count > 10:
+        return 25
+    if recent_count > 5:
+        return 10
+    return 0
+
+def pattern_factor(amount: float, average_amount: float) -> int:
+    # Like the TypeScript version, a user with no history averages 0, so any amount counts as unusual
+    if amount > average_amount * 3:
+        return 20
+    if amount > average_amount * 2:
+        return 10
+    return 0
+
+def history_factor(account_age_days: float) -> int:
+    if account_age_days < 7:
+        return 15
+    if account_age_days < 30:
+        return 5
+    return 0
+
+def score_transaction(amount: float, recent_count: int, average_amount: float, account_age_days: float) -> int:
+    score = amount_factor(amount) + frequency_factor(recent_count) + pattern_factor(amount, average_amount) + history_factor(account_age_days)
+    return min(100, score)
+
+def should_flag_transaction(risk_score: int) -> bool:
+    return risk_score >= FLAG_THRESHOLD
+
+class UserWindow:
+    # Rolling per-user state while replaying that user's transactions in time order:
+    # timestamps inside the 24-hour window and a running mean of every amount so far
+    def __init__(self):
+        self.recent: Deque[datetime.datetime] = deque()
+        self.count = 0
+        self.total = 0.0
+
+    def recent_count(self, at: datetime.datetime) -> int:
+        while self.recent and self.recent[0] <= at - FREQUENCY_WINDOW:
+            self.recent.popleft()
+        return len(self.recent)
+
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, at: datetime.datetime, amount: float):
+        self.recent.append(at)
+        self.count += 1
+        self.total += amount
+
+    def score(self, amount: float, at: datetime.datetime, account_created_at: Optional[datetime.datetime]) -> int:
+        # Scores a transaction against the history before it, then adds it to the history
+        account_age_days = (at - account_created_at).total_seconds() / 86400 if account_created_at else float("inf")
+        risk_score = score_transaction(amount, self.recent_count(at), self.average(), account_age_days)
+        self.observe(at, amount)
+        return risk_score
+
+# Batch rescoring
+STREAM_SQL = """
+    SELECT t.id, t.user_id, t.type, t.amount, t.created_at, t.risk_score, u.created_at,
+        a.transaction_count, a.total_amount
+    FROM transactions t
+    JOIN users u ON u.id = t.user_id
+    LEFT JOIN archived_transaction_totals a ON a.user_id = t.user_id
+    ORDER BY t.user_id, t.created_at, t.id
+"""
+
+RESCORED_COLUMNS = ["id", "created_at", "user_id", "risk_score", "alert_description"]
+
+CREATE_RESCORED_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS rescored_transactions (
+        id INTEGER,
+        created_at TIMESTAMP,
+        user_id INTEGER,
+        risk_score INTEGER,
+        alert_description TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+# created_at is part of the join so partitioned transactions are pruned per row
+APPLY_SCORES_SQL = """
+    UPDATE transactions t
+    SET risk_score = r.risk_score
+    FROM rescored_transactions r
+    WHERE t.id = r.id AND t.created_at = r.created_at
+    AND t.risk_score IS DISTINCT FROM r.risk_score
+"""
+
+CREATE_ALERTS_SQL = """
+    INSERT INTO fraud_alerts (user_id, transaction_id, description, status, risk_score, created_at)
+    SELECT r.user_id, r.id, r.alert_description, 'new', r.risk_score, CURRENT_TIMESTAMP
+    FROM rescored_transactions r
+    WHERE r.alert_description IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM fraud_alerts f WHERE f.transaction_id = r.id)
+"""
+
+def write_scores(conn, rows) -> Tuple[int, int]:
+    with conn.cursor() as cur:
+        cur.execute(CREATE_RESCORED_SQL)
+        copy_rows(cur, "rescored_transactions", RESCORED_COLUMNS, rows)
+        cur.execute(APPLY_SCORES_SQL)
+        updated = cur.rowcount
+        cur.execute(CREATE_ALERTS_SQL)
+        alerts = cur.rowcount
+    conn.commit()
+    return updated, alerts
+
+def rescore_transactions(batch_size: int = 10000, itersize: int = 50000):
+    # One pass over every transaction in (user, time) order: the reader streams through
+    # a server-side cursor while a second connection writes changed scores in batches
+    try:
+        print("🔄 Rescoring transactions...")
+        start = time.perf_counter()
+
+        reader = get_connection()
+        writer = get_connection()
+
+        scanned = updated = flagged = alerts = 0
+        pending = []
+        window = None
+        current_user = None
+
+        with reader.cursor(name="fraud_rescore") as cur:
+            cur.itersize = itersize
+            cur.execute(STREAM_SQL)
+            for (transaction_id, user_id, type, amount, created_at, old_score, user_created_at,
+                 archived_count, archived_amount) in cur:
+                if user_id != current_user:
+                    current_user = user_id
+                    window = UserWindow()
+                    # Archived transactions still count toward the running mean
+                    window.count = archived_count or 0
+                    window.total = float(archived_amount or 0)
+
+                amount = float(amount)
+                risk_score = window.score(amount, created_at, user_created_at)
+                scanned += 1
+
+                flag = should_flag_transaction(risk_score)
+                flagged += flag
+                if risk_score != old_score or flag:
+                    description = f"Suspicious {type} of KSH {amount:.2f}" if flag else None
+                    pending.append((transaction_id, created_at, user_id, risk_score, description))
+
+                if len(pending) >= batch_size:
+                    batch_updated, batch_alerts = write_scores(writer, pending)
+                    updated += batch_updated
+                    alerts += batch_alerts
+                    pending = []
+                    print(f"  {scanned} transactions scored, {updated} updated, {alerts} alerts created")
+
+        if pending:
+            batch_updated, batch_alerts = write_scores(writer, pending)
+            updated += batch_updated
+            alerts += batch_alerts
+
+        elapsed = time.perf_counter() - start
+        rate = scanned / elapsed if elapsed > 0 else 0
+        print(f"✅ Rescored {scanned} transactions in {elapsed:.2f}s ({rate:,.0f} rows/sec): "
+              f"{updated} scores changed, {flagged} flagged, {alerts} new fraud alerts")
+
+    except Exception as e:
+        print(f"🔥 Error rescoring transactions: {e}")
+        if 'writer' in locals():
+            writer.rollback()
+    finally:
+        if 'reader' in locals():
+            release_connection(reader)
+        if 'writer' in locals():
+            release_connection(writer)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rescore every transaction with the fraud scoring rules")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Changed scores written per committed batch")
+    parser.add_argument("--itersize", type=int, default=50000, help="Rows fetched per round trip from the server-side cursor")
+    args = parser.parse_args()
+
+    rescore_transactions(args.batch_size, args.itersize)
@@ -0,0 +1,302 @@
+import time
+import random
+import argparse
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from db_pool import get_connection, release_connection, process_pool
+
+# Posting engine for the double-entry ledger in create_tables.py. A batch of transfers
+# is posted in one database transaction:
+#   1. transaction-level advisory locks on every account involved, in ascending id
+#      order, so concurrent batches queue instead of deadlocking
+#   2. accounts with no ledger history get an opening entry for their users.balance,
+#      so money held before the ledger existed carries over
+#   3. balances of the debited accounts read as snapshot + entries since the snapshot
+#   4. transfers applied in order in Python, rejecting any that would overdraw
+#   5. all entries written in one INSERT, users.balance adjusted in one UPDATE
+# The external account is never locked or balance-checked, so deposits and
+# withdrawals don't all serialize on it.
+
+EXTERNAL_ACCOUNT = 0
+
+# Reference of the entries that carry a pre-ledger users.balance into the ledger
+OPENING_REFERENCE = "OPENING"
+
+# First key of the two-key advisory locks taken per account
+LEDGER_LOCK_CLASS = 727003
+
+class Transfer(NamedTuple):
+    from_account: int
+    to_account: int
+    amount: Decimal
+    reference: Optional[str] = None
+
+LOCK_ACCOUNTS_SQL = """
+    SELECT pg_advisory_xact_lock(%s, account_id)
+    FROM (SELECT account_id FROM UNNEST(%s::integer[]) AS account_id ORDER BY account_id) ordered
+"""
+
+BALANCES_SQL = """
+    SELECT a.account_id, COALESCE(s.balance, 0) + COALESCE(SUM(e.amount), 0)
+    FROM UNNEST(%s::integer[]) AS a(account_id)
+    LEFT JOIN balance_snapshots s ON s.account_id = a.account_id
+    LEFT JOIN ledger_entries e ON e.account_id = a.account_id AND e.id > COALESCE(s.last_entry_id, 0)
+    GROUP BY a.account_id, s.balance
+"""
+
+# Accounts the ledger has never seen; their users.balance predates it
+UNOPENED_SQL = """
+    SELECT u.id, u.balance
+    FROM users u
+    WHERE u.id = ANY(%s) AND u.balance <> 0
+    AND NOT EXISTS (SELECT 1 FROM ledger_entries e WHERE e.account_id = u.id)
+    AND NOT EXISTS (SELECT 1 FROM balance_snapshots s WHERE s.account_id = u.id)
+"""
+
+INSERT_ENTRIES_SQL = """
+    INSERT INTO ledger_entries (transfer_id, account_id, amount, reference)
+    SELECT * FROM UNNEST(%s::bigint[], %s::integer[], %s::numeric[], %s::varchar[])
+"""
+
+SYNC_USER_BALANCES_SQL = """
+    UPDATE users u
+    SET balance = u.balance + d.delta, updated_at = CURRENT_TIMESTAMP
+    FROM UNNEST(%s::integer[], %s::numeric[]) AS d(account_id, delta)
+    WHERE u.id = d.account_id
+"""
+
+def lock_accounts(cur, accounts: Sequence[int]) -> None:
+    cur.execute(LOCK_ACCOUNTS_SQL, (LEDGER_LOCK_CLASS, sorted(set(accounts) - {EXTERNAL_ACCOUNT})))
+
+def account_balances(cur, accounts: Sequence[int]) -> Dict[int, Decimal]:
+    # Exact only while the accounts are locked; otherwise a point-in-time estimate
+    cur.execute(BALANCES_SQL, (list(accounts),))
+    return dict(cur.fetchall())
+
+def insert_entries(cur, transfers: Sequence[Transfer]) -> None:
+    # Two entries per transfer under one transfer id
+    if not transfers:
+        return
+    cur.execute("SELECT nextval('ledger_transfer_id_seq') FROM generate_series(1, %s)", (len(transfers),))
+    transfer_ids = [row[0] for row in cur.fetchall()]
+    columns: Tuple[List[Any], ...] = ([], [], [], [])
+    for transfer_id, transfer in zip(transfer_ids, transfers):
+        for account, amount in ((transfer.from_account, -Decimal(transfer.amount)), (transfer.to_account, Decimal(transfer.amount))):
+            columns[0].append(transfer_id)
+            columns[1].append(account)
+            columns[2].append(amount)
+            columns[3].append(transfer.reference)
+    cur.execute(INSERT_ENTRIES_SQL, columns)
+
+def open_locked_accounts(cur, accounts: Sequence[int]) -> int:
+    # Posts opening entries for the unopened accounts among accounts, which the caller
+    # has locked; users.balance already holds these amounts and is left alone
+    cur.execute(UNOPENED_SQL, (sorted(set(accounts) - {EXTERNAL_ACCOUNT}),))
+    openings = [
+        Transfer(EXTERNAL_ACCOUNT, user_id, balance, OPENING_REFERENCE) if balance > 0
+        else Transfer(user_id, EXTERNAL_ACCOUNT, -balance, OPENING_REFERENCE)
+        for user_id, balance in cur.fetchall()
+    ]
+    insert_entries(cur, openings)
+    return len(openings)
+
+def post_transfers(conn, transfers: Sequence[Transfer], sync_user_balances: bool = True) -> Tuple[List[Transfer], List[Transfer]]:
+    # Posts every transfer that leaves its sender at or above zero; returns (posted, rejected)
+    if not transfers:
+        return [], []
+    with conn.cursor() as cur:
+        try:
+            accounts = [account for t in transfers for account in (t.from_account, t.to_account)]
+            lock_accounts(cur, accounts)
+            open_locked_accounts(cur, accounts)
+            debited = sorted({t.from_account for t in transfers} - {EXTERNAL_ACCOUNT})
+            balances = account_balances(cur, debited)
+
+            posted, rejected = [], []
+            deltas: Dict[int, Decimal] = {}
+            for transfer in transfers:
+                amount = Decimal(transfer.amount)
+                if amount <= 0 or transfer.from_account == transfer.to_account:
+                    rejected.append(transfer)
+                    continue
+                if transfer.from_account != EXTERNAL_ACCOUNT:
+                    if balances[transfer.from_account] < amount:
+                        rejected.append(transfer)
+                        continue
+                    balances[transfer.from_account] -= amount
+                if transfer.to_account in balances:
+                    balances[transfer.to_account] += amount
+                deltas[transfer.from_account] = deltas.get(transfer.from_account, Decimal(0)) - amount
+                deltas[transfer.to_account] = deltas.get(transfer.to_account, Decimal(0)) + amount
+                posted.append(transfer)
+
+            if posted:
+                insert_entries(cur, posted)
+                if sync_user_balances:
+                    changed = sorted(account for account, delta in deltas.items() if account != EXTERNAL_ACCOUNT and delta != 0)
+                    cur.execute(SYNC_USER_BALANCES_SQL, (changed, [deltas[account] for account in changed]))
+            conn.commit()
+            return posted, rejected
+        except Exception:
+            conn.rollback()
+            raise
+
+def take_snapshots(conn, batch_size: int = 1000, min_entries: int = 1) -> int:
+    # Folds entries into balance_snapshots for accounts with at least min_entries new
+    # entries. Accounts are locked like a posting batch, so no entry for them is in flight.
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT e.account_id
+            FROM ledger_entries e
+            LEFT JOIN balance_snapshots s ON s.account_id = e.account_id
+            WHERE e.id > COALESCE(s.last_entry_id, 0) AND e.account_id <> %s
+            GROUP BY e.account_id
+            HAVING COUNT(*) >= %s
+            ORDER BY e.account_id
+            """,
+            (EXTERNAL_ACCOUNT, min_entries)
+        )
+        accounts = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+        for start in range(0, len(accounts), batch_size):
+            chunk = accounts[start:start + batch_size]
+            lock_accounts(cur, chunk)
+            cur.execute(
+                """
+                INSERT INTO balance_snapshots AS s (account_id, last_entry_id, balance, created_at)
+                SELECT e.account_id, MAX(e.id), COALESCE(p.balance, 0) + SUM(e.amount), CURRENT_TIMESTAMP
+                FROM ledger_entries e
+                LEFT JOIN balance_snapshots p ON p.account_id = e.account_id
+                WHERE e.account_id = ANY(%s) AND e.id > COALESCE(p.last_entry_id, 0)
+                GROUP BY e.account_id, p.balance
+                ON CONFLICT (account_id) DO UPDATE SET
+                    last_entry_id = EXCLUDED.last_entry_id, balance = EXCLUDED.balance, created_at = EXCLUDED.created_at
+                """,
+                (chunk,)
+            )
+            conn.commit()
+        return len(accounts)
+
+def open_accounts(conn, batch_size: int = 1000) -> int:
+    # Opens every account ahead of time instead of on its first posting. Candidates are
+    # re-checked under the lock, so accounts a concurrent batch opened are skipped.
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT u.id
+            FROM users u
+            WHERE u.balance <> 0
+            AND NOT EXISTS (SELECT 1 FROM ledger_entries e WHERE e.account_id = u.id)
+            ORDER BY u.id
+            """
+        )
+        candidates = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+        opened = 0
+        for start in range(0, len(candidates), batch_size):
+            chunk = candidates[start:start + batch_size]
+            try:
+                lock_accounts(cur, chunk)
+                opened += open_locked_accounts(cur, chunk)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return opened
+
+# Throughput benchmark
+def post_random_transfers(shard: Dict[str, Any]) -> Tuple[int, int, float]:
+    # Runs in a worker process with its own pooled connection
+    rng = random.Random(shard["seed"])
+    accounts = shard["accounts"]
+    conn = get_connection()
+    posted = rejected = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(shard["batches"]):
+            transfers = [
+                Transfer(*rng.sample(accounts, 2), Decimal(rng.randint(1, 500)), "BENCHMARK")
+                for _ in range(shard["batch_size"])
+            ]
+            batch_posted, batch_rejected = post_transfers(conn, transfers)
+            posted += len(batch_posted)
+            rejected += len(batch_rejected)
+    finally:
+        release_connection(conn)
+    return posted, rejected, time.perf_counter() - start
+
+def benchmark(transfers: int, batch_size: int, workers: int, accounts: int):
+    try:
+        print(f"🔄 Posting {transfers} random transfers between {accounts} accounts ({workers} workers, {batch_size} per batch)...")
+        conn = get_connection()
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM users ORDER BY id LIMIT %s", (accounts,))
+            account_ids = [row[0] for row in cur.fetchall()]
+        release_connection(conn)
+
+        batches = max(1, transfers // (batch_size * workers))
+        shards = [
+            {"accounts": account_ids, "batches": batches, "batch_size": batch_size, "seed": worker}
+            for worker in range(workers)
+        ]
+        start = time.perf_counter()
+        posted = rejected = 0
+        with process_pool(workers) as pool:
+            for shard_posted, shard_rejected, _ in pool.imap_unordered(post_random_transfers, shards):
+                posted += shard_posted
+                rejected += shard_rejected
+        elapsed = time.perf_counter() - start
+        print(f"✅ Posted {posted} transfers ({rejected} rejected) in {elapsed:.2f}s "
+              f"({posted / elapsed if elapsed > 0 else 0:,.0f} transfers/sec)")
+    except Exception as e:
+        print(f"🔥 Error posting transfers: {e}")
+
+def run_command(command: str, args):
+    try:
+        conn = get_connection()
+        if command == "open":
+            print("🔄 Posting opening balances...")
+            print(f"✅ Opened {open_accounts(conn)} accounts")
+        elif command == "snapshot":
+            print("🔄 Taking balance snapshots...")
+            print(f"✅ Snapshotted {take_snapshots(conn, args.batch_size, args.min_entries)} accounts")
+        elif command == "balance":
+            with conn.cursor() as cur:
+                for account, balance in sorted(account_balances(cur, args.accounts).items()):
+                    print(f"  account {account}: {balance}")
+    except Exception as e:
+        print(f"🔥 Error running ledger {command}: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+    finally:
+        if 'conn' in locals():
+            release_connection(conn)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Double-entry ledger maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("open", help="Post opening entries for users.balance of accounts without ledger history")
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="Fold recent entries into balance snapshots")
+    snapshot_parser.add_argument("--batch-size", type=int, default=1000, help="Accounts locked and snapshotted per transaction")
+    snapshot_parser.add_argument("--min-entries", type=int, default=1, help="Only snapshot accounts with at least this many new entries")
+
+    balance_parser = subparsers.add_parser("balance", help="Show ledger balances")
+    balance_parser.add_argument("accounts", type=int, nargs="+")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Post random transfers between existing users")
+    benchmark_parser.add_argument("--transfers", type=int, default=100000)
+    benchmark_parser.add_argument("--batch-size", type=int, default=500, help="Transfers per database transaction")
+    benchmark_parser.add_argument("--workers", type=int, default=4, help="Parallel posting processes")
+    benchmark_parser.add_argument("--accounts", type=int, default=1000, help="Transfer between the first N users")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        benchmark(args.transfers, args.batch_size, args.workers, args.accounts)
+    else:
+        run_command(args.command, args)
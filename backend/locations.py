@@ -0,0 +1,36 @@
+# Place names shared by the seeder and the fraud rules
+
+# Kenyan locations used for seeded data
+LOCATIONS = [
+    "Nairobi",
+    "Mombasa",
+    "Kisumu",
+    "Nakuru",
+    "Eldoret",
+    "Thika",
+    "Malindi",
+    "Kitale",
+    "Machakos",
+    "Garissa",
+]
+
+# County headquarters and other large towns, matched case-insensitively
+KENYAN_TOWNS = frozenset(name.lower() for name in LOCATIONS + [
+    "Athi River", "Awendo", "Bomet", "Bondo", "Bungoma", "Busia", "Chuka", "Dadaab", "Diani", "Embu",
+    "Gilgil", "Hola", "Homa Bay", "Isiolo", "Iten", "Juja", "Kabarnet", "Kajiado", "Kakamega", "Kakuma",
+    "Kapenguria", "Kapsabet", "Karatina", "Kathwana", "Kericho", "Kerugoya", "Kiambu", "Kikuyu", "Kilifi",
+    "Kisii", "Kitengela", "Kitui", "Kwale", "Lamu", "Limuru", "Litein", "Lodwar", "Malaba", "Mandera",
+    "Maralal", "Marsabit", "Mbale", "Meru", "Migori", "Molo", "Moyale", "Mtwapa", "Mumias", "Murang'a",
+    "Mwatate", "Mwingi", "Naivasha", "Namanga", "Nanyuki", "Narok", "Ngong", "Nyahururu", "Nyamira",
+    "Nyeri", "Ol Kalou", "Rongo", "Ruiru", "Rumuruti", "Siaya", "Taveta", "Ukunda", "Vihiga", "Voi",
+    "Wajir", "Watamu", "Webuye", "Wote", "Wundanyi",
+])
+
+DOMESTIC_COUNTRIES = frozenset(["kenya", "ke"])
+
+def is_domestic(location: str) -> bool:
+    # "Town, Country" is judged by its country; a bare name must be a known Kenyan town
+    name = location.strip().lower()
+    if "," in name:
+        return name.rsplit(",", 1)[1].strip() in DOMESTIC_COUNTRIES
+    return name in KENYAN_TOWNS or name in DOMESTIC_COUNTRIES or name.endswith(" kenya")
@@ -1,30 +1,24 @@
-import psycopg2
 from dotenv import load_dotenv
 import os
+import sys
+import argparse
+
+# Shared backend modules live one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_pool import get_connection, release_connection
+from backfill import backfill
 
 # Load environment variables
 load_dotenv()
 
-DB_NAME = "vibeflow"
-DB_USER = "viber"
-DB_PASSWORD = "hfFJ62NFDQrUG01CabZcKregE3L0HG72"
-DB_HOST = "dpg-cvvurnd6ubrc73ak94rg-a.virginia-postgres.render.com"
-DB_PORT = "5432"
-
-def add_name_columns():
+def add_name_columns(batch_size: int = 10000, max_replication_lag: float = 10.0):
     conn = None
     cur = None
     try:
         print("🔄 Adding name, verification, and last_login columns to users table...")
         
         # Connect to the database
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
+        conn = get_connection()
         cur = conn.cursor()
 
         # Add first_name, last_name, verification, and last_login columns
@@ -36,20 +30,21 @@ def add_name_columns():
             ADD COLUMN IF NOT EXISTS verification_code_expires_at TIMESTAMP,
             ADD COLUMN IF NOT EXISTS last_login TIMESTAMP
         """)
+        conn.commit()
 
-        # Update existing records to split the name field
-        cur.execute("""
-            UPDATE users
-            SET 
+        # Update existing records to split the name field, in batches
+        updated = backfill(
+            conn, "users_split_name", "users",
+            """
                 first_name = SPLIT_PART(name, ' ', 1),
                 last_name = CASE 
                     WHEN SPLIT_PART(name, ' ', 2) = '' THEN NULL
                     ELSE SPLIT_PART(name, ' ', 2)
                 END
-        """)
-
-        # Commit the changes
-        conn.commit()
+            """,
+            batch_size=batch_size, max_replication_lag=max_replication_lag
+        )
+        print(f"✅ Split names for {updated} users")
         print("✅ All columns added successfully!")
 
     except Exception as e:
@@ -61,7 +56,12 @@ def add_name_columns():
         if cur:
             cur.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 if __name__ == "__main__":
-    add_name_columns() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Add name, verification and last_login columns to users")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows updated per committed batch")
+    parser.add_argument("--max-replication-lag", type=float, default=10.0, help="Pause while replicas lag by more than this many seconds")
+    args = parser.parse_args()
+
+    add_name_columns(args.batch_size, args.max_replication_lag) 
\ No newline at end of file
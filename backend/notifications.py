@@ -0,0 +1,145 @@
+import time
+import argparse
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from db_pool import get_connection, release_connection
+from copy_util import copy_dicts
+
+# Set-based notification delivery. One event for many users is a single
+# INSERT ... SELECT over users per id range (per-user messages go through COPY), and
+# the notification_counts table from create_tables.py answers unread badges without
+# counting notifications. Its statement-level triggers fire once per statement, not
+# once per row, so a fan-out to every user costs one counter upsert per batch.
+
+NOTIFICATION_COLUMNS = ["user_id", "title", "message", "type", "is_read", "created_at"]
+
+FAN_OUT_SQL = """
+    INSERT INTO notifications (user_id, title, message, type, is_read, created_at)
+    SELECT u.id, %(title)s, %(message)s, %(type)s, false, CURRENT_TIMESTAMP
+    FROM users u
+    WHERE u.id > %(low)s AND u.id <= %(high)s AND u.status = 'active' {recipients}
+"""
+
+# Counters that disagree with the notifications they summarize
+COUNT_DRIFT_SQL = """
+    SELECT COALESCE(n.user_id, c.user_id),
+        COALESCE(c.unread_count, 0), COALESCE(n.unread_count, 0),
+        COALESCE(c.total_count, 0), COALESCE(n.total_count, 0)
+    FROM (
+        SELECT user_id, COUNT(*) FILTER (WHERE is_read IS NOT TRUE) AS unread_count, COUNT(*) AS total_count
+        FROM notifications WHERE user_id IS NOT NULL
+        GROUP BY user_id
+    ) n
+    FULL JOIN notification_counts c ON c.user_id = n.user_id
+    WHERE COALESCE(c.unread_count, 0) <> COALESCE(n.unread_count, 0)
+    OR COALESCE(c.total_count, 0) <> COALESCE(n.total_count, 0)
+"""
+
+def fan_out(conn, title: str, message: str, type: str, user_ids: Optional[Sequence[int]] = None,
+            batch_size: int = 50000) -> int:
+    # Sends one notification to every active user (or just user_ids), one committed
+    # statement per batch_size ids so no transaction locks every counter row at once
+    params = {"title": title, "message": message, "type": type}
+    recipients = ""
+    if user_ids is not None:
+        recipients = "AND u.id = ANY(%(user_ids)s)"
+        params["user_ids"] = list(user_ids)
+    sql = FAN_OUT_SQL.format(recipients=recipients)
+
+    sent = 0
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(id), 1) - 1, COALESCE(MAX(id), 0) FROM users")
+        low, max_id = cur.fetchone()
+        while low < max_id:
+            high = min(low + batch_size, max_id)
+            cur.execute(sql, {**params, "low": low, "high": high})
+            sent += cur.rowcount
+            conn.commit()
+            low = high
+    return sent
+
+def copy_notifications(cur, notifications: Iterable[Dict]) -> int:
+    # Personalised notifications (one message per user) in a single COPY
+    return copy_dicts(cur, "notifications", NOTIFICATION_COLUMNS, notifications)
+
+def unread_counts(cur, user_ids: Sequence[int]) -> Dict[int, int]:
+    cur.execute("SELECT user_id, unread_count FROM notification_counts WHERE user_id = ANY(%s)", (list(user_ids),))
+    counts = dict(cur.fetchall())
+    return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+def mark_read(cur, user_id: int, notification_ids: Optional[Sequence[int]] = None) -> int:
+    # Only rows that change are updated, so the counter trigger sees exactly the delta
+    if notification_ids is None:
+        cur.execute("UPDATE notifications SET is_read = true WHERE user_id = %s AND is_read IS NOT TRUE", (user_id,))
+    else:
+        cur.execute(
+            "UPDATE notifications SET is_read = true WHERE user_id = %s AND id = ANY(%s) AND is_read IS NOT TRUE",
+            (user_id, list(notification_ids))
+        )
+    return cur.rowcount
+
+def check_counts(repair: bool = False) -> List[tuple]:
+    try:
+        print("🔄 Checking notification counters...")
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute(COUNT_DRIFT_SQL)
+        drift = cur.fetchall()
+        for user_id, unread, actual_unread, total, actual_total in drift[:20]:
+            print(f"  user {user_id}: unread {unread} (actual {actual_unread}), total {total} (actual {actual_total})")
+        if drift and repair:
+            cur.execute(
+                """
+                INSERT INTO notification_counts AS c (user_id, unread_count, total_count)
+                SELECT user_id, actual_unread, actual_total
+                FROM UNNEST(%s::integer[], %s::bigint[], %s::bigint[]) AS d(user_id, actual_unread, actual_total)
+                ON CONFLICT (user_id) DO UPDATE SET unread_count = EXCLUDED.unread_count, total_count = EXCLUDED.total_count
+                """,
+                ([row[0] for row in drift], [row[2] for row in drift], [row[4] for row in drift])
+            )
+            conn.commit()
+            print(f"Repaired {len(drift)} counters")
+        print(f"✅ {len(drift)} counters out of date")
+        return drift
+    except Exception as e:
+        print(f"🔥 Error checking notification counters: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+        return []
+    finally:
+        if 'conn' in locals():
+            release_connection(conn)
+
+def send_to_all(title: str, message: str, type: str, batch_size: int = 50000):
+    try:
+        print(f"🔄 Sending '{title}' to every active user...")
+        start = time.perf_counter()
+        conn = get_connection()
+        sent = fan_out(conn, title, message, type, batch_size=batch_size)
+        print(f"✅ Sent {sent} notifications in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"🔥 Error sending notifications: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+    finally:
+        if 'conn' in locals():
+            release_connection(conn)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send notifications and maintain unread counters")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    send_parser = subparsers.add_parser("send", help="Send one notification to every active user")
+    send_parser.add_argument("--title", required=True)
+    send_parser.add_argument("--message", required=True)
+    send_parser.add_argument("--type", default="account", help="Notification type")
+    send_parser.add_argument("--batch-size", type=int, default=50000, help="Users per committed INSERT")
+
+    check_parser = subparsers.add_parser("check", help="Compare unread counters with the notifications table")
+    check_parser.add_argument("--repair", action="store_true", help="Overwrite counters that drifted")
+    args = parser.parse_args()
+
+    if args.command == "send":
+        send_to_all(args.title, args.message, args.type, args.batch_size)
+    else:
+        check_counts(args.repair)
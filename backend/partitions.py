@@ -0,0 +1,221 @@
+import re
+import argparse
+import datetime
+from typing import List, Optional, Tuple
+
+from db_pool import get_connection, release_connection
+
+# Tables partitioned by month on created_at
+PARTITIONED_TABLES = ["transactions", "audit_logs"]
+
+ARCHIVE_SCHEMA = "archive"
+
+# Rows outside every monthly range land in the default partition; maintenance
+# pre-creates upcoming months so it stays close to empty
+DEFAULT_PARTITION_SUFFIX = "default"
+LEGACY_PARTITION_SUFFIX = "legacy"
+
+PARTITION_BOUND_RE = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \('([^']+)'\)")
+
+def month_start(value: datetime.date, offset: int = 0) -> datetime.date:
+    months = value.year * 12 + value.month - 1 + offset
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f"{table}_p{month.year}{month.month:02d}"
+
+IS_PARTITIONED_SQL = "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)"
+
+LIST_PARTITIONS_SQL = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(%s)
+    ORDER BY c.relname
+"""
+
+def is_partitioned(cur, table: str) -> bool:
+    cur.execute(IS_PARTITIONED_SQL, (table,))
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+Partition = Tuple[str, Optional[datetime.datetime], Optional[datetime.datetime]]
+
+def parse_partitions(rows) -> List[Partition]:
+    # (partition, lower bound, upper bound); the lower bound is datetime.min for
+    # a MINVALUE range and both bounds are None for the default partition
+    partitions = []
+    for name, bound in rows:
+        match = PARTITION_BOUND_RE.search(bound)
+        if match:
+            lower = datetime.datetime.fromisoformat(match.group(1)) if match.group(1) else datetime.datetime.min
+            partitions.append((name, lower, datetime.datetime.fromisoformat(match.group(2))))
+        else:
+            partitions.append((name, None, None))
+    return partitions
+
+def list_partitions(cur, table: str) -> List[Partition]:
+    cur.execute(LIST_PARTITIONS_SQL, (table,))
+    return parse_partitions(cur.fetchall())
+
+def missing_partition_statements(table: str, existing: List[Partition], months_ahead: int = 3, months_back: int = 0) -> List[Tuple[str, str]]:
+    # (partition, CREATE statement) for each monthly partition from months_back months
+    # ago through months_ahead months from now that no existing partition covers yet
+    # (such as the legacy partition of a converted table), plus the default partition
+    this_month = month_start(datetime.date.today())
+    ranges = [(lower, upper) for _, lower, upper in existing if upper is not None]
+    statements = []
+    for offset in range(-months_back, months_ahead + 1):
+        start = month_start(this_month, offset)
+        end = month_start(start, 1)
+        lower, upper = datetime.datetime.combine(start, datetime.time()), datetime.datetime.combine(end, datetime.time())
+        if any(lower < existing_upper and existing_lower < upper for existing_lower, existing_upper in ranges):
+            continue
+        name = partition_name(table, start)
+        statements.append((name, (
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )))
+
+    default = f"{table}_{DEFAULT_PARTITION_SUFFIX}"
+    if default not in [name for name, _, _ in existing]:
+        statements.append((default, f"CREATE TABLE IF NOT EXISTS {default} PARTITION OF {table} DEFAULT"))
+    return statements
+
+def ensure_partitions(cur, table: str, months_ahead: int = 3, months_back: int = 0) -> List[str]:
+    created = []
+    for name, statement in missing_partition_statements(table, list_partitions(cur, table), months_ahead, months_back):
+        cur.execute(statement)
+        created.append(name)
+    return created
+
+def detach_old_partitions(cur, table: str, retain_months: int) -> List[str]:
+    # Partitions whose whole range is older than the retention window are detached
+    # and moved to the archive schema, where they can be dumped and dropped
+    cutoff = datetime.datetime.combine(month_start(datetime.date.today(), -retain_months), datetime.time())
+    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+
+    archived = []
+    for name, _, upper_bound in list_partitions(cur, table):
+        if upper_bound is None or upper_bound > cutoff:
+            continue
+        cur.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        cur.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+        archived.append(name)
+    return archived
+
+def partition_existing_table(cur, table: str):
+    # Converts a plain table in place: the existing heap becomes the legacy partition
+    # covering everything up to next month, new months get their own partitions.
+    # Takes an ACCESS EXCLUSIVE lock on the table for the length of the transaction.
+    legacy = f"{table}_{LEGACY_PARTITION_SUFFIX}"
+    cutoff = month_start(datetime.date.today(), 1)
+
+    if table == "transactions":
+        # Foreign keys can't reference a partitioned table by id alone
+        cur.execute("ALTER TABLE fraud_alerts DROP CONSTRAINT IF EXISTS fraud_alerts_transaction_id_fkey")
+
+    cur.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    # Replaced by the parent's (id, created_at) primary key, which ATTACH builds on the partition
+    cur.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey")
+    # Index names are schema-wide; prefixing the legacy ones frees the names for the
+    # parent's indexes and matches the per-partition names create_tables attaches
+    cur.execute(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = to_regclass(%s)",
+        (legacy,)
+    )
+    for (index,) in cur.fetchall():
+        cur.execute(f"ALTER INDEX {index} RENAME TO {legacy}_{index}")
+    cur.execute(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    cur.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)")
+    cur.execute(f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users(id)")
+    if table == "transactions":
+        cur.execute(f"ALTER TABLE {table} ADD FOREIGN KEY (recipient_id) REFERENCES users(id)")
+    cur.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+    # One scan validates the CHECK; SET NOT NULL and ATTACH then rely on it instead of rescanning
+    cur.execute(
+        f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_range CHECK (created_at IS NOT NULL AND created_at < %s)",
+        (cutoff,)
+    )
+    cur.execute(f"ALTER TABLE {legacy} ALTER COLUMN created_at SET NOT NULL")
+    cur.execute(f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)", (cutoff,))
+    cur.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {legacy}_range")
+
+def maintain_partitions(months_ahead: int = 3, retain_months: Optional[int] = None, lock_timeout: str = "5s"):
+    try:
+        print("🔄 Maintaining partitions...")
+
+        conn = get_connection()
+        cur = conn.cursor()
+
+        for table in PARTITIONED_TABLES:
+            # Give up rather than queue traffic behind a DETACH waiting on a long query
+            cur.execute("SELECT set_config('lock_timeout', %s, true)", (lock_timeout,))
+            if not is_partitioned(cur, table):
+                print(f"Skipping {table} - not partitioned")
+                continue
+
+            for name in ensure_partitions(cur, table, months_ahead):
+                print(f"✅ Created partition {name}")
+            if retain_months is not None:
+                for name in detach_old_partitions(cur, table, retain_months):
+                    print(f"📦 Archived partition {name} to {ARCHIVE_SCHEMA}.{name}")
+            conn.commit()
+
+        print("✅ Partition maintenance completed successfully!")
+
+    except Exception as e:
+        print(f"🔥 Error maintaining partitions: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+    finally:
+        if 'cur' in locals():
+            cur.close()
+        if 'conn' in locals():
+            release_connection(conn)
+
+def convert_tables(tables: List[str], months_ahead: int = 3):
+    try:
+        print("🔄 Converting tables to monthly partitions...")
+
+        conn = get_connection()
+        cur = conn.cursor()
+
+        for table in tables:
+            if is_partitioned(cur, table):
+                print(f"Skipping {table} - already partitioned")
+                continue
+            partition_existing_table(cur, table)
+            ensure_partitions(cur, table, months_ahead)
+            conn.commit()
+            print(f"✅ Partitioned {table}")
+
+    except Exception as e:
+        print(f"🔥 Error converting tables: {e}")
+        if 'conn' in locals():
+            conn.rollback()
+    finally:
+        if 'cur' in locals():
+            cur.close()
+        if 'conn' in locals():
+            release_connection(conn)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monthly partition maintenance for transactions and audit_logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    maintain = subparsers.add_parser("maintain", help="Pre-create future partitions and archive old ones")
+    maintain.add_argument("--months-ahead", type=int, default=3, help="Months of partitions to keep ready ahead of today")
+    maintain.add_argument("--retain-months", type=int, help="Detach and archive partitions older than this many months")
+    maintain.add_argument("--lock-timeout", default="5s", help="Abort instead of waiting longer than this for a lock")
+
+    convert = subparsers.add_parser("convert", help="Convert existing plain tables into partitioned tables")
+    convert.add_argument("tables", nargs="*", default=PARTITIONED_TABLES, help="Tables to convert")
+    convert.add_argument("--months-ahead", type=int, default=3, help="Months of partitions to create ahead of today")
+
+    args = parser.parse_args()
+    if args.command == "maintain":
+        maintain_partitions(args.months_ahead, args.retain_months, args.lock_timeout)
+    else:
+        convert_tables(args.tables, args.months_ahead)
@@ -0,0 +1,176 @@
+import csv
+import sys
+import time
+import argparse
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+from db_pool import connection, get_connection, release_connection, process_pool
+from ledger import OPENING_REFERENCE
+
+# Nightly check that users.balance agrees with history. Users are split into id
+# ranges and each range is verified by a worker process with one aggregate query:
+#   transactions  opening balance + completed deposits - withdrawals/payments
+#                 - transfers sent + transfers received, plus the net movement
+#                 of rows archive.py moved out (archived_transaction_totals) and
+#                 transfers posted through the ledger, which write no transactions
+#   ledger        snapshot + ledger entries since (see ledger.py)
+# Mismatched accounts are reported with their most recent transactions.
+
+CREDIT_TYPES = ["deposit", "mpesa_deposit"]
+DEBIT_TYPES = ["withdrawal", "mpesa_withdrawal", "payment", "transfer"]
+
+TRANSACTIONS_EXPECTED_SQL = """
+    WITH movements AS (
+        SELECT user_id AS account_id,
+            CASE WHEN type = ANY(%(credits)s) THEN amount ELSE -amount END AS delta
+        FROM transactions
+        WHERE user_id BETWEEN %(low)s AND %(high)s AND status = 'completed'
+        AND (type = ANY(%(credits)s) OR type = ANY(%(debits)s))
+        UNION ALL
+        SELECT recipient_id, amount
+        FROM transactions
+        WHERE recipient_id BETWEEN %(low)s AND %(high)s AND recipient_id IS NOT NULL
+        AND status = 'completed' AND type = 'transfer'
+        UNION ALL
+        -- Opening entries restate a balance the transactions above already account for
+        SELECT account_id, amount
+        FROM ledger_entries
+        WHERE account_id BETWEEN %(low)s AND %(high)s AND reference IS DISTINCT FROM %(opening_reference)s
+    )
+    SELECT u.id, u.balance, %(opening)s + COALESCE(a.net_movement, 0) + COALESCE(SUM(m.delta), 0) AS expected
+    FROM users u
+    LEFT JOIN archived_transaction_totals a ON a.user_id = u.id
+    LEFT JOIN movements m ON m.account_id = u.id
+    WHERE u.id BETWEEN %(low)s AND %(high)s
+    GROUP BY u.id, u.balance, a.net_movement
+    HAVING u.balance IS DISTINCT FROM %(opening)s + COALESCE(a.net_movement, 0) + COALESCE(SUM(m.delta), 0)
+"""
+
+LEDGER_EXPECTED_SQL = """
+    SELECT u.id, u.balance, COALESCE(s.balance, 0) + COALESCE(SUM(e.amount), 0) AS expected
+    FROM users u
+    LEFT JOIN balance_snapshots s ON s.account_id = u.id
+    LEFT JOIN ledger_entries e ON e.account_id = u.id AND e.id > COALESCE(s.last_entry_id, 0)
+    WHERE u.id BETWEEN %(low)s AND %(high)s
+    GROUP BY u.id, u.balance, s.balance
+    HAVING u.balance IS DISTINCT FROM COALESCE(s.balance, 0) + COALESCE(SUM(e.amount), 0)
+"""
+
+RECENT_TRANSACTIONS_SQL = """
+    SELECT account_id, id, type, amount, status, created_at
+    FROM (
+        SELECT a.account_id, t.id, t.type, t.amount, t.status, t.created_at,
+            ROW_NUMBER() OVER (PARTITION BY a.account_id ORDER BY t.created_at DESC, t.id DESC) AS position
+        FROM UNNEST(%s::integer[]) AS a(account_id)
+        JOIN transactions t ON t.user_id = a.account_id OR t.recipient_id = a.account_id
+    ) recent
+    WHERE position <= %s
+    ORDER BY account_id, created_at DESC, id DESC
+"""
+
+def reconcile_range(task: Dict[str, Any]) -> Tuple[int, int, List[Dict[str, Any]]]:
+    # Runs in a worker process; returns (low, high, mismatches) for one id range
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            # Repeatable read so balances and history come from the same snapshot
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            params = {
+                "low": task["low"],
+                "high": task["high"],
+                "opening": task["opening_balance"],
+                "credits": CREDIT_TYPES,
+                "debits": DEBIT_TYPES,
+                "opening_reference": OPENING_REFERENCE,
+            }
+            cur.execute(LEDGER_EXPECTED_SQL if task["source"] == "ledger" else TRANSACTIONS_EXPECTED_SQL, params)
+            mismatches = [
+                {"user_id": user_id, "balance": balance, "expected": expected, "transactions": []}
+                for user_id, balance, expected in cur.fetchall()
+            ]
+
+            if mismatches and task["show_transactions"]:
+                by_user = {m["user_id"]: m for m in mismatches}
+                cur.execute(RECENT_TRANSACTIONS_SQL, (list(by_user), task["show_transactions"]))
+                for account_id, *transaction in cur.fetchall():
+                    by_user[account_id]["transactions"].append(tuple(transaction))
+        conn.rollback()
+        return task["low"], task["high"], mismatches
+    finally:
+        release_connection(conn)
+
+def reconcile_balances(source: str = "transactions", range_size: int = 50000, workers: int = 4,
+                       opening_balance: Decimal = Decimal(0), show_transactions: int = 5,
+                       output: str = None) -> int:
+    try:
+        print(f"🔄 Reconciling balances against {source}...")
+        start = time.perf_counter()
+
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MIN(id), 1), COALESCE(MAX(id), 0) FROM users")
+            min_id, max_id = cur.fetchone()
+
+        tasks = [
+            {
+                "low": low,
+                "high": min(low + range_size - 1, max_id),
+                "source": source,
+                "opening_balance": opening_balance,
+                "show_transactions": show_transactions,
+            }
+            for low in range(min_id, max_id + 1, range_size)
+        ]
+
+        mismatches: List[Dict[str, Any]] = []
+        checked = 0
+        with process_pool(max(1, min(workers, len(tasks)))) as pool:
+            for low, high, range_mismatches in pool.imap_unordered(reconcile_range, tasks):
+                checked += 1
+                mismatches.extend(range_mismatches)
+                if range_mismatches:
+                    print(f"  ids {low}-{high}: {len(range_mismatches)} mismatches")
+        mismatches.sort(key=lambda m: m["user_id"])
+
+        for mismatch in mismatches[:50]:
+            difference = mismatch["balance"] - mismatch["expected"]
+            print(f"  user {mismatch['user_id']}: balance {mismatch['balance']}, expected {mismatch['expected']} "
+                  f"(off by {difference})")
+            for transaction_id, type, amount, status, created_at in mismatch["transactions"]:
+                print(f"      #{transaction_id} {created_at:%Y-%m-%d %H:%M} {type} {amount} {status}")
+        if len(mismatches) > 50:
+            print(f"  ... and {len(mismatches) - 50} more")
+
+        if output:
+            with open(output, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["user_id", "balance", "expected", "difference"])
+                writer.writerows(
+                    (m["user_id"], m["balance"], m["expected"], m["balance"] - m["expected"]) for m in mismatches
+                )
+            print(f"Wrote mismatches to {output}")
+
+        elapsed = time.perf_counter() - start
+        status = "✅" if not mismatches else "⚠️"
+        print(f"{status} Checked {max_id - min_id + 1} user ids in {checked} ranges in {elapsed:.2f}s: "
+              f"{len(mismatches)} mismatched balances")
+        return len(mismatches)
+
+    except Exception as e:
+        print(f"🔥 Error reconciling balances: {e}")
+        return -1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check users.balance against transaction or ledger history")
+    parser.add_argument("--source", choices=["transactions", "ledger"], default="transactions", help="History to reconcile against")
+    parser.add_argument("--range-size", type=int, default=50000, help="User ids per worker task")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel worker processes")
+    parser.add_argument("--opening-balance", type=Decimal, default=Decimal(0), help="Balance every account starts from (transactions source)")
+    parser.add_argument("--show-transactions", type=int, default=5, help="Recent transactions listed per mismatched account")
+    parser.add_argument("--output", default=None, help="Write every mismatch to this CSV file")
+    args = parser.parse_args()
+
+    mismatched = reconcile_balances(args.source, args.range_size, args.workers, args.opening_balance,
+                                    args.show_transactions, args.output)
+    # Non-zero exit for schedulers when balances disagree or the check failed
+    sys.exit(0 if mismatched == 0 else 1)
@@ -0,0 +1,70 @@
+import os
+import time
+import threading
+from typing import List, Optional
+
+# Snowflake-style layout: milliseconds since REFERENCE_EPOCH_MS, then the
+# worker id, then a per-millisecond sequence number
+REFERENCE_EPOCH_MS = 1704067200000  # 2024-01-01 UTC
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+BLOCK_SIZE = 1 << SEQUENCE_BITS
+
+# How far a busy worker may run ahead of the clock before it waits for it
+MAX_LEAD_MS = 100
+
+class ReferenceGenerator:
+    def __init__(self, worker_id: Optional[int] = None, prefix: str = "VF"):
+        if worker_id is None:
+            worker_id = os.getpid() & MAX_WORKER_ID
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+
+        self.worker_id = worker_id
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._next = 0
+        self._end = 0
+
+    def _claim_block(self):
+        # Each millisecond gives this worker a block of BLOCK_SIZE ids. When a block runs
+        # out before the clock ticks, the next millisecond is borrowed, but take() can
+        # claim well over 4M ids/sec, so once the worker is MAX_LEAD_MS ahead it waits for
+        # the clock instead. A process that reuses this worker id sooner than that after
+        # this one stops could repeat references; concurrent workers need distinct ids.
+        now_ms = int(time.time() * 1000) - REFERENCE_EPOCH_MS
+        while self._last_ms - now_ms >= MAX_LEAD_MS:
+            time.sleep((self._last_ms - now_ms - MAX_LEAD_MS + 1) / 1000)
+            now_ms = int(time.time() * 1000) - REFERENCE_EPOCH_MS
+        self._last_ms = max(now_ms, self._last_ms + 1)
+        self._next = (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS)
+        self._end = self._next + BLOCK_SIZE
+
+    def next(self) -> str:
+        with self._lock:
+            if self._next >= self._end:
+                self._claim_block()
+            value = self._next
+            self._next += 1
+        return f"{self.prefix}{value}"
+
+    def take_ranges(self, count: int) -> List[range]:
+        # Reserves count values as runs of consecutive ids, one per block touched,
+        # for callers that format the references themselves
+        ranges = []
+        remaining = count
+        with self._lock:
+            while remaining > 0:
+                if self._next >= self._end:
+                    self._claim_block()
+                stop = min(self._end, self._next + remaining)
+                ranges.append(range(self._next, stop))
+                remaining -= stop - self._next
+                self._next = stop
+        return ranges
+
+    def take(self, count: int) -> List[str]:
+        prefix = self.prefix
+        return [f"{prefix}{value}" for block in self.take_ranges(count) for value in block]
@@ -1,94 +1,202 @@
 import os
+import re
+import sys
+import hashlib
+import argparse
 import psycopg2
 from dotenv import load_dotenv
-from datetime import datetime
+from typing import Any, Dict, List
+from db_pool import get_direct_connection
+from partitions import PARTITIONED_TABLES, is_partitioned, ensure_partitions
+from dry_run import dry_run_statements, print_dry_run_report
 
 # Load environment variables
 load_dotenv()
 
-DB_NAME = "neondb"
-DB_USER = "neondb_owner"
-DB_PASSWORD = "npg_43VHrdvtDTbK"
-DB_HOST = "ep-tiny-snow-a2dpd0fn-pooler.eu-central-1.aws.neon.tech"
-DB_PORT = "5432"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
 
-def run_migration():
+# Session-level advisory lock held for the whole run, so deploy nodes starting at
+# the same time queue up and then find the migrations already applied. It is taken
+# on a direct connection, since a transaction-mode pooler would not keep it.
+MIGRATION_LOCK_ID = 727001
+
+# A file whose first lines contain this marker runs outside a transaction, one
+# statement at a time, e.g. for CREATE INDEX CONCURRENTLY
+CONCURRENT_MARKER = re.compile(r"^\s*--\s*migrate:\s*concurrent\b", re.IGNORECASE | re.MULTILINE)
+
+CREATE_MIGRATIONS_TABLE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS migrations (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "ALTER TABLE migrations ADD COLUMN IF NOT EXISTS checksum VARCHAR(64)",
+]
+
+class MigrationError(Exception):
+    pass
+
+def split_statements(sql: str) -> List[str]:
+    # Splits on semicolons outside quotes and comments; enough for plain DDL files
+    statements = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            current.append(char)
+            if sql.startswith(quote, i):
+                current.append(sql[i + 1:i + len(quote)])
+                i += len(quote) - 1
+                quote = None
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+        elif char == "'":
+            quote = "'"
+            current.append(char)
+        elif char == "$":
+            tag = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if tag:
+                quote = tag.group(0)
+                current.append(quote)
+                i += len(quote)
+                continue
+            current.append(char)
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+def load_migration_files(migrations_dir: str = MIGRATIONS_DIR) -> List[Dict[str, Any]]:
+    migrations = []
+    for name in sorted(f for f in os.listdir(migrations_dir) if f.endswith('.sql')):
+        with open(os.path.join(migrations_dir, name), 'r') as f:
+            sql = f.read()
+        migrations.append({
+            "name": name,
+            "sql": sql,
+            "checksum": hashlib.sha256(sql.encode()).hexdigest(),
+            "concurrent": bool(CONCURRENT_MARKER.search(sql)),
+        })
+    return migrations
+
+def pending_migrations(migrations: List[Dict[str, Any]], applied: Dict[str, str]) -> List[Dict[str, Any]]:
+    # applied maps name -> checksum (None for rows recorded before checksums existed)
+    changed = [m["name"] for m in migrations if applied.get(m["name"]) not in (None, m["checksum"])]
+    if changed:
+        raise MigrationError(f"Applied migrations were modified since they ran: {', '.join(changed)}")
+    return [m for m in migrations if m["name"] not in applied]
+
+def run_migration(migrations_dir: str = MIGRATIONS_DIR, dry_run: bool = False) -> bool:
+    # Returns False when a migration failed or was refused; the failing one is rolled back
     conn = None
+    locked = False
     try:
         print("🔄 Running migrations...")
-        
-        # Connect to the database
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT,
-            sslmode='require'
-        )
+
+        # Connect to the database, bypassing any pooler so the lock stays with this session
+        conn = get_direct_connection()
         cur = conn.cursor()
 
-        # Create migrations table if it doesn't exist
-        try:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS migrations (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        locked = True
+        for statement in CREATE_MIGRATIONS_TABLE_SQL:
+            cur.execute(statement)
+        if not dry_run:
             conn.commit()
-        except psycopg2.Error as e:
-            print(f"Error creating migrations table: {e}")
-            conn.rollback()
-            return
 
-        # Get list of migration files
-        migration_files = sorted([f for f in os.listdir('migrations') if f.endswith('.sql')])
-        
-        for migration_file in migration_files:
+        migrations = load_migration_files(migrations_dir)
+        cur.execute("SELECT name, checksum FROM migrations")
+        applied = dict(cur.fetchall())
+
+        # Rows written before checksums were stored adopt the current file's checksum
+        if not dry_run:
+            for migration in migrations:
+                if migration["name"] in applied and applied[migration["name"]] is None:
+                    cur.execute("UPDATE migrations SET checksum = %s WHERE name = %s", (migration["checksum"], migration["name"]))
+                    applied[migration["name"]] = migration["checksum"]
+            conn.commit()
+
+        pending = pending_migrations(migrations, applied)
+        print(f"{len(applied)} migrations already applied, {len(pending)} pending")
+
+        if dry_run:
+            # Pending migrations run back to back in one rolled-back transaction,
+            # so later files see the schema changes of earlier ones
+            statements = [(m["name"], statement) for m in pending for statement in split_statements(m["sql"])]
+            reports = dry_run_statements(conn, [statement for _, statement in statements])
+            for migration in pending:
+                print_dry_run_report(
+                    [report for (name, _), report in zip(statements, reports) if name == migration["name"]],
+                    f"Dry run of {migration['name']}"
+                )
+            return True
+
+        for migration in pending:
+            print(f"Running migration: {migration['name']}{' (concurrent)' if migration['concurrent'] else ''}")
             try:
-                # Check if migration has already been run
-                cur.execute("SELECT id FROM migrations WHERE name = %s", (migration_file,))
-                if cur.fetchone():
-                    print(f"Skipping {migration_file} - already executed")
-                    continue
-
-                print(f"Running migration: {migration_file}")
-                
-                # Read and execute migration file
-                with open(f'migrations/{migration_file}', 'r') as f:
-                    sql = f.read()
-                    cur.execute(sql)
-                
-                # Record migration execution
-                cur.execute("INSERT INTO migrations (name) VALUES (%s)", (migration_file,))
-                
+                if migration["concurrent"]:
+                    conn.autocommit = True
+                    for statement in split_statements(migration["sql"]):
+                        cur.execute(statement)
+                    conn.autocommit = False
+                else:
+                    cur.execute(migration["sql"])
+                cur.execute(
+                    "INSERT INTO migrations (name, checksum) VALUES (%s, %s)",
+                    (migration["name"], migration["checksum"])
+                )
                 conn.commit()
-                print(f"Successfully executed {migration_file}")
             except psycopg2.Error as e:
-                conn.rollback()  # Rollback the failed transaction
-                if "already exists" in str(e):
-                    print(f"Column already exists in {migration_file}, marking as executed")
-                    try:
-                        cur.execute("INSERT INTO migrations (name) VALUES (%s)", (migration_file,))
-                        conn.commit()
-                    except psycopg2.Error as insert_error:
-                        conn.rollback()
-                        print(f"Failed to mark migration as executed: {insert_error}")
-                else:
-                    print(f"Error executing migration {migration_file}: {e}")
-                    continue
+                # Roll back first: autocommit can't be switched inside the aborted transaction
+                conn.rollback()
+                conn.autocommit = False
+                # Later migrations may depend on this one, so stop here
+                raise MigrationError(f"Error executing migration {migration['name']}: {e}")
+            print(f"Successfully executed {migration['name']}")
+
+        # Keep the upcoming monthly partitions in place on every deploy
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(cur, table):
+                for name in ensure_partitions(cur, table):
+                    print(f"Created partition {name}")
+        conn.commit()
 
         print("All migrations completed successfully")
+        return True
 
     except Exception as e:
         print(f"🔥 Error running migrations: {e}")
         if conn:
             conn.rollback()
+        return False
     finally:
         if conn:
+            if locked and not conn.closed:
+                conn.cursor().execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
             conn.close()
 
 if __name__ == "__main__":
-    run_migration() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run pending SQL migrations")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run migrations over asyncpg")
+    parser.add_argument("--dry-run", action="store_true", help="Run pending migrations in a rolled-back transaction and report locks, timings and rewrite risk")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        succeeded = run_migration(dry_run=True)
+    elif args.use_async:
+        from async_runner import run_async_or_fallback, run_migrations_async
+        succeeded = run_async_or_fallback(run_migrations_async, run_migration)
+    else:
+        succeeded = run_migration()
+    # Non-zero exit so a deploy stops on a failed or modified migration
+    sys.exit(0 if succeeded else 1)
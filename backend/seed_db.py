@@ -1,29 +1,32 @@
 import os
+import io
+import time
+import argparse
 import random
 import string
 import datetime
 import bcrypt
-import psycopg2
-import time
-from psycopg2 import OperationalError
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Set
+from reference_generator import ReferenceGenerator
+from db_pool import get_connection, release_connection, process_pool
+from copy_util import copy_csv, copy_dicts
+from locations import LOCATIONS
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # only needed for --vectorized
+    np = None
+    pa = None
+    pc = None
+    pa_csv = None
 
 # Load environment variables
 load_dotenv()
 
-DB_NAME = "neondb"
-DB_USER = "neondb_owner"
-DB_PASSWORD = "npg_43VHrdvtDTbK"
-DB_HOST = "ep-tiny-snow-a2dpd0fn-pooler.eu-central-1.aws.neon.tech"
-DB_PORT = "5432"
-# Database connection parameters
-# DB_NAME = os.getenv('DB_NAME')
-# DB_USER = os.getenv('DB_USER')
-# DB_PASSWORD = os.getenv('DB_PASSWORD')
-# DB_HOST = os.getenv('DB_HOST')
-# DB_PORT = os.getenv('DB_PORT', '5432')
-
 # Kenyan names for realistic data
 KENYAN_NAMES = [
     "Wanjiku Kamau",
@@ -56,40 +59,56 @@ TRANSACTION_DESCRIPTIONS = {
     "mpesa_withdrawal": ["M-PESA Withdrawal", "M-PESA Transfer Out", "Mobile Money Withdrawal"],
 }
 
-# Kenyan locations
-LOCATIONS = [
-    "Nairobi",
-    "Mombasa",
-    "Kisumu",
-    "Nakuru",
-    "Eldoret",
-    "Thika",
-    "Malindi",
-    "Kitale",
-    "Machakos",
-    "Garissa",
-]
+# Notification templates
+NOTIFICATION_TYPES = ["transaction", "security", "account", "support"]
 
-def get_connection(max_retries=3, retry_delay=5):
-    for attempt in range(max_retries):
-        try:
-            conn = psycopg2.connect(
-                dbname=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                host=DB_HOST,
-                port=DB_PORT,
-                connect_timeout=10,
-                sslmode='require'
-            )
-            return conn
-        except OperationalError as e:
-            print(f"Connection attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                raise
+NOTIFICATION_TITLES = {
+    "transaction": ["Transaction Completed", "Large Transaction Alert", "Transaction Failed"],
+    "security": ["Security Alert", "New Device Login", "Password Changed"],
+    "account": ["Account Update", "Balance Low", "Statement Available"],
+    "support": ["Ticket Updated", "Support Response", "Issue Resolved"],
+}
+
+NOTIFICATION_MESSAGES = {
+    "transaction": [
+        "Your transaction of KSH [amount] has been completed successfully.",
+        "A large transaction of KSH [amount] was processed on your account.",
+        "Your transaction of KSH [amount] failed. Please try again.",
+    ],
+    "security": [
+        "Unusual login activity detected on your account. Please verify.",
+        "New device login detected. If this was not you, please contact support.",
+        "Your password was changed successfully.",
+    ],
+    "account": [
+        "Your account details have been updated successfully.",
+        "Your account balance is below KSH 1,000. Consider making a deposit.",
+        "Your monthly statement is now available for download.",
+    ],
+    "support": [
+        "Your support ticket has been updated. Check for details.",
+        "Support team has responded to your inquiry.",
+        "Your support issue has been resolved. Please let us know if you need further assistance.",
+    ],
+}
+
+# Audit log actions
+AUDIT_ACTIONS = [
+    "user.login",
+    "user.logout",
+    "user.password_change",
+    "user.profile_update",
+    "transaction.create",
+    "transaction.approve",
+    "transaction.reject",
+    "fraud.alert.create",
+    "fraud.alert.resolve",
+    "fraud.rule.create",
+    "fraud.rule.update",
+    "admin.login",
+    "admin.user_update",
+    "admin.system_setting_change",
+]
 
 def generate_account_number() -> str:
     return str(random.randint(1000000000, 9999999999))
@@ -97,10 +116,17 @@ def generate_account_number() -> str:
 def generate_phone_number() -> str:
     return f"+254{random.randint(700000000, 799999999)}"
 
+# Unique by construction once every seeding process - including each parallel worker
+# and other seeders running at the same time - has reserved a worker id of its own
+REFERENCES = ReferenceGenerator()
+
+def reserve_reference_worker(cur):
+    global REFERENCES
+    cur.execute("SELECT nextval('reference_worker_id_seq')")
+    REFERENCES = ReferenceGenerator(worker_id=cur.fetchone()[0])
+
 def generate_reference() -> str:
-    timestamp = str(int(datetime.datetime.now().timestamp()))[-8:]
-    random_num = str(random.randint(0, 999)).zfill(3)
-    return f"VF{timestamp}{random_num}"
+    return REFERENCES.next()
 
 def generate_ip_address() -> str:
     return f"{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
@@ -143,149 +169,628 @@ def calculate_risk_score(amount: float, type: str) -> int:
 def generate_verification_code() -> str:
     return ''.join(random.choices(string.digits, k=6))
 
-
-def seed_database():
-    try:
-        print("🔄 Seeding database with test data...")
-        # Add your database seeding logic here
-    except Exception as e:
-        print(f"❌ Error while seeding: {e}")
-
-import os
-import random
-import string
-import datetime
-import bcrypt
-import psycopg2
-from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
-
-# Load environment variables
-load_dotenv()
-
-DB_NAME = "vibeflow_b3jd"
-DB_USER = "viber"
-DB_PASSWORD = "1SnuIVB9PleqpJjQe3IrX5P4mztADQs8"
-DB_HOST = "dpg-d1puu6c9c44c73924l00-a.oregon-postgres.render.com"
-DB_PORT = "5432"
-# Database connection parameters
-# DB_NAME = os.getenv('DB_NAME')
-# DB_USER = os.getenv('DB_USER')
-# DB_PASSWORD = os.getenv('DB_PASSWORD')
-# DB_HOST = os.getenv('DB_HOST')
-# DB_PORT = os.getenv('DB_PORT', '5432')
-
-# Kenyan names for realistic data
-KENYAN_NAMES = [
-    "Wanjiku Kamau",
-    "Otieno Odhiambo",
-    "Njeri Mwangi",
-    "Kipchoge Keino",
-    "Akinyi Onyango",
-    "Muthoni Kariuki",
-    "Omondi Ochieng",
-    "Wangari Maathai",
-    "Kimani Nganga",
-    "Auma Obama",
-    "Jomo Kenyatta",
-    "Lupita Nyong'o",
-    "Eliud Kipchoge",
-    "Wangui Ngũgĩ",
-    "Meja Mwangi",
-]
-
-# Transaction types
-TRANSACTION_TYPES = ["deposit", "withdrawal", "transfer", "payment", "mpesa_deposit", "mpesa_withdrawal"]
-
-# Transaction descriptions
-TRANSACTION_DESCRIPTIONS = {
-    "deposit": ["Cash Deposit", "Salary Deposit", "Cheque Deposit", "Business Income"],
-    "withdrawal": ["ATM Withdrawal", "Over-the-counter Withdrawal", "Agent Withdrawal"],
-    "transfer": ["Account Transfer", "Family Support", "Business Payment", "Loan Repayment"],
-    "payment": ["Utility Payment", "School Fees", "Rent Payment", "Grocery Shopping", "Medical Bill"],
-    "mpesa_deposit": ["M-PESA Deposit", "M-PESA Transfer In", "Mobile Money Deposit"],
-    "mpesa_withdrawal": ["M-PESA Withdrawal", "M-PESA Transfer Out", "Mobile Money Withdrawal"],
-}
-
-# Kenyan locations
-LOCATIONS = [
-    "Nairobi",
-    "Mombasa",
-    "Kisumu",
-    "Nakuru",
-    "Eldoret",
-    "Thika",
-    "Malindi",
-    "Kitale",
-    "Machakos",
-    "Garissa",
-]
-
-def generate_account_number() -> str:
-    return str(random.randint(1000000000, 9999999999))
-
-def generate_phone_number() -> str:
-    return f"+254{random.randint(700000000, 799999999)}"
-
-def generate_reference() -> str:
-    timestamp = str(int(datetime.datetime.now().timestamp()))[-8:]
-    random_num = str(random.randint(0, 999)).zfill(3)
-    return f"VF{timestamp}{random_num}"
-
-def generate_ip_address() -> str:
-    return f"{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
-
-def generate_device_info() -> str:
-    devices = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
-        "Mozilla/5.0 (Linux; Android 11; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36",
+def refresh_verification_codes(conn, cur, batch_size: int = 50000) -> int:
+    # Codes are generated server-side and updated one id range per statement,
+    # committing each batch so row locks are never held across the whole table
+    cur.execute("SELECT MIN(id), MAX(id) FROM users")
+    min_id, max_id = cur.fetchone()
+    if min_id is None:
+        return 0
+
+    updated = 0
+    for start in range(min_id, max_id + 1, batch_size):
+        cur.execute(
+            """
+            UPDATE users
+            SET verification_code = LPAD(FLOOR(RANDOM() * 1000000)::INTEGER::TEXT, 6, '0'),
+            verification_code_expires_at = LOCALTIMESTAMP + INTERVAL '24 hours'
+            WHERE id BETWEEN %s AND %s
+            """,
+            (start, start + batch_size - 1)
+        )
+        updated += cur.rowcount
+        conn.commit()
+        if max_id - min_id >= batch_size:
+            print(f"  {updated} users updated (through id {min(start + batch_size - 1, max_id)} of {max_id})")
+    return updated
+
+# Password hashing for seeded users
+SEED_PASSWORD = "Password123"
+BCRYPT_ROUNDS = 12
+
+# Pre-computed hashes of SEED_PASSWORD, empty means hash per user
+PASSWORD_HASH_POOL: List[str] = []
+
+def hash_seed_password(rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(SEED_PASSWORD.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+def build_password_hash_pool(size: int, rounds: int = BCRYPT_ROUNDS, processes: int = 1) -> List[str]:
+    if processes > 1:
+        with process_pool(processes) as pool:
+            return pool.map(hash_seed_password, [rounds] * size)
+    return [hash_seed_password(rounds) for _ in range(size)]
+
+def seed_password_hash() -> str:
+    # Every hash in the pool verifies against SEED_PASSWORD, so reusing them is safe for test data
+    if PASSWORD_HASH_POOL:
+        return random.choice(PASSWORD_HASH_POOL)
+    return hash_seed_password()
+
+def build_transaction(user: Dict[str, Any], users: List[Dict[str, Any]], days: int = 30) -> Dict[str, Any]:
+    type = random.choice(TRANSACTION_TYPES)
+    amount = random.randint(100, 50000)
+    risk_score = calculate_risk_score(amount, type)
+
+    # Determine recipient for transfers
+    recipient_id = None
+    if type == "transfer" and len(users) > 1:
+        recipient = random.choice(users)
+        while recipient["id"] == user["id"]:
+            recipient = random.choice(users)
+        recipient_id = recipient["id"]
+
+    return {
+        "user_id": user["id"],
+        "recipient_id": recipient_id,
+        "type": type,
+        "amount": amount,
+        "description": random.choice(TRANSACTION_DESCRIPTIONS[type]),
+        "reference": generate_reference(),
+        "status": "flagged" if risk_score > 75 else "failed" if random.random() < 0.05 else "completed",
+        "reported": risk_score > 85 or random.random() < 0.03,
+        "risk_score": risk_score,
+        "created_at": generate_date(days),
+    }
+
+def build_fraud_alert(transaction: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not (transaction["risk_score"] > 75 or random.random() < 0.05):
+        return None
+
+    status = random.choices(["new", "reviewing", "resolved"], weights=[0.7, 0.15, 0.15])[0]
+    resolution = None
+    if status == "resolved":
+        resolution = random.choice([
+            "Legitimate transaction confirmed with customer",
+            "Fraudulent transaction, account credited"
+        ])
+
+    return {
+        "user_id": transaction["user_id"],
+        "transaction_id": transaction["id"],
+        "description": f"Suspicious {transaction['type']} of KSH {transaction['amount']:.2f}",
+        "status": status,
+        "risk_score": transaction["risk_score"],
+        "resolution": resolution,
+        "created_at": generate_date(15),
+    }
+
+def build_notifications(user: Dict[str, Any]) -> List[Dict[str, Any]]:
+    notifications = []
+    # Create 3-7 notifications per user
+    for _ in range(random.randint(3, 7)):
+        type = random.choice(NOTIFICATION_TYPES)
+        titles = NOTIFICATION_TITLES[type]
+        messages = NOTIFICATION_MESSAGES[type]
+        title_index = random.randint(0, len(titles) - 1)
+        message = messages[title_index]
+
+        # Replace [amount] placeholder with random amount
+        if "[amount]" in message:
+            amount = f"{random.randint(1000, 50000):.2f}"
+            message = message.replace("[amount]", amount)
+
+        notifications.append({
+            "user_id": user["id"],
+            "title": titles[title_index],
+            "message": message,
+            "type": type,
+            "is_read": random.random() < 0.7,
+            "created_at": generate_date(10),
+        })
+    return notifications
+
+def build_audit_log(user: Dict[str, Any], transaction_ids: List[int], fraud_alert_ids: List[int]) -> Dict[str, Any]:
+    action = random.choice(AUDIT_ACTIONS)
+
+    entity_type = None
+    entity_id = None
+    details = None
+
+    if action == "user.login":
+        entity_type = "user"
+        entity_id = user["id"]
+        details = f"User logged in from {random.choice(LOCATIONS)}"
+    elif action == "user.logout":
+        entity_type = "user"
+        entity_id = user["id"]
+        details = "User logged out"
+    elif action == "user.password_change":
+        entity_type = "user"
+        entity_id = user["id"]
+        details = "User changed password"
+    elif action == "user.profile_update":
+        entity_type = "user"
+        entity_id = user["id"]
+        details = "User updated profile information"
+    elif action in ["transaction.create", "transaction.approve", "transaction.reject"]:
+        entity_type = "transaction"
+        entity_id = random.choice(transaction_ids) if transaction_ids else None
+        details = "Transaction created" if action == "transaction.create" else "Transaction approved after review" if action == "transaction.approve" else "Transaction rejected"
+    elif action in ["fraud.alert.create", "fraud.alert.resolve"]:
+        entity_type = "fraud_alert"
+        entity_id = random.choice(fraud_alert_ids) if fraud_alert_ids else None
+        details = "Fraud alert created" if action == "fraud.alert.create" else "Fraud alert resolved"
+    elif action in ["fraud.rule.create", "fraud.rule.update"]:
+        entity_type = "fraud_rule"
+        entity_id = 1  # Hardcoding to 1 as in TypeScript version
+        details = "Fraud rule created" if action == "fraud.rule.create" else "Fraud rule updated"
+    elif action == "admin.login":
+        entity_type = "admin"
+        entity_id = user["id"]
+        details = f"Admin logged in from {random.choice(LOCATIONS)}"
+    elif action == "admin.user_update":
+        entity_type = "admin"
+        entity_id = user["id"]
+        details = "Admin updated user information"
+    elif action == "admin.system_setting_change":
+        entity_type = "admin"
+        entity_id = user["id"]
+        details = "Admin changed system settings"
+
+    return {
+        "user_id": user["id"],
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details": details,
+        "created_at": generate_date(7),
+    }
+
+# Bulk loading helpers
+USER_COLUMNS = ["id", "name", "first_name", "last_name", "email", "password", "role", "balance", "account_number", "phone_number", "verification_code", "verification_code_expires_at", "created_at"]
+TRANSACTION_COLUMNS = ["id", "user_id", "recipient_id", "type", "amount", "description", "reference", "status", "reported", "risk_score", "created_at"]
+FRAUD_ALERT_COLUMNS = ["id", "user_id", "transaction_id", "description", "status", "risk_score", "resolution", "created_at"]
+NOTIFICATION_COLUMNS = ["user_id", "title", "message", "type", "is_read", "created_at"]
+AUDIT_LOG_COLUMNS = ["user_id", "action", "entity_type", "entity_id", "details", "created_at"]
+
+def reserve_ids(cur, table: str, count: int) -> List[int]:
+    # Pull ids from the table's serial sequence up front so rows can be
+    # COPY'd with explicit ids and still be referenced by dependent tables
+    if count <= 0:
+        return []
+    cur.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        (table, count)
+    )
+    return [row[0] for row in cur.fetchall()]
+
+def copy_columns(cur, table: str, columns: Dict[str, Any]) -> int:
+    # Same as copy_dicts, for data held as one NumPy or Arrow array per column. Arrow
+    # writes the CSV for the whole batch at once, without a Python object per row or value.
+    count = len(next(iter(columns.values())))
+    if count == 0:
+        return 0
+
+    buffer = io.BytesIO()
+    pa_csv.write_csv(pa.table(columns), buffer, pa_csv.WriteOptions(include_header=False))
+    copy_csv(cur, table, list(columns), buffer, null="")
+    return count
+
+def record_load(load_stats: Dict[str, List[float]], table: str, count: int, elapsed: float):
+    stats = load_stats.setdefault(table, [0, 0.0])
+    stats[0] += count
+    stats[1] += elapsed
+
+def timed_copy(cur, table: str, columns: List[str], rows: Iterable[Dict[str, Any]], load_stats: Dict[str, List[float]]) -> int:
+    start = time.perf_counter()
+    count = copy_dicts(cur, table, columns, rows)
+    record_load(load_stats, table, count, time.perf_counter() - start)
+    return count
+
+def timed_copy_columns(cur, table: str, columns: Dict[str, Any], load_stats: Dict[str, List[float]]) -> int:
+    start = time.perf_counter()
+    count = copy_columns(cur, table, columns)
+    record_load(load_stats, table, count, time.perf_counter() - start)
+    return count
+
+def print_load_report(load_stats: Dict[str, List[float]]):
+    print("📊 Bulk load throughput:")
+    for table, (rows, elapsed) in load_stats.items():
+        rate = rows / elapsed if elapsed > 0 else 0
+        print(f"  {table:<20} {int(rows):>10} rows in {elapsed:8.2f}s ({rate:,.0f} rows/sec)")
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def load_key_set(conn, query: str, itersize: int = 100000) -> Set[Any]:
+    # Stream keys through a server-side cursor so large tables aren't fetched in one go
+    with conn.cursor(name="seed_key_loader") as key_cur:
+        key_cur.itersize = itersize
+        key_cur.execute(query)
+        return {row[0] for row in key_cur}
+
+def load_transactions(cur, transactions: List[Dict[str, Any]], load_stats: Dict[str, List[float]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    for transaction, transaction_id in zip(transactions, reserve_ids(cur, "transactions", len(transactions))):
+        transaction["id"] = transaction_id
+    timed_copy(cur, "transactions", TRANSACTION_COLUMNS, transactions, load_stats)
+
+    fraud_alerts = [alert for alert in map(build_fraud_alert, transactions) if alert]
+    for alert, alert_id in zip(fraud_alerts, reserve_ids(cur, "fraud_alerts", len(fraud_alerts))):
+        alert["id"] = alert_id
+    timed_copy(cur, "fraud_alerts", FRAUD_ALERT_COLUMNS, fraud_alerts, load_stats)
+
+    return transactions, fraud_alerts
+
+def load_notifications(cur, users: List[Dict[str, Any]], load_stats: Dict[str, List[float]]) -> int:
+    notifications = (notification for user in users for notification in build_notifications(user))
+    return timed_copy(cur, "notifications", NOTIFICATION_COLUMNS, notifications, load_stats)
+
+def load_audit_logs(cur, users: List[Dict[str, Any]], transaction_ids: List[int], fraud_alert_ids: List[int], count: int, load_stats: Dict[str, List[float]]) -> int:
+    audit_logs = (build_audit_log(random.choice(users), transaction_ids, fraud_alert_ids) for _ in range(count))
+    return timed_copy(cur, "audit_logs", AUDIT_LOG_COLUMNS, audit_logs, load_stats)
+
+def bulk_seed_activity(cur, users: List[Dict[str, Any]], transaction_count: int, audit_log_count: int, load_stats: Dict[str, List[float]]):
+    candidates = [build_transaction(random.choice(users), users) for _ in range(transaction_count)]
+    transactions, fraud_alerts = load_transactions(cur, candidates, load_stats)
+    print(f"Created {len(transactions)} transactions")
+    print(f"Created {len(fraud_alerts)} fraud alerts")
+
+    count = load_notifications(cur, users, load_stats)
+    print(f"Created {count} notifications")
+
+    count = load_audit_logs(cur, users, [t["id"] for t in transactions], [a["id"] for a in fraud_alerts], audit_log_count, load_stats)
+    print(f"Created {count} audit logs")
+
+# Synthetic data generation
+FIRST_NAMES = [name.split()[0] for name in KENYAN_NAMES]
+LAST_NAMES = [' '.join(name.split()[1:]) for name in KENYAN_NAMES]
+
+def synthetic_email(index: int) -> str:
+    return f"{FIRST_NAMES[index % len(FIRST_NAMES)].lower()}.{index}@example.com"
+
+def build_synthetic_user(index: int) -> Dict[str, Any]:
+    # Combine first and last names so larger datasets don't repeat the same 15 people
+    first_name = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last_name = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+
+    return {
+        "index": index,
+        "name": f"{first_name} {last_name}",
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": synthetic_email(index),
+        "password": seed_password_hash(),
+        "role": "user",
+        "balance": random.randint(5000, 100000),
+        # 11 digits derived from the index can't collide with the random 10-digit numbers
+        "account_number": f"1{index:010d}",
+        "phone_number": generate_phone_number(),
+        "verification_code": generate_verification_code(),
+        "verification_code_expires_at": datetime.datetime.now() + datetime.timedelta(hours=24),
+        "created_at": generate_date(),
+    }
+
+def load_synthetic_users(cur, indexes: range, load_stats: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+    users = [build_synthetic_user(index) for index in indexes]
+
+    # Reuse users left behind by a previous run instead of failing on the unique email
+    cur.execute("SELECT id, email FROM users WHERE email = ANY(%s)", ([u["email"] for u in users],))
+    existing = {email: user_id for user_id, email in cur.fetchall()}
+    new_users = []
+    for user in users:
+        if user["email"] in existing:
+            user["id"] = existing[user["email"]]
+        else:
+            new_users.append(user)
+
+    for user, user_id in zip(new_users, reserve_ids(cur, "users", len(new_users))):
+        user["id"] = user_id
+    timed_copy(cur, "users", USER_COLUMNS, new_users, load_stats)
+    return users
+
+def generate_transactions(users: List[Dict[str, Any]], transactions_per_user: int, days: int) -> Iterator[Dict[str, Any]]:
+    for user in users:
+        for _ in range(transactions_per_user):
+            yield build_transaction(user, users, days)
+
+# Vectorized generation
+RNG = np.random.default_rng() if np is not None else None
+
+def vectorized_risk_scores(amounts, type_index):
+    # Same thresholds as calculate_risk_score, applied to whole columns
+    type_bonus = np.array([10 if t in ["withdrawal", "mpesa_withdrawal"] else 5 if t == "transfer" else 0 for t in TRANSACTION_TYPES])
+    scores = np.select([amounts > 50000, amounts > 10000, amounts > 5000], [30, 15, 5], 0)
+    scores = scores + type_bonus[type_index] + RNG.integers(0, 21, len(amounts))
+    return np.minimum(scores, 100)
+
+def categorical(categories: List[str], index):
+    # Dictionary-encoded text column: only the categories are converted to Arrow strings
+    return pa.DictionaryArray.from_arrays(index, categories)
+
+def reference_column(count: int):
+    # REFERENCES.take(count), with the prefix and numbers joined by Arrow
+    values = np.concatenate([np.arange(block.start, block.stop, dtype=np.int64) for block in REFERENCES.take_ranges(count)])
+    return pc.binary_join_element_wise(REFERENCES.prefix, pa.array(values).cast(pa.string()), "")
+
+TRANSACTION_STATUSES = ["completed", "flagged", "failed"]
+
+def generate_transaction_columns(user_ids, owners, days: int) -> Dict[str, Any]:
+    # owners holds, per generated row, the position of its user in user_ids
+    n = len(owners)
+    now = np.datetime64(datetime.datetime.now(), "us")
+    type_index = RNG.integers(0, len(TRANSACTION_TYPES), n)
+    amounts = RNG.integers(100, 50001, n)
+    risk_scores = vectorized_risk_scores(amounts, type_index)
+
+    # Pick a description from each row's own type
+    counts = np.array([len(TRANSACTION_DESCRIPTIONS[t]) for t in TRANSACTION_TYPES])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    descriptions = [d for t in TRANSACTION_TYPES for d in TRANSACTION_DESCRIPTIONS[t]]
+    description_index = offsets[type_index] + (RNG.random(n) * counts[type_index]).astype(np.int64)
+
+    # Transfers go to another user in the same chunk; every other row stays masked (NULL)
+    recipients = np.ma.masked_all(n, dtype=np.int64)
+    transfers = type_index == TRANSACTION_TYPES.index("transfer")
+    if len(user_ids) > 1:
+        picks = RNG.integers(0, len(user_ids) - 1, n)
+        picks += picks >= owners
+        recipients[transfers] = user_ids[picks[transfers]]
+
+    return {
+        "user_id": user_ids[owners],
+        "recipient_id": recipients,
+        "type": categorical(TRANSACTION_TYPES, type_index),
+        "amount": amounts,
+        "description": categorical(descriptions, description_index),
+        "reference": reference_column(n),
+        "status": categorical(TRANSACTION_STATUSES, np.where(risk_scores > 75, 1, np.where(RNG.random(n) < 0.05, 2, 0))),
+        "reported": (risk_scores > 85) | (RNG.random(n) < 0.03),
+        "risk_score": risk_scores,
+        "created_at": now - RNG.integers(1, days + 1, n) * np.timedelta64(1, "D"),
+    }
+
+def load_transaction_columns(cur, columns: Dict[str, Any], load_stats: Dict[str, List[float]]) -> Tuple[List[int], List[int]]:
+    n = len(columns["user_id"])
+    transaction_ids = np.array(reserve_ids(cur, "transactions", n), dtype=np.int64)
+    timed_copy_columns(cur, "transactions", {"id": transaction_ids, **columns}, load_stats)
+
+    # Same alert rules as build_fraud_alert, applied to the whole batch
+    flagged = (columns["risk_score"] > 75) | (RNG.random(n) < 0.05)
+    k = int(flagged.sum())
+    statuses = RNG.choice(["new", "reviewing", "resolved"], k, p=[0.7, 0.15, 0.15])
+    resolutions = np.full(k, None, dtype=object)
+    resolved = statuses == "resolved"
+    resolutions[resolved] = RNG.choice([
+        "Legitimate transaction confirmed with customer",
+        "Fraudulent transaction, account credited"
+    ], int(resolved.sum()))
+    descriptions = [
+        f"Suspicious {type} of KSH {amount:.2f}"
+        for type, amount in zip(columns["type"].filter(flagged).to_pylist(), columns["amount"][flagged].tolist())
     ]
-    return random.choice(devices)
-
-def generate_date(days_ago: int = 365) -> datetime.datetime:
-    return datetime.datetime.now() - datetime.timedelta(days=random.randint(1, days_ago))
-
-def calculate_risk_score(amount: float, type: str) -> int:
-    score = 0
 
-    # Higher amounts have higher risk
-    if amount > 50000:
-        score += 30
-    elif amount > 10000:
-        score += 15
-    elif amount > 5000:
-        score += 5
+    alert_ids = np.array(reserve_ids(cur, "fraud_alerts", k), dtype=np.int64)
+    timed_copy_columns(cur, "fraud_alerts", {
+        "id": alert_ids,
+        "user_id": columns["user_id"][flagged],
+        "transaction_id": transaction_ids[flagged],
+        "description": np.array(descriptions, dtype=object),
+        "status": statuses,
+        "risk_score": columns["risk_score"][flagged],
+        "resolution": resolutions,
+        "created_at": np.datetime64(datetime.datetime.now(), "us") - RNG.integers(1, 16, k) * np.timedelta64(1, "D"),
+    }, load_stats)
+
+    return transaction_ids.tolist(), alert_ids.tolist()
+
+def load_chunk_activity(cur, users: List[Dict[str, Any]], transactions_per_user: int, days: int, chunk_size: int, load_stats: Dict[str, List[float]], vectorized: bool = False, shard: Optional[Dict[str, Any]] = None) -> int:
+    # Loads one chunk of users' transactions, fraud alerts and audit logs. Parallel
+    # shards pass their shard so transfers can reach users in other shards.
+    total = 0
+    if vectorized:
+        user_ids = np.array([u["id"] for u in users], dtype=np.int64)
+        owners = np.repeat(np.arange(len(users)), transactions_per_user)
+        for start in range(0, len(owners), chunk_size):
+            columns = generate_transaction_columns(user_ids, owners[start:start + chunk_size], days)
+            if shard:
+                positions, emails = link_cross_shard_columns(columns, users, shard)
+            transaction_ids, fraud_alert_ids = load_transaction_columns(cur, columns, load_stats)
+            if shard:
+                links = [
+                    {"transaction_id": transaction_ids[position], "recipient_email": email}
+                    for position, email in zip(positions.tolist(), emails)
+                ]
+                timed_copy(cur, "seed_transfer_links", TRANSFER_LINK_COLUMNS, links, load_stats)
+            load_audit_logs(cur, users, transaction_ids, fraud_alert_ids, len(transaction_ids) // 2, load_stats)
+            total += len(transaction_ids)
+        return total
+
+    for transactions in chunked(generate_transactions(users, transactions_per_user, days), chunk_size):
+        if shard:
+            link_cross_shard_transfers(transactions, users, shard["base_users"], shard["user_count"])
+        transactions, fraud_alerts = load_transactions(cur, transactions, load_stats)
+        if shard:
+            links = [
+                {"transaction_id": t["id"], "recipient_email": t["recipient_email"]}
+                for t in transactions if "recipient_email" in t
+            ]
+            timed_copy(cur, "seed_transfer_links", TRANSFER_LINK_COLUMNS, links, load_stats)
+        load_audit_logs(cur, users, [t["id"] for t in transactions], [a["id"] for a in fraud_alerts], len(transactions) // 2, load_stats)
+        total += len(transactions)
+    return total
+
+def stream_seed_activity(conn, cur, base_users: List[Dict[str, Any]], user_count: int, transactions_per_user: int, days: int, chunk_size: int, load_stats: Dict[str, List[float]], vectorized: bool = False):
+    # Users, their transactions, alerts, notifications and audit logs are generated
+    # and loaded one chunk at a time, so memory stays bounded by chunk_size
+    def user_chunks() -> Iterator[List[Dict[str, Any]]]:
+        yield base_users
+        for start in range(len(base_users), user_count, chunk_size):
+            yield load_synthetic_users(cur, range(start, min(start + chunk_size, user_count)), load_stats)
+
+    user_total = 0
+    transaction_total = 0
+    for users in user_chunks():
+        transaction_total += load_chunk_activity(cur, users, transactions_per_user, days, chunk_size, load_stats, vectorized)
+        load_notifications(cur, users, load_stats)
+        conn.commit()
 
-    # Certain transaction types are riskier
-    if type in ["withdrawal", "mpesa_withdrawal"]:
-        score += 10
-    if type == "transfer":
-        score += 5
+        user_total += len(users)
+        print(f"Seeded {user_total}/{max(user_count, len(base_users))} users, {transaction_total} transactions")
+
+# Parallel seeding
+TRANSFER_LINK_COLUMNS = ["transaction_id", "recipient_email"]
+
+def link_cross_shard_transfers(transactions: List[Dict[str, Any]], users: List[Dict[str, Any]], base_users: List[Dict[str, Any]], user_count: int):
+    # Send transfers to any user in the dataset. Recipients outside this chunk may
+    # live in another worker's shard and not exist yet, so they are recorded by
+    # email and wired up by the coordinator once every shard has committed.
+    first_index = users[0]["index"]
+    for transaction in transactions:
+        if transaction["type"] != "transfer":
+            continue
+        index = random.randrange(user_count)
+        if index < len(base_users):
+            transaction["recipient_id"] = base_users[index]["id"]
+        elif index < first_index or index >= first_index + len(users):
+            transaction["recipient_id"] = None
+            transaction["recipient_email"] = synthetic_email(index)
+
+def link_cross_shard_columns(columns: Dict[str, Any], users: List[Dict[str, Any]], shard: Dict[str, Any]):
+    # Vectorized link_cross_shard_transfers; returns the row positions and emails to park
+    base_users = shard["base_users"]
+    first_index = users[0]["index"]
+    transfers = np.flatnonzero(columns["type"].indices.to_numpy() == TRANSACTION_TYPES.index("transfer"))
+    index = RNG.integers(0, shard["user_count"], len(transfers))
+
+    in_base = index < len(base_users)
+    base_ids = np.array([u["id"] for u in base_users], dtype=np.int64)
+    columns["recipient_id"][transfers[in_base]] = base_ids[index[in_base]]
+
+    outside = ~in_base & ((index < first_index) | (index >= first_index + len(users)))
+    positions = transfers[outside]
+    columns["recipient_id"][positions] = np.ma.masked
+    return positions, [synthetic_email(i) for i in index[outside].tolist()]
+
+def seed_shard(shard: Dict[str, Any]) -> Dict[str, List[float]]:
+    # Each worker owns a disjoint range of user indexes and its own connection
+    global RNG
+    random.seed()
+    if np is not None:
+        RNG = np.random.default_rng()
+    PASSWORD_HASH_POOL[:] = shard["password_hashes"]
+    chunk_size = shard["chunk_size"]
+    load_stats: Dict[str, List[float]] = {}
+
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        reserve_reference_worker(cur)
+        for start in range(shard["start"], shard["stop"], chunk_size):
+            users = load_synthetic_users(cur, range(start, min(start + chunk_size, shard["stop"])), load_stats)
+            load_chunk_activity(cur, users, shard["transactions_per_user"], shard["days"], chunk_size, load_stats, shard["vectorized"], shard)
+            load_notifications(cur, users, load_stats)
+            conn.commit()
+        print(f"Shard {shard['start']}-{shard['stop']} done")
+        return load_stats
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        release_connection(conn)
+
+def parallel_seed_activity(conn, cur, base_users: List[Dict[str, Any]], user_count: int, transactions_per_user: int, days: int, chunk_size: int, workers: int, load_stats: Dict[str, List[float]], vectorized: bool = False):
+    # Transfers into other shards are parked here until every shard has committed
+    cur.execute("""
+        CREATE UNLOGGED TABLE IF NOT EXISTS seed_transfer_links (
+            transaction_id INTEGER PRIMARY KEY,
+            recipient_email VARCHAR(100) NOT NULL
+        )
+    """)
+    conn.commit()
+
+    # The coordinator seeds the base users itself, workers split the synthetic users
+    stream_seed_activity(conn, cur, base_users, len(base_users), transactions_per_user, days, chunk_size, load_stats, vectorized)
+
+    first_index = len(base_users)
+    shard_size = -(-max(user_count - first_index, 0) // workers)
+    shards = [
+        {
+            "start": start,
+            "stop": min(start + shard_size, user_count),
+            "base_users": base_users,
+            "user_count": user_count,
+            "transactions_per_user": transactions_per_user,
+            "days": days,
+            "chunk_size": chunk_size,
+            "password_hashes": PASSWORD_HASH_POOL,
+            "vectorized": vectorized,
+        }
+        for start in range(first_index, user_count, max(shard_size, 1))
+    ]
 
-    # Add some randomness
-    score += random.randint(0, 20)
+    start_time = time.perf_counter()
+    if shards:
+        print(f"Seeding {user_count - first_index} users across {len(shards)} workers...")
+        with process_pool(len(shards)) as pool:
+            for shard_stats in pool.imap_unordered(seed_shard, shards):
+                for table, (rows, elapsed) in shard_stats.items():
+                    stats = load_stats.setdefault(table, [0, 0.0])
+                    stats[0] += rows
+                    stats[1] += elapsed
+
+    # Wire up transfers whose recipient lived in another shard
+    print("Linking cross-shard transfers...")
+    cur.execute("""
+        UPDATE transactions t
+        SET recipient_id = u.id
+        FROM seed_transfer_links l
+        JOIN users u ON u.email = l.recipient_email
+        WHERE t.id = l.transaction_id
+    """)
+    print(f"Linked {cur.rowcount} transfers")
+    cur.execute("DROP TABLE seed_transfer_links")
+    conn.commit()
+
+    elapsed = time.perf_counter() - start_time
+    rows = sum(rows for rows, _ in load_stats.values())
+    print(f"Parallel seeding wrote {int(rows)} rows in {elapsed:.2f}s wall time ({rows / elapsed if elapsed > 0 else 0:,.0f} rows/sec)")
+
+def seed_database(bulk: bool = False, transaction_count: int = 200, audit_log_count: int = 100,
+                  user_count: Optional[int] = None, transactions_per_user: int = 10, days: int = 30,
+                  chunk_size: int = 10000, workers: int = 1, hash_pool_size: int = 0,
+                  bcrypt_rounds: int = BCRYPT_ROUNDS, hash_workers: int = 1, vectorized: bool = False,
+                  use_async: bool = False, concurrency: int = 4):
+    try:
+        print("🔄 Seeding database with test data...")
 
-    # Cap at 100
-    return min(score, 100)
+        if vectorized and pa is None:
+            raise RuntimeError("Vectorized generation requires numpy and pyarrow (pip install numpy pyarrow)")
 
-def generate_verification_code() -> str:
-    return ''.join(random.choices(string.digits, k=6))
+        if hash_pool_size > 0:
+            print(f"Hashing {hash_pool_size} passwords at cost {bcrypt_rounds}...")
+            PASSWORD_HASH_POOL[:] = build_password_hash_pool(hash_pool_size, bcrypt_rounds, hash_workers)
 
-def seed_database():
-    try:
-        print("🔄 Seeding database with test data...")
+        # Connect to the database with retry logic
+        conn = get_connection()
+        cur = conn.cursor()
+        reserve_reference_worker(cur)
 
-        # Connect to the database
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
+        # Load the keys used to keep re-runs idempotent once, instead of probing per row
+        print("Loading existing keys...")
+        cur.execute(
+            "SELECT email, role, balance, account_number FROM users WHERE email = ANY(%s)",
+            ([f"{name.split()[0].lower()}@example.com" for name in KENYAN_NAMES],)
         )
-        cur = conn.cursor()
+        existing_users = {row[0]: row[1:] for row in cur.fetchall()}
+        existing_rules = load_key_set(conn, "SELECT name FROM fraud_rules")
 
         # Create test users
         print("Creating test users...")
@@ -294,18 +799,16 @@ def seed_database():
             first_name = name.split()[0]
             last_name = ' '.join(name.split()[1:]) if len(name.split()) > 1 else ''
             email = f"{first_name.lower()}@example.com"
-            
-            # Check if user already exists
-            cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-            existing_user = cur.fetchone()
-            
+
+            existing_user = email in existing_users
             if existing_user:
+                role, balance, account_number = existing_users[email]
                 print(f"User {email} already exists, updating name and verification code...")
                 verification_code = generate_verification_code()
                 verification_code_expires_at = datetime.datetime.now() + datetime.timedelta(hours=24)
                 cur.execute(
                     """
-                    UPDATE users 
+                    UPDATE users
                     SET name = %s, first_name = %s, last_name = %s,
                     verification_code = %s, verification_code_expires_at = %s
                     WHERE email = %s
@@ -315,7 +818,7 @@ def seed_database():
                 )
                 user_id = cur.fetchone()[0]
             else:
-                password = bcrypt.hashpw("Password123".encode(), bcrypt.gensalt()).decode()
+                password = seed_password_hash()
                 role = "admin" if i == 0 else "agent" if i == 1 else "user"
                 balance = random.randint(5000, 100000)
                 account_number = generate_account_number()
@@ -326,8 +829,8 @@ def seed_database():
 
                 cur.execute(
                     """
-                    INSERT INTO users 
-                    (name, first_name, last_name, email, password, role, balance, account_number, phone_number, 
+                    INSERT INTO users
+                    (name, first_name, last_name, email, password, role, balance, account_number, phone_number,
                     verification_code, verification_code_expires_at, created_at)
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
@@ -343,131 +846,16 @@ def seed_database():
                 "first_name": first_name,
                 "last_name": last_name,
                 "email": email,
-                "role": role if not existing_user else None,  # Will fetch actual role later
-                "balance": balance if not existing_user else None,  # Will fetch actual balance later
-                "account_number": account_number if not existing_user else None  # Will fetch actual account number later
+                "role": role,
+                "balance": balance,
+                "account_number": account_number
             })
             print(f"{'Updated' if existing_user else 'Created'} user: {name} ({email})")
 
         # Update verification codes for all users
         print("Updating verification codes for all users...")
-        cur.execute("SELECT id, email FROM users")
-        all_users = cur.fetchall()
-        
-        for user_id, email in all_users:
-            verification_code = generate_verification_code()
-            verification_code_expires_at = datetime.datetime.now() + datetime.timedelta(hours=24)
-            cur.execute(
-                """
-                UPDATE users 
-                SET verification_code = %s, verification_code_expires_at = %s
-                WHERE id = %s
-                """,
-                (verification_code, verification_code_expires_at, user_id)
-            )
-            print(f"Updated verification code for user: {email}")
-
-        # Fetch complete user data for existing users
-        print("Fetching complete user data...")
-        for user in users:
-            if user["role"] is None:  # This means it was an existing user
-                cur.execute(
-                    "SELECT role, balance, account_number FROM users WHERE id = %s",
-                    (user["id"],)
-                )
-                role, balance, account_number = cur.fetchone()
-                user.update({
-                    "role": role,
-                    "balance": balance,
-                    "account_number": account_number
-                })
-
-        # Create transactions
-        print("Creating transactions...")
-        transactions = []
-        for _ in range(200):
-            user = random.choice(users)
-            type = random.choice(TRANSACTION_TYPES)
-            amount = random.randint(100, 50000)
-            description = random.choice(TRANSACTION_DESCRIPTIONS[type])
-            reference = generate_reference()
-            created_at = generate_date(30)
-            risk_score = calculate_risk_score(amount, type)
-            status = "flagged" if risk_score > 75 else "failed" if random.random() < 0.05 else "completed"
-            reported = risk_score > 85 or random.random() < 0.03
-
-            # Check if transaction with this reference already exists
-            cur.execute("SELECT id FROM transactions WHERE reference = %s", (reference,))
-            if cur.fetchone():
-                print(f"Transaction with reference {reference} already exists, skipping...")
-                continue
-
-            # Determine recipient for transfers
-            recipient_id = None
-            if type == "transfer":
-                recipient = random.choice([u for u in users if u["id"] != user["id"]])
-                recipient_id = recipient["id"]
-
-            cur.execute(
-                """
-                INSERT INTO transactions
-                (user_id, recipient_id, type, amount, description, reference, status, reported, risk_score, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-                """,
-                (user["id"], recipient_id, type, amount, description, reference, status, reported, risk_score, created_at)
-            )
-            transaction_id = cur.fetchone()[0]
-            transactions.append({
-                "id": transaction_id,
-                "user_id": user["id"],
-                "recipient_id": recipient_id,
-                "type": type,
-                "amount": amount,
-                "status": status,
-                "risk_score": risk_score
-            })
-
-        print(f"Created {len(transactions)} transactions")
-
-        # Create fraud alerts
-        print("Creating fraud alerts...")
-        fraud_alerts = []
-        for transaction in transactions:
-            if transaction["risk_score"] > 75 or random.random() < 0.05:
-                status = random.choices(["new", "reviewing", "resolved"], weights=[0.7, 0.15, 0.15])[0]
-                description = f"Suspicious {transaction['type']} of KSH {transaction['amount']:.2f}"
-
-                # Check if fraud alert for this transaction already exists
-                cur.execute("SELECT id FROM fraud_alerts WHERE transaction_id = %s", (transaction["id"],))
-                if cur.fetchone():
-                    print(f"Fraud alert for transaction {transaction['id']} already exists, skipping...")
-                    continue
-
-                resolution = None
-                if status == "resolved":
-                    resolution = random.choice([
-                        "Legitimate transaction confirmed with customer",
-                        "Fraudulent transaction, account credited"
-                    ])
-
-                cur.execute(
-                    """
-                    INSERT INTO fraud_alerts
-                    (user_id, transaction_id, description, status, risk_score, resolution, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    """,
-                    (transaction["user_id"], transaction["id"], description, status, transaction["risk_score"], resolution, generate_date(15))
-                )
-                alert_id = cur.fetchone()[0]
-                fraud_alerts.append({
-                    "id": alert_id,
-                    "transaction_id": transaction["id"],
-                    "status": status
-                })
-
-        print(f"Created {len(fraud_alerts)} fraud alerts")
+        updated = refresh_verification_codes(conn, cur)
+        print(f"Updated verification codes for {updated} users")
 
         # Create fraud rules
         print("Creating fraud rules...")
@@ -507,9 +895,7 @@ def seed_database():
         admin_user = next((u for u in users if u["role"] == "admin"), None)
 
         for rule in fraud_rules:
-            # Check if rule already exists
-            cur.execute("SELECT id FROM fraud_rules WHERE name = %s", (rule["name"],))
-            if cur.fetchone():
+            if rule["name"] in existing_rules:
                 print(f"Fraud rule '{rule['name']}' already exists, skipping...")
                 continue
 
@@ -568,143 +954,102 @@ def seed_database():
 
         print("Created customer support tickets")
 
-        # Create notifications
-        print("Creating notifications...")
-        notification_types = ["transaction", "security", "account", "support"]
-        notification_titles = {
-            "transaction": ["Transaction Completed", "Large Transaction Alert", "Transaction Failed"],
-            "security": ["Security Alert", "New Device Login", "Password Changed"],
-            "account": ["Account Update", "Balance Low", "Statement Available"],
-            "support": ["Ticket Updated", "Support Response", "Issue Resolved"],
-        }
+        load_stats: Dict[str, List[float]] = {}
+        if user_count is not None and workers > 1:
+            # Split the synthetic users across a pool of worker processes
+            parallel_seed_activity(conn, cur, users, user_count, transactions_per_user, days, chunk_size, workers, load_stats, vectorized)
+            print_load_report(load_stats)
+            print("✅ Database seeding completed successfully!")
+            return
+
+        if user_count is not None and use_async:
+            # Load chunks concurrently over asyncpg, falling back to the streaming path
+            from async_runner import run_async_or_fallback, seed_activity_async
+            if vectorized:
+                print("--vectorized is not supported with --async, generating rows per transaction")
+            conn.commit()
+            run_async_or_fallback(
+                lambda: seed_activity_async(users, user_count, transactions_per_user, days, chunk_size, concurrency, load_stats),
+                lambda: stream_seed_activity(conn, cur, users, user_count, transactions_per_user, days, chunk_size, load_stats, vectorized)
+            )
+            print_load_report(load_stats)
+            print("✅ Database seeding completed successfully!")
+            return
+
+        if user_count is not None:
+            # Generate a synthetic dataset of the requested size in bounded chunks
+            stream_seed_activity(conn, cur, users, user_count, transactions_per_user, days, chunk_size, load_stats, vectorized)
+            print_load_report(load_stats)
+            print("✅ Database seeding completed successfully!")
+            return
+
+        if bulk:
+            # Stream transactions, fraud alerts, notifications and audit logs through COPY
+            bulk_seed_activity(cur, users, transaction_count, audit_log_count, load_stats)
+            conn.commit()
+            print_load_report(load_stats)
+            print("✅ Database seeding completed successfully!")
+            return
 
-        notification_messages = {
-            "transaction": [
-                "Your transaction of KSH [amount] has been completed successfully.",
-                "A large transaction of KSH [amount] was processed on your account.",
-                "Your transaction of KSH [amount] failed. Please try again.",
-            ],
-            "security": [
-                "Unusual login activity detected on your account. Please verify.",
-                "New device login detected. If this was not you, please contact support.",
-                "Your password was changed successfully.",
-            ],
-            "account": [
-                "Your account details have been updated successfully.",
-                "Your account balance is below KSH 1,000. Consider making a deposit.",
-                "Your monthly statement is now available for download.",
-            ],
-            "support": [
-                "Your support ticket has been updated. Check for details.",
-                "Support team has responded to your inquiry.",
-                "Your support issue has been resolved. Please let us know if you need further assistance.",
-            ],
-        }
+        # Create transactions
+        print("Creating transactions...")
+        transactions = []
+        for _ in range(transaction_count):
+            transaction = build_transaction(random.choice(users), users)
+
+            cur.execute(
+                """
+                INSERT INTO transactions
+                (user_id, recipient_id, type, amount, description, reference, status, reported, risk_score, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """,
+                (transaction["user_id"], transaction["recipient_id"], transaction["type"], transaction["amount"],
+                transaction["description"], transaction["reference"], transaction["status"], transaction["reported"],
+                transaction["risk_score"], transaction["created_at"])
+            )
+            transaction["id"] = cur.fetchone()[0]
+            transactions.append(transaction)
+
+        print(f"Created {len(transactions)} transactions")
 
-        for user in users:
-            # Create 3-7 notifications per user
-            notification_count = random.randint(3, 7)
-            for _ in range(notification_count):
-                type = random.choice(notification_types)
-                titles = notification_titles[type]
-                messages = notification_messages[type]
-                title_index = random.randint(0, len(titles) - 1)
-                message = messages[title_index]
+        # Create fraud alerts. The transactions above were just inserted with new
+        # sequence ids, so none of them can have an alert yet.
+        print("Creating fraud alerts...")
+        fraud_alerts = []
+        for transaction in transactions:
+            alert = build_fraud_alert(transaction)
+            if not alert:
+                continue
 
-                # Replace [amount] placeholder with random amount
-                if "[amount]" in message:
-                    amount = f"{random.randint(1000, 50000):.2f}"
-                    message = message.replace("[amount]", amount)
+            cur.execute(
+                """
+                INSERT INTO fraud_alerts
+                (user_id, transaction_id, description, status, risk_score, resolution, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """,
+                (alert["user_id"], alert["transaction_id"], alert["description"], alert["status"],
+                alert["risk_score"], alert["resolution"], alert["created_at"])
+            )
+            alert["id"] = cur.fetchone()[0]
+            fraud_alerts.append(alert)
 
-                is_read = random.random() < 0.7
+        print(f"Created {len(fraud_alerts)} fraud alerts")
 
-                cur.execute(
-                    """
-                    INSERT INTO notifications
-                    (user_id, title, message, type, is_read, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (user["id"], titles[title_index], message, type, is_read, generate_date(10))
-                )
+        # Create notifications
+        print("Creating notifications...")
+        notifications = (notification for user in users for notification in build_notifications(user))
+        copy_dicts(cur, "notifications", NOTIFICATION_COLUMNS, notifications)
 
         print("Created notifications for all users")
 
         # Create audit logs
         print("Creating audit logs...")
-        audit_actions = [
-            "user.login",
-            "user.logout",
-            "user.password_change",
-            "user.profile_update",
-            "transaction.create",
-            "transaction.approve",
-            "transaction.reject",
-            "fraud.alert.create",
-            "fraud.alert.resolve",
-            "fraud.rule.create",
-            "fraud.rule.update",
-            "admin.login",
-            "admin.user_update",
-            "admin.system_setting_change",
-        ]
-
-        for _ in range(100):
-            user = random.choice(users)
-            action = random.choice(audit_actions)
-
-            entity_type = None
-            entity_id = None
-            details = None
-
-            if action == "user.login":
-                entity_type = "user"
-                entity_id = user["id"]
-                details = f"User logged in from {random.choice(LOCATIONS)}"
-            elif action == "user.logout":
-                entity_type = "user"
-                entity_id = user["id"]
-                details = "User logged out"
-            elif action == "user.password_change":
-                entity_type = "user"
-                entity_id = user["id"]
-                details = "User changed password"
-            elif action == "user.profile_update":
-                entity_type = "user"
-                entity_id = user["id"]
-                details = "User updated profile information"
-            elif action in ["transaction.create", "transaction.approve", "transaction.reject"]:
-                entity_type = "transaction"
-                entity_id = random.choice(transactions)["id"]
-                details = "Transaction created" if action == "transaction.create" else "Transaction approved after review" if action == "transaction.approve" else "Transaction rejected"
-            elif action in ["fraud.alert.create", "fraud.alert.resolve"]:
-                entity_type = "fraud_alert"
-                entity_id = random.choice(fraud_alerts)["id"] if fraud_alerts else None
-                details = "Fraud alert created" if action == "fraud.alert.create" else "Fraud alert resolved"
-            elif action in ["fraud.rule.create", "fraud.rule.update"]:
-                entity_type = "fraud_rule"
-                entity_id = 1  # Hardcoding to 1 as in TypeScript version
-                details = "Fraud rule created" if action == "fraud.rule.create" else "Fraud rule updated"
-            elif action == "admin.login":
-                entity_type = "admin"
-                entity_id = user["id"]
-                details = f"Admin logged in from {random.choice(LOCATIONS)}"
-            elif action == "admin.user_update":
-                entity_type = "admin"
-                entity_id = user["id"]
-                details = "Admin updated user information"
-            elif action == "admin.system_setting_change":
-                entity_type = "admin"
-                entity_id = user["id"]
-                details = "Admin changed system settings"
-
-            cur.execute(
-                """
-                INSERT INTO audit_logs
-                (user_id, action, entity_type, entity_id, details, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (user["id"], action, entity_type, entity_id, details, generate_date(7))
-            )
+        transaction_ids = [t["id"] for t in transactions]
+        fraud_alert_ids = [a["id"] for a in fraud_alerts]
+        audit_logs = (build_audit_log(random.choice(users), transaction_ids, fraud_alert_ids) for _ in range(audit_log_count))
+        copy_dicts(cur, "audit_logs", AUDIT_LOG_COLUMNS, audit_logs)
 
         print("Created audit logs")
 
@@ -720,7 +1065,39 @@ def seed_database():
         if 'cur' in locals():
             cur.close()
         if 'conn' in locals():
-            conn.close()
+            release_connection(conn)
 
 if __name__ == "__main__":
-    seed_database() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the database with test data")
+    parser.add_argument("--bulk", action="store_true", help="Load transactions, alerts, notifications and audit logs with COPY")
+    parser.add_argument("--transactions", type=int, default=200, help="Number of transactions to generate")
+    parser.add_argument("--audit-logs", type=int, default=100, help="Number of audit logs to generate")
+    parser.add_argument("--users", type=int, help="Generate a synthetic dataset with this many users (streams through COPY)")
+    parser.add_argument("--transactions-per-user", type=int, default=10, help="Transactions per user for --users")
+    parser.add_argument("--days", type=int, default=30, help="Spread synthetic transactions over this many days")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows generated and loaded per chunk for --users")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --users, each with its own connection")
+    parser.add_argument("--hash-pool-size", type=int, default=0, help="Reuse this many pre-computed password hashes instead of hashing per user")
+    parser.add_argument("--bcrypt-rounds", type=int, default=BCRYPT_ROUNDS, help="bcrypt cost factor for the hash pool")
+    parser.add_argument("--hash-workers", type=int, default=1, help="Processes used to build the hash pool")
+    parser.add_argument("--vectorized", action="store_true", help="Generate transaction columns in batches with NumPy (for --users)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Load --users chunks concurrently over asyncpg connections")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent connections for --async")
+    args = parser.parse_args()
+
+    seed_database(
+        bulk=args.bulk,
+        transaction_count=args.transactions,
+        audit_log_count=args.audit_logs,
+        user_count=args.users,
+        transactions_per_user=args.transactions_per_user,
+        days=args.days,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        hash_pool_size=args.hash_pool_size,
+        bcrypt_rounds=args.bcrypt_rounds,
+        hash_workers=args.hash_workers,
+        vectorized=args.vectorized,
+        use_async=args.use_async,
+        concurrency=args.concurrency
+    )
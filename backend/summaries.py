@@ -0,0 +1,265 @@
+import time
+import argparse
+import datetime
+from typing import Optional
+
+from db_pool import get_direct_connection
+from fraud_scoring import FLAG_THRESHOLD
+
+# Daily dashboard totals kept up to date from watermarks, so each run only reads rows
+# added since the previous one:
+#   daily_transaction_totals   per day, type and status
+#   daily_user_totals          per day and user
+#   daily_fraud_alert_totals   alerts created and resolved per day
+# New transactions and alerts are found by id, resolutions by resolved_at. Serial ids
+# can commit out of order, so the id watermark only moves up to a checkpoint - the
+# highest id visible at some earlier moment - once every transaction open at that
+# moment has finished; until then no lower id can still appear. A session left idle in
+# a transaction would hold that back forever, so a checkpoint still unsettled after
+# MAX_CHECKPOINT_WAIT is applied anyway (see below). Later edits
+# to rows that were already counted (a rescored risk_score, a status change) are picked
+# up by rebuilding the affected days with --rebuild-from.
+
+# Session-level advisory lock, taken on a direct connection so a transaction-mode
+# pooler can't drop it; two overlapping runs would count the same rows twice
+SUMMARY_LOCK_ID = 727002
+
+TRANSACTIONS_WATERMARK = "transactions"
+ALERTS_WATERMARK = "fraud_alerts"
+RESOLUTIONS_WATERMARK = "fraud_alert_resolutions"
+
+# Resolutions newer than this are left for the next run, so an update that set
+# resolved_at but hadn't committed yet when the run started isn't skipped
+RESOLUTION_SETTLE = datetime.timedelta(minutes=1)
+
+# Until a checkpoint settles, each run reports the sessions holding it back. Past this
+# age it is applied regardless; rows those sessions commit later with lower ids are
+# then only counted once --rebuild-from covers their day.
+MAX_CHECKPOINT_WAIT = datetime.timedelta(minutes=30)
+
+FLAGGED = "(reported OR risk_score >= %(threshold)s)"
+
+TRANSACTION_TOTALS_SQL = f"""
+    INSERT INTO daily_transaction_totals AS d
+        (day, type, status, transaction_count, total_amount, flagged_count, flagged_amount)
+    SELECT created_at::date, type, COALESCE(status, 'unknown'), COUNT(*), SUM(amount),
+        COUNT(*) FILTER (WHERE {FLAGGED}), COALESCE(SUM(amount) FILTER (WHERE {FLAGGED}), 0)
+    FROM transactions
+    WHERE id > %(low)s AND id <= %(high)s AND created_at >= %(since)s
+    GROUP BY 1, 2, 3
+    ON CONFLICT (day, type, status) DO UPDATE SET
+        transaction_count = d.transaction_count + EXCLUDED.transaction_count,
+        total_amount = d.total_amount + EXCLUDED.total_amount,
+        flagged_count = d.flagged_count + EXCLUDED.flagged_count,
+        flagged_amount = d.flagged_amount + EXCLUDED.flagged_amount
+"""
+
+USER_TOTALS_SQL = f"""
+    INSERT INTO daily_user_totals AS d
+        (day, user_id, transaction_count, total_amount, flagged_count, flagged_amount)
+    SELECT created_at::date, user_id, COUNT(*), SUM(amount),
+        COUNT(*) FILTER (WHERE {FLAGGED}), COALESCE(SUM(amount) FILTER (WHERE {FLAGGED}), 0)
+    FROM transactions
+    WHERE id > %(low)s AND id <= %(high)s AND created_at >= %(since)s AND user_id IS NOT NULL
+    GROUP BY 1, 2
+    ON CONFLICT (day, user_id) DO UPDATE SET
+        transaction_count = d.transaction_count + EXCLUDED.transaction_count,
+        total_amount = d.total_amount + EXCLUDED.total_amount,
+        flagged_count = d.flagged_count + EXCLUDED.flagged_count,
+        flagged_amount = d.flagged_amount + EXCLUDED.flagged_amount
+"""
+
+ALERTS_CREATED_SQL = """
+    INSERT INTO daily_fraud_alert_totals AS d (day, alerts_created)
+    SELECT created_at::date, COUNT(*)
+    FROM fraud_alerts
+    WHERE id > %(low)s AND id <= %(high)s AND created_at >= %(since)s
+    GROUP BY 1
+    ON CONFLICT (day) DO UPDATE SET alerts_created = d.alerts_created + EXCLUDED.alerts_created
+"""
+
+ALERTS_RESOLVED_SQL = """
+    INSERT INTO daily_fraud_alert_totals AS d (day, alerts_resolved)
+    SELECT resolved_at::date, COUNT(*)
+    FROM fraud_alerts
+    WHERE resolved_at > %(after)s AND resolved_at <= %(until)s AND resolved_at >= %(since)s
+    GROUP BY 1
+    ON CONFLICT (day) DO UPDATE SET alerts_resolved = d.alerts_resolved + EXCLUDED.alerts_resolved
+"""
+
+# Highest visible id, plus what is needed to tell later whether the transactions
+# open right now have all finished
+CHECKPOINT_SQL = "SELECT COALESCE(MAX(id), 0), pg_current_snapshot()::text, clock_timestamp() FROM {table}"
+
+# Both tests are needed: a transaction that took an id but has not written yet has
+# no xid, and xact_start of other roles' sessions is hidden without pg_read_all_stats
+CHECKPOINT_SETTLED_SQL = """
+    SELECT pg_snapshot_xmin(pg_current_snapshot()) >= pg_snapshot_xmax(%(snapshot)s::pg_snapshot)
+    AND NOT EXISTS (
+        SELECT 1 FROM pg_stat_activity
+        WHERE datname = current_database() AND backend_type = 'client backend'
+        AND pid <> pg_backend_pid() AND xact_start < %(taken_at)s
+    ), clock_timestamp() - %(taken_at)s
+"""
+
+# Sessions in a transaction since before the checkpoint was taken, oldest first
+CHECKPOINT_BLOCKERS_SQL = """
+    SELECT pid, state, clock_timestamp() - xact_start
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND backend_type = 'client backend'
+    AND pid <> pg_backend_pid() AND xact_start < %(taken_at)s
+    ORDER BY xact_start
+"""
+
+# Oldest value any timestamp filter in this module has to let through
+EPOCH = datetime.datetime(1970, 1, 1)
+
+def get_watermark(cur, name: str):
+    cur.execute("SELECT last_id, last_timestamp FROM summary_watermarks WHERE name = %s", (name,))
+    row = cur.fetchone()
+    return row if row else (0, None)
+
+def get_checkpoint(cur, name: str) -> Optional[tuple]:
+    # (pending_id, pending_snapshot, pending_at), or None
+    cur.execute("SELECT pending_id, pending_snapshot, pending_at FROM summary_watermarks WHERE name = %s", (name,))
+    row = cur.fetchone()
+    return row if row and row[0] is not None else None
+
+def set_watermark(cur, name: str, last_id: int = 0, last_timestamp: Optional[datetime.datetime] = None,
+                  checkpoint: Optional[tuple] = None):
+    pending_id, pending_snapshot, pending_at = checkpoint or (None, None, None)
+    cur.execute(
+        """
+        INSERT INTO summary_watermarks (name, last_id, last_timestamp, pending_id, pending_snapshot, pending_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (name) DO UPDATE SET
+            last_id = EXCLUDED.last_id, last_timestamp = EXCLUDED.last_timestamp,
+            pending_id = EXCLUDED.pending_id, pending_snapshot = EXCLUDED.pending_snapshot,
+            pending_at = EXCLUDED.pending_at, updated_at = EXCLUDED.updated_at
+        """,
+        (name, last_id, last_timestamp, pending_id, pending_snapshot, pending_at)
+    )
+
+def apply_id_range(cur, statements, low: int, high: int, since: datetime.datetime = EPOCH) -> None:
+    params = {"low": low, "high": high, "since": since, "threshold": FLAG_THRESHOLD}
+    for statement in statements:
+        cur.execute(statement, params)
+
+def report_checkpoint_lag(cur, name: str, last_id: int, checkpoint: tuple, age: datetime.timedelta,
+                          max_wait: datetime.timedelta) -> None:
+    cur.execute(CHECKPOINT_BLOCKERS_SQL, {"taken_at": checkpoint[2]})
+    blockers = ", ".join(
+        f"pid {pid} ({state}, open {str(open_for).split('.')[0]})" for pid, state, open_for in cur.fetchall()
+    ) or "a transaction this role can't see"
+    held = str(age).split(".")[0]
+    if age < max_wait:
+        print(f"⚠️ {name} watermark held at id {last_id} for {held} by {blockers}")
+    else:
+        print(f"⚠️ {name} checkpoint unsettled for {held}, past the {max_wait} cutoff: "
+              f"advancing to id {checkpoint[0]} despite {blockers}")
+
+def refresh_by_id(conn, cur, name: str, table: str, statements, batch_size: int,
+                  max_wait: datetime.timedelta = MAX_CHECKPOINT_WAIT) -> int:
+    last_id, _ = get_watermark(cur, name)
+    start_id = last_id
+    checkpoint = get_checkpoint(cur, name)
+    # The checkpoint left by the previous run is tried first; once it is applied, a
+    # fresh one settles at once unless a transaction is open right now
+    for _ in range(2):
+        fresh = checkpoint is None
+        if fresh:
+            cur.execute(CHECKPOINT_SQL.format(table=table))
+            checkpoint = cur.fetchone()
+            conn.commit()
+            if checkpoint[0] <= last_id:
+                checkpoint = None
+                break
+        cur.execute(CHECKPOINT_SETTLED_SQL, {"snapshot": checkpoint[1], "taken_at": checkpoint[2]})
+        settled, age = cur.fetchone()
+        # Transactions open right now are routine; one that outlasted a whole run is not
+        if not settled and not fresh:
+            report_checkpoint_lag(cur, name, last_id, checkpoint, age, max_wait)
+            settled = age >= max_wait
+        if not settled:
+            break
+        # One commit per id range, watermark included, so an interrupted run resumes cleanly
+        while last_id < checkpoint[0]:
+            high = min(last_id + batch_size, checkpoint[0])
+            apply_id_range(cur, statements, last_id, high)
+            set_watermark(cur, name, high, checkpoint=checkpoint)
+            conn.commit()
+            last_id = high
+        checkpoint = None
+    set_watermark(cur, name, last_id, checkpoint=checkpoint)
+    conn.commit()
+    return last_id - start_id
+
+def refresh_resolutions(conn, cur) -> None:
+    _, after = get_watermark(cur, RESOLUTIONS_WATERMARK)
+    cur.execute("SELECT LOCALTIMESTAMP - %s", (RESOLUTION_SETTLE,))
+    until = cur.fetchone()[0]
+    cur.execute(ALERTS_RESOLVED_SQL, {"after": after or EPOCH, "until": until, "since": EPOCH})
+    set_watermark(cur, RESOLUTIONS_WATERMARK, last_timestamp=until)
+    conn.commit()
+
+def rebuild_since(conn, cur, since: datetime.date) -> None:
+    # Recomputes every summary row from since onwards up to the current watermarks, in one transaction
+    since_at = datetime.datetime.combine(since, datetime.time())
+    for table in ["daily_transaction_totals", "daily_user_totals", "daily_fraud_alert_totals"]:
+        cur.execute(f"DELETE FROM {table} WHERE day >= %s", (since,))
+
+    transactions_id, _ = get_watermark(cur, TRANSACTIONS_WATERMARK)
+    apply_id_range(cur, [TRANSACTION_TOTALS_SQL, USER_TOTALS_SQL], 0, transactions_id, since_at)
+    alerts_id, _ = get_watermark(cur, ALERTS_WATERMARK)
+    apply_id_range(cur, [ALERTS_CREATED_SQL], 0, alerts_id, since_at)
+    _, resolved_until = get_watermark(cur, RESOLUTIONS_WATERMARK)
+    if resolved_until:
+        cur.execute(ALERTS_RESOLVED_SQL, {"after": EPOCH, "until": resolved_until, "since": since_at})
+    conn.commit()
+
+def refresh_summaries(batch_size: int = 100000, rebuild_from: Optional[datetime.date] = None,
+                      max_checkpoint_wait: datetime.timedelta = MAX_CHECKPOINT_WAIT):
+    conn = None
+    locked = False
+    try:
+        print("🔄 Refreshing dashboard summaries...")
+        start = time.perf_counter()
+
+        conn = get_direct_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT pg_advisory_lock(%s)", (SUMMARY_LOCK_ID,))
+        locked = True
+
+        if rebuild_from:
+            print(f"Rebuilding summaries from {rebuild_from}")
+            rebuild_since(conn, cur, rebuild_from)
+
+        transactions = refresh_by_id(conn, cur, TRANSACTIONS_WATERMARK, "transactions",
+                                     [TRANSACTION_TOTALS_SQL, USER_TOTALS_SQL], batch_size, max_checkpoint_wait)
+        alerts = refresh_by_id(conn, cur, ALERTS_WATERMARK, "fraud_alerts", [ALERTS_CREATED_SQL], batch_size,
+                               max_checkpoint_wait)
+        refresh_resolutions(conn, cur)
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ Summaries refreshed in {elapsed:.2f}s ({transactions} new transaction ids, {alerts} new alert ids)")
+
+    except Exception as e:
+        print(f"🔥 Error refreshing summaries: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            if locked and not conn.closed:
+                conn.cursor().execute("SELECT pg_advisory_unlock(%s)", (SUMMARY_LOCK_ID,))
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally refresh the daily dashboard summary tables")
+    parser.add_argument("--batch-size", type=int, default=100000, help="Ids summarized per committed batch")
+    parser.add_argument("--rebuild-from", type=datetime.date.fromisoformat, default=None,
+                        help="Recompute summaries for days on or after this date (YYYY-MM-DD) first")
+    parser.add_argument("--max-checkpoint-wait", type=float, default=MAX_CHECKPOINT_WAIT.total_seconds() / 60,
+                        help="Minutes an unsettled checkpoint is waited on before it is applied anyway")
+    args = parser.parse_args()
+
+    refresh_summaries(args.batch_size, args.rebuild_from, datetime.timedelta(minutes=args.max_checkpoint_wait))